@@ -576,6 +576,7 @@ class HardwareObjectMixin(CommandContainer):
         Override in subclasses as needed.
 
         """
+        self.close_channels()
         self.update_state(self.STATES.UNKNOWN)
 
     # Signal handling functions:
@@ -19,15 +19,16 @@
 #  along with MXCuBE. If not, see <http://www.gnu.org/licenses/>.
 
 import logging
+import sys
 import weakref
 import copy
-
-from saferef import *
-
-from Poller import *
+import gevent
+import gevent.monkey
 
 # from .CommandContainer import CommandObject, ChannelObject
 from HardwareRepository.CommandContainer import CommandObject, ChannelObject
+from HardwareRepository import Poller
+from HardwareRepository.dispatcher import saferef
 
 try:
     import epics
@@ -38,6 +39,69 @@ except ImportError:
 __copyright__ = """ Copyright © 2010 - 2020 by MXCuBE Collaboration """
 __license__ = "LGPLv3+"
 
+gevent_version = list(map(int, gevent.__version__.split(".")))
+
+# CA monitor callbacks run in a CA thread: a real (not patched) lock is needed
+_allocate_lock = gevent.monkey.get_original(
+    "thread" if sys.version_info[0] < 3 else "_thread", "allocate_lock"
+)
+
+
+class EpicsMonitorDispatcher(object):
+    """
+    Hands the values of the CA monitor callbacks over to the gevent hub,
+    through a single async watcher. Values are coalesced per command: only
+    the latest value received since the last delivery is emitted.
+    """
+
+    def __init__(self):
+        self._lock = _allocate_lock()
+        self._values = {}
+
+        loop = gevent.get_hub().loop
+        if gevent_version < [1, 3, 0]:
+            # 'async' is a reserved word from python 3.7
+            self._async_watcher = getattr(loop, "async")()
+        else:
+            self._async_watcher = loop.async_()
+        self._async_watcher.start(self._deliver)
+
+    def send(self, command, value):
+        """Queue value for command; can be called from any thread"""
+        with self._lock:
+            self._values[command] = value
+        self._async_watcher.send()
+
+    def _deliver(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        if values:
+            gevent.spawn(self._emit_values, values)
+
+    def _emit_values(self, values):
+        for command, value in values.items():
+            try:
+                command.value_changed(value)
+            except Exception:
+                logging.getLogger("HWR").exception(
+                    "EpicsCommand: error in value callback of %s", command.pv_name
+                )
+
+
+_monitor_dispatcher = None
+
+
+def get_monitor_dispatcher():
+    """The monitor dispatcher, created on first call. Its async watcher
+    belongs to the hub of the calling thread: the first call must be made
+    from the gevent thread, not from a CA thread.
+    """
+    global _monitor_dispatcher
+
+    if _monitor_dispatcher is None:
+        _monitor_dispatcher = EpicsMonitorDispatcher()
+    return _monitor_dispatcher
+
 
 class EpicsCommand(CommandObject):
     def __init__(self, name, pv_name, username=None, args=None, **kwargs):
@@ -48,6 +112,7 @@ class EpicsCommand(CommandObject):
         self.pollers = {}
         self.__value_changed_callback_ref = None
         self.__timeout_callback_ref = None
+        self.monitor_dispatcher = None
 
         if args is None:
             self.arg_list = ()
@@ -169,6 +234,23 @@ class EpicsCommand(CommandObject):
             compare,
         )
 
+    def monitor(self, value_changed_callback=None):
+        """
+        Emit the values of the pv from its CA monitor callback, instead of
+        polling it
+        """
+        self.__value_changed_callback_ref = saferef.safe_ref(value_changed_callback)
+
+        # created here, in the gevent thread: the CA thread may call
+        # _monitor_callback as soon as it is added
+        self.monitor_dispatcher = get_monitor_dispatcher()
+        self.pv.add_callback(self._monitor_callback)
+        self.monitor_dispatcher.send(self, self.get_pv_value())
+
+    def _monitor_callback(self, value=None, char_value=None, **kwargs):
+        # called in a CA thread
+        self.monitor_dispatcher.send(self, char_value if self.read_as_str else value)
+
     def stop_polling(self):
         pass
 
@@ -180,7 +262,9 @@ class EpicsCommand(CommandObject):
 
 
 class EpicsChannel(ChannelObject):
-    """Emulation of a 'Epics channel' = an Epics command + polling"""
+    """Emulation of a 'Epics channel' = an Epics command + polling, or CA
+    monitor callbacks with polling="events"
+    """
 
     def __init__(self, name, command, username=None, polling=None, args=None, **kwargs):
         ChannelObject.__init__(self, name, username, **kwargs)
@@ -189,6 +273,12 @@ class EpicsChannel(ChannelObject):
             name + "_internalCmd", command, username, args, **kwargs
         )
 
+        if polling == "events":
+            # values come from the CA monitor, not from polling
+            self.polling = polling
+            self.command.monitor(self.value_changed)
+            return
+
         try:
             self.polling = int(polling)
         except Exception:
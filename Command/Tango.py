@@ -18,10 +18,14 @@
 #  You should have received a copy of the GNU Lesser General Public License
 #  along with MXCuBE. If not, see <http://www.gnu.org/licenses/>.
 
+import collections
 import logging
+import sys
+import time
 import gevent
 import gevent.event
-from gevent.queue import Queue
+import gevent.monkey
+import numpy
 from HardwareRepository.CommandContainer import (
     CommandObject,
     ChannelObject,
@@ -30,6 +34,12 @@ from HardwareRepository.CommandContainer import (
 from HardwareRepository import Poller
 from HardwareRepository.dispatcher import saferef
 
+try:
+    from math import gcd
+except ImportError:
+    # python 2
+    from fractions import gcd
+
 gevent_version = list(map(int,gevent.__version__.split('.')))
 
 try:
@@ -45,6 +55,78 @@ __license__ = "LGPLv3+"
 
 log = logging.getLogger("HWR")
 
+# timeout of the commands and channels [ms]: with the same timeout, the
+# commands and channels of a device share one proxy
+DEFAULT_TIMEOUT = 10000
+
+
+class TangoDevicePool(object):
+    """
+    Process-wide pool of the device proxies, keyed by device name and
+    timeout: the commands and channels of one device with the same timeout
+    share a single connection, and the attributes of the device are
+    queried once.
+    """
+
+    # (device name, timeout): DeviceProxy
+    _devices = {}
+    _raw_devices = {}
+    _attribute_names = {}
+
+    @classmethod
+    def get_device(cls, device_name, timeout=None):
+        """
+        Returns the (gevent) DeviceProxy of device_name with the given
+        timeout [ms] (None: Tango default); a new proxy is pinged, and is
+        not kept if the ping fails
+        """
+        key = (device_name, timeout)
+        device = cls._devices.get(key)
+        if device is None:
+            device = DeviceProxy(device_name)
+            device.ping()
+            if timeout is not None:
+                device.set_timeout_millis(timeout)
+            device = cls._devices.setdefault(key, device)
+        return device
+
+    @classmethod
+    def get_raw_device(cls, device_name):
+        """Returns the (non gevent) DeviceProxy of device_name"""
+        device = cls._raw_devices.get(device_name)
+        if device is None:
+            device = cls._raw_devices.setdefault(
+                device_name, RawDeviceProxy(device_name)
+            )
+        return device
+
+    @classmethod
+    def get_attribute_names(cls, device_name, timeout=None):
+        """
+        Returns the (lower case) attribute names of device_name, queried
+        with the proxy of the given timeout
+        """
+        attribute_names = cls._attribute_names.get(device_name)
+        if attribute_names is None:
+            device = cls.get_device(device_name, timeout)
+            attribute_names = frozenset(
+                attr.name.lower() for attr in device.attribute_list_query()
+            )
+            cls._attribute_names[device_name] = attribute_names
+        return attribute_names
+
+    @classmethod
+    def remove(cls, device_name):
+        """
+        Forgets device_name, e.g. after a device server restart: new
+        proxies are created (and pinged) on next use
+        """
+        for key in [key for key in cls._devices if key[0] == device_name]:
+            del cls._devices[key]
+        cls._raw_devices.pop(device_name, None)
+        cls._attribute_names.pop(device_name, None)
+
+
 class TangoCommand(CommandObject):
     def __init__(self, name, command, tangoname=None, username=None, **kwargs):
         CommandObject.__init__(self, name, username, **kwargs)
@@ -52,22 +134,21 @@ class TangoCommand(CommandObject):
         self.command = command
         self.device_name = tangoname
         self.device = None
+        # see set_device_timeout
+        self.timeout = DEFAULT_TIMEOUT
 
     def init_device(self):
         try:
-            self.device = DeviceProxy(self.device_name)
+            self.device = TangoDevicePool.get_device(self.device_name, self.timeout)
+        except PyTango.ConnectionFailed:
+            self.device = None
+            raise ConnectionError
         except PyTango.DevFailed as traceback:
             last_error = traceback[-1]
             logging.getLogger("HWR").error(
                 "%s: %s", str(self.name()), last_error["desc"]
             )
             self.device = None
-        else:
-            try:
-                self.device.ping()
-            except PyTango.ConnectionFailed:
-                self.device = None
-                raise ConnectionError
 
     def __call__(self, *args, **kwargs):
         self.emit("commandBeginWaitReply", (str(self.name()),))
@@ -82,6 +163,13 @@ class TangoCommand(CommandObject):
             ret = tango_cmd_object(
                 *args
             )  # eval('self.device.%s(*%s)' % (self.command, args))
+        except PyTango.ConnectionFailed as error_dict:
+            logging.getLogger("HWR").error(
+                "%s: Tango, %s", str(self.name()), error_dict
+            )
+            # reconnect on next call
+            TangoDevicePool.remove(self.device_name)
+            self.device = None
         except PyTango.DevFailed as error_dict:
             logging.getLogger("HWR").error(
                 "%s: Tango, %s", str(self.name()), error_dict
@@ -101,50 +189,287 @@ class TangoCommand(CommandObject):
         pass
 
     def set_device_timeout(self, timeout):
-        if self.device is None:
-            self.init_device()
-        self.device.set_timeout_millis(timeout)
+        """Uses a proxy with the given timeout [ms], not to change the
+        timeout of the proxy shared with the other commands and channels
+        """
+        self.timeout = timeout
+        self.init_device()
 
     def is_connected(self):
         return self.device is not None
 
 
-def process_tango_events():
-    while not TangoChannel._tangoEventsQueue.empty():
-        try:
-            ev = TangoChannel._tangoEventsQueue.get_nowait()
-        except Queue.Empty:
-            break
+# Tango events are pushed from Tango threads: a real (not patched) lock is needed
+_allocate_lock = gevent.monkey.get_original(
+    "thread" if sys.version_info[0] < 3 else "_thread", "allocate_lock"
+)
+
+
+class TangoEventMailbox(object):
+    """
+    Bounded mailbox of the event values of one channel. When it is full,
+    the oldest value is dropped: with the default size of 1, only the
+    latest value is delivered.
+    """
+
+    def __init__(self, callback, size=1):
+        self.callback_ref = saferef.safe_ref(callback)
+        self.values = collections.deque(maxlen=size)
+        self.received_count = 0
+        self.dropped_count = 0
+        self.closed = False
+        # waiting for delivery / being delivered
+        self.scheduled = False
+        self.busy = False
+
+    def get_statistics(self):
+        return {
+            "received": self.received_count,
+            "dropped": self.dropped_count,
+            "queue_depth": len(self.values),
+        }
+
+
+class TangoEventDispatcher(object):
+    """
+    Hands the values of Tango events over to the gevent hub, through a
+    single async watcher. Each mailbox is delivered by at most one greenlet
+    at a time, so a slow receiver only delays its own values.
+    """
+
+    def __init__(self):
+        self._lock = _allocate_lock()
+        self._ready = collections.deque()
+        self.dropped_count = 0
+
+        loop = gevent.get_hub().loop
+        if gevent_version < [1, 3, 0]:
+            # 'async' is a reserved word from python 3.7
+            self._async_watcher = getattr(loop, "async")()
         else:
-            try:
-                receiverCbRef = TangoChannel._eventReceivers[id(ev)]
-                receiverCb = receiverCbRef()
-                if receiverCb is not None:
-                    try:
-                        gevent.spawn(receiverCb, ev.event.attr_value.value)
-                    except AttributeError:
-                        pass
-            except KeyError:
-                pass
+            self._async_watcher = loop.async_()
+        self._async_watcher.start(self._deliver)
+
+    def post(self, mailbox, value):
+        """Queue an event value; can be called from any thread"""
+        with self._lock:
+            if mailbox.closed:
+                return
+            if len(mailbox.values) == mailbox.values.maxlen:
+                mailbox.dropped_count += 1
+                self.dropped_count += 1
+            mailbox.values.append(value)
+            mailbox.received_count += 1
+            if mailbox.scheduled:
+                return
+            mailbox.scheduled = True
+            self._ready.append(mailbox)
+        self._async_watcher.send()
+
+    def close(self, mailbox):
+        """No more values are delivered to mailbox"""
+        with self._lock:
+            mailbox.closed = True
+            mailbox.values.clear()
+
+    def get_statistics(self):
+        """
+        Returns:
+            (dict): queue_depth (values waiting for delivery) and
+                    dropped (values replaced by newer ones)
+        """
+        with self._lock:
+            queue_depth = sum(len(mailbox.values) for mailbox in self._ready)
+            return {"queue_depth": queue_depth, "dropped": self.dropped_count}
+
+    def _deliver(self):
+        with self._lock:
+            ready, self._ready = self._ready, collections.deque()
+            start = []
+            for mailbox in ready:
+                mailbox.scheduled = False
+                if not mailbox.busy:
+                    mailbox.busy = True
+                    start.append(mailbox)
+        for mailbox in start:
+            gevent.spawn(self._emit, mailbox)
+
+    def _emit(self, mailbox):
+        while True:
+            with self._lock:
+                values = list(mailbox.values)
+                mailbox.values.clear()
+                if not values:
+                    mailbox.busy = False
+                    return
+
+            callback = mailbox.callback_ref()
+            if callback is None:
+                self.close(mailbox)
+                continue
+            for value in values:
+                try:
+                    callback(value)
+                except Exception:
+                    logging.getLogger("HWR").exception("Error in Tango event callback")
+
+
+_event_dispatcher = None
+
+
+def get_event_dispatcher():
+    """The event dispatcher, created on first call. Its async watcher belongs
+    to the hub of the calling thread: the first call must be made from the
+    gevent thread, not from a Tango event thread.
+    """
+    global _event_dispatcher
+
+    if _event_dispatcher is None:
+        _event_dispatcher = TangoEventDispatcher()
+    return _event_dispatcher
+
+
+def _values_equal(value1, value2):
+    try:
+        return bool(value1 == value2)
+    except ValueError:
+        # array comparison
+        return numpy.array_equal(value1, value2)
+
+
+class TangoPollGroup(object):
+    """
+    Polls the attributes of all polled channels of one Tango device with
+    a single read_attributes call per polling tick, and dispatches the
+    changed values to the channels.
+
+    The polling tick is the greatest common divisor of the channel
+    polling periods (not less than MIN_TICK); at each tick, only the
+    attributes whose own polling period has elapsed are read.
+    """
+
+    MIN_TICK = 50
+    # delay before polling again after an unexpected error [ms]
+    RESTART_DELAY = 1000
+    _poll_groups = {}
+
+    @classmethod
+    def get_poll_group(cls, device_name):
+        poll_group = cls._poll_groups.get(device_name)
+        if poll_group is None:
+            poll_group = cls(device_name)
+            cls._poll_groups[device_name] = poll_group
+        return poll_group
+
+    def __init__(self, device_name):
+        self.device_name = device_name
+        self.raw_device = TangoDevicePool.get_raw_device(device_name)
+        self.channels = ()
+        self.tick = None
+        self.poller = None
+        self._last_read_time = {}
+        self._last_value = {}
+
+    def add_channel(self, channel):
+        if channel in self.channels:
+            return
+        # channels is replaced, not modified, as it is read by the poller thread
+        self.channels = self.channels + (channel,)
 
+        if self.tick is None:
+            tick = channel.polling
+        else:
+            tick = gcd(self.tick, channel.polling)
+        self.tick = max(tick, self.MIN_TICK)
+
+        # an existing poller is reused, with its period lowered to the tick
+        self.poller = Poller.poll(
+            self.poll,
+            polling_period=self.tick,
+            value_changed_callback=self.update,
+            error_callback=self.poll_failed,
+            compare=False,
+        )
 
-class E:
-    def __init__(self, event):
-        self.event = event
+    def get_due_channels(self, now):
+        half_tick = self.tick / 2000.0
+        return [
+            channel
+            for channel in self.channels
+            if now - self._last_read_time.get(channel, 0)
+            >= channel.polling / 1000.0 - half_tick
+        ]
 
+    def poll(self):
+        """Read the due attributes; return (changed values, failed channels)"""
+        now = time.time()
+        due_channels = self.get_due_channels(now)
+        changed = []
+        failed = []
+
+        for read_as_str in (False, True):
+            channels = [ch for ch in due_channels if ch.read_as_str == read_as_str]
+            if not channels:
+                continue
+            attr_names = [ch.attribute_name for ch in channels]
+            try:
+                if read_as_str:
+                    attr_values = self.raw_device.read_attributes(
+                        attr_names, PyTango.DeviceAttribute.ExtractAs.String
+                    )
+                else:
+                    attr_values = self.raw_device.read_attributes(attr_names)
+            except Exception:
+                # e.g. a timeout, or an invalid attribute name: the attributes
+                # are read one by one, to find the failing channels
+                attr_values = [
+                    self._read_attribute(attr_name, read_as_str)
+                    for attr_name in attr_names
+                ]
+
+            for channel, attr_value in zip(channels, attr_values):
+                self._last_read_time[channel] = now
+                if attr_value is None or getattr(attr_value, "has_failed", False):
+                    self._last_value.pop(channel, None)
+                    failed.append(channel)
+                    continue
+                value = attr_value.value
+                if channel in self._last_value and _values_equal(
+                    value, self._last_value[channel]
+                ):
+                    continue
+                self._last_value[channel] = value
+                changed.append((channel, value))
+
+        return changed, failed
+
+    def _read_attribute(self, attr_name, read_as_str):
+        """Read one attribute; None if it fails"""
+        try:
+            if read_as_str:
+                return self.raw_device.read_attribute(
+                    attr_name, PyTango.DeviceAttribute.ExtractAs.String
+                )
+            return self.raw_device.read_attribute(attr_name)
+        except Exception:
+            return None
 
-class TangoChannel(ChannelObject):
-    _tangoEventsQueue = Queue()
-    _eventReceivers = {}
+    def update(self, result):
+        changed, failed = result
+        for channel, value in changed:
+            channel.update(value)
+        for channel in failed:
+            channel.poll_failed(None, self.poller.get_id())
 
-    if gevent_version < [1,3,0]:
-        _tangoEventsProcessingTimer = gevent.get_hub().loop.async()
-    else:
-        _tangoEventsProcessingTimer = gevent.get_hub().loop.async_()
+    def poll_failed(self, e, poller_id):
+        self._last_value.clear()
+        for channel in self.channels:
+            channel.poll_failed(e, poller_id)
+        # the poller stops on error: the other channels are still polled
+        self.poller = self.poller.restart(self.RESTART_DELAY)
 
-    # start Tango events processing timer
-    _tangoEventsProcessingTimer.start(process_tango_events)
 
+class TangoChannel(ChannelObject):
     def __init__(
         self,
         name,
@@ -152,7 +477,7 @@ class TangoChannel(ChannelObject):
         tangoname=None,
         username=None,
         polling=None,
-        timeout=10000,
+        timeout=DEFAULT_TIMEOUT,
         **kwargs
     ):
         ChannelObject.__init__(self, name, username, **kwargs)
@@ -164,6 +489,10 @@ class TangoChannel(ChannelObject):
         self.polling = polling
         self.polling_timer = None
         self.polling_events = False
+        self.event_id = None
+        self.event_mailbox = None
+        self.event_queue_size = int(kwargs.get("event_queue_size", 1))
+        self.event_dispatcher = None
         self.timeout = int(timeout)
         self.read_as_str = kwargs.get("read_as_str", False)
         self._device_initialized = gevent.event.Event()
@@ -198,22 +527,23 @@ class TangoChannel(ChannelObject):
         # self.init_poller.stop()
 
         if isinstance(self.polling, int):
-
-            self.raw_device = RawDeviceProxy(self.device_name)
-            
-            Poller.poll(
-                self.poll,
-                polling_period=self.polling,
-                value_changed_callback=self.update,
-                error_callback=self.poll_failed,
-            )
+            # polled attributes of one device are read together
+            poll_group = TangoPollGroup.get_poll_group(self.device_name)
+            self.raw_device = poll_group.raw_device
+            poll_group.add_channel(self)
         else:
             if self.polling == "events":
                 # try to register event
                 try:
                     self.polling_events = True
+                    # created here, on the gevent hub: push_event is called
+                    # from Tango threads
+                    self.event_dispatcher = get_event_dispatcher()
+                    self.event_mailbox = TangoEventMailbox(
+                        self.update, self.event_queue_size
+                    )
                     # logging.getLogger("HWR").debug("subscribing to CHANGE event for %s", self.attribute_name)
-                    self.device.subscribe_event(
+                    self.event_id = self.device.subscribe_event(
                         self.attribute_name,
                         PyTango.EventType.CHANGE_EVENT,
                         self,
@@ -228,7 +558,11 @@ class TangoChannel(ChannelObject):
 
     def init_device(self):
         try:
-            self.device = DeviceProxy(self.device_name)
+            self.device = TangoDevicePool.get_device(self.device_name, self.timeout)
+        except PyTango.ConnectionFailed:
+            self.imported = True
+            self.device = None
+            raise ConnectionError
         except PyTango.DevFailed as traceback:
             self.imported = False
             last_error = traceback[-1]
@@ -237,24 +571,18 @@ class TangoChannel(ChannelObject):
             )
         else:
             self.imported = True
-            try:
-                self.device.ping()
-            except PyTango.ConnectionFailed:
+
+            # check that the attribute exists (to avoid Abort in PyTango grrr)
+            attribute_names = TangoDevicePool.get_attribute_names(
+                self.device_name, self.timeout
+            )
+            if self.attribute_name.lower() not in attribute_names:
+                logging.getLogger("HWR").error(
+                    "no attribute %s in Tango device %s",
+                    self.attribute_name,
+                    self.device_name,
+                )
                 self.device = None
-                raise ConnectionError
-            else:
-                self.device.set_timeout_millis(self.timeout)
-
-                # check that the attribute exists (to avoid Abort in PyTango grrr)
-                if not self.attribute_name.lower() in [
-                    attr.name.lower() for attr in self.device.attribute_list_query()
-                ]:
-                    logging.getLogger("HWR").error(
-                        "no attribute %s in Tango device %s",
-                        self.attribute_name,
-                        self.device_name,
-                    )
-                    self.device = None
 
     def push_event(self, event):
         # logging.getLogger("HWR").debug("%s | attr_value=%s, event.errors=%s, quality=%s", self.name(), event.attr_value, event.errors,event.attr_value is None and "N/A" or event.attr_value.quality)
@@ -268,10 +596,32 @@ class TangoChannel(ChannelObject):
         else:
             pass
             # logging.getLogger("HWR").debug("%s, receiving good event", self.name())
-        ev = E(event)
-        TangoChannel._eventReceivers[id(ev)] = saferef.safe_ref(self.update)
-        TangoChannel._tangoEventsQueue.put(ev)
-        TangoChannel._tangoEventsProcessingTimer.send()
+        self.event_dispatcher.post(self.event_mailbox, event.attr_value.value)
+
+    def unsubscribe(self):
+        """Stop receiving events"""
+        if self.event_mailbox is not None:
+            self.event_dispatcher.close(self.event_mailbox)
+        if self.event_id is not None:
+            try:
+                self.device.unsubscribe_event(self.event_id)
+            except Exception:
+                logging.getLogger("HWR").exception("could not unsubscribe event")
+            self.event_id = None
+        self.polling_events = False
+
+    def close(self):
+        self.unsubscribe()
+
+    def get_event_statistics(self):
+        """
+        Returns:
+            (dict): received, dropped and queue_depth (values waiting for
+                    delivery) for the events of this channel
+        """
+        if self.event_mailbox is None:
+            return {"received": 0, "dropped": 0, "queue_depth": 0}
+        return self.event_mailbox.get_statistics()
 
     def poll(self):
 
@@ -21,7 +21,9 @@
 """ ProtocolError and StandardClient implementation"""
 import sys
 import socket
+import collections
 import gevent
+import gevent.event
 import gevent.lock
 
 __copyright__ = """ Copyright © 2019 by the MXCuBE collaboration """
@@ -64,9 +66,46 @@ else:
 
     encode = str
 
+_STX_BYTE = b"\x02"
+_ETX_BYTE = b"\x03"
+
 MAX_SIZE_STREAM_MSG = 500000
 
 
+class StreamParser:
+    """Split a STX/ETX delimited byte stream into messages"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._scan_pos = 0
+
+    def feed(self, data):
+        """Add received data to the buffer.
+        Args:
+            data(bytes): received data
+        Returns:
+            (list): The complete messages (bytes), without delimiters
+        """
+        messages = []
+        buf = self._buffer
+        buf.extend(data)
+        while True:
+            end = buf.find(_ETX_BYTE, self._scan_pos)
+            if end < 0:
+                break
+            # data before the last STX (or without STX) is discarded
+            start = buf.rfind(_STX_BYTE, 0, end)
+            if start >= 0:
+                messages.append(bytes(buf[start + 1 : end]))
+            del buf[: end + 1]
+            self._scan_pos = 0
+
+        if len(buf) > MAX_SIZE_STREAM_MSG:
+            del buf[:]
+        self._scan_pos = len(buf)
+        return messages
+
+
 class PROTOCOL:
     """Protocol"""
 
@@ -89,6 +128,7 @@ class StandardClient:
         self.receiving_greenlet = None
         self.msg_received_event = gevent.event.Event()
         self._lock = gevent.lock.Semaphore()
+        self._pending_replies = collections.deque()
         self.__msg_index__ = -1
         self.__sock = None
         self.__constant_local_port = True
@@ -111,6 +151,7 @@ class StandardClient:
         self._is_connected = False
         self.__sock = None
         self.received_msg = None
+        self._fail_pending_replies(self.error or "Disconnected")
 
     def connect(self):
         """Socket connect"""
@@ -239,16 +280,28 @@ class StandardClient:
             msg(str): Message
         """
         self.received_msg = msg
+        # replies come back in the order of the requests
+        if self._pending_replies:
+            self._pending_replies.popleft().set(msg)
         self.msg_received_event.set()
 
+    def _fail_pending_replies(self, error):
+        """Fail all the requests waiting for a reply.
+        Args:
+            error(str): Error message
+        """
+        while self._pending_replies:
+            self._pending_replies.popleft().set_exception(
+                SocketError("Socket error:" + str(error))
+            )
+
     def recv_thread(self):
         """Receive thread"""
         try:
             self.on_connected()
         except Exception:
             pass
-        buffer = empty_buffer()
-        mReceivedSTX = False
+        parser = StreamParser()
         while True:
             ret = self.__sock.recv(4096)
             if not ret:
@@ -256,32 +309,16 @@ class StandardClient:
                 self.error = "Disconnected"
                 self.__close_socket()
                 break
-            for b in ret:
-                if b == STX:
-                    buffer = empty_buffer()
-                    mReceivedSTX = True
-                elif b == ETX:
-                    if mReceivedSTX:
-                        try:
-                            # Unicode decoding exception catching,
-                            # consider errors='ignore'
-                            buffer_utf8 = buffer.decode()
-                        except UnicodeDecodeError as e:
-                            # Syntax not allowed in Python 2
-                            # raise ProtocolError from e
-                            raise ProtocolError(
-                                "UnicodeDecodeError: %s" % sys.exc_info()
-                            )
-                        self.on_message_received(buffer_utf8)
-                        mReceivedSTX = False
-                        buffer = empty_buffer()
-                else:
-                    if mReceivedSTX:
-                        buffer += _bytes([b])
-
-            if len(buffer) > MAX_SIZE_STREAM_MSG:
-                mReceivedSTX = False
-                buffer = empty_buffer()
+            for msg in parser.feed(ret):
+                try:
+                    # Unicode decoding exception catching,
+                    # consider errors='ignore'
+                    msg_utf8 = msg.decode()
+                except UnicodeDecodeError as e:
+                    # Syntax not allowed in Python 2
+                    # raise ProtocolError from e
+                    raise ProtocolError("UnicodeDecodeError: %s" % sys.exc_info())
+                self.on_message_received(msg_utf8)
         try:
             self.on_disconnected()
         except Exception:
@@ -296,45 +333,59 @@ class StandardClient:
             self.connect()
         try:
             pack = _bytes([STX]) + encode(cmd) + _bytes([ETX])
-            self.__sock.send(pack)
+            self.__sock.sendall(pack)
         except SocketError:
             self.disconnect()
 
-    def __send_receive_stream(self, cmd):
-        """Send/receive event.
+    def __send_receive_stream(self, cmd, timeout):
+        """Send/receive event. Several requests can be in flight
+        on the connection, each reply is given to the oldest request.
         Args:
             cmd(str): command
+            timeout(float): Timeout [s]
         Returns:
             (str): reply form the socket
         """
-        self.error = None
-        self.received_msg = None
-        self.msg_received_event.clear()  # = gevent.event.Event()
-        if not self.is_connected():
-            self.connect()
-        self.__send_stream(cmd)
-
-        with gevent.Timeout(self.timeout, TimeoutError):
-            while self.received_msg is None:
-                if self.error is not None:
-                    raise SocketError("Socket error:" + str(self.error))
-                self.msg_received_event.wait()
-            return self.received_msg
+        reply = gevent.event.AsyncResult()
+        with self._lock:
+            self.error = None
+            if not self.is_connected():
+                self.connect()
+            self._pending_replies.append(reply)
+            try:
+                self.__send_stream(cmd)
+            except Exception:
+                self._pending_replies.remove(reply)
+                raise
+        try:
+            return reply.get(timeout=timeout)
+        except gevent.Timeout:
+            with self._lock:
+                # the reply may never come: reconnect on the next request,
+                # rather than giving each later request the previous reply
+                if reply in self._pending_replies:
+                    self.error = "Timeout error: no reply to %s" % cmd
+                    self.disconnect()
+            raise TimeoutError("Timeout error: no reply to %s" % cmd)
 
     def send_receive(self, cmd, timeout=-1):
-        """Send/receive command, locking the socket.
+        """Send/receive command, locking the socket (datagram) or
+        pipelining the requests (stream).
         Args:
             cmd(str): command
         Returns:
             (str): reply form the socket
         """
+        if self.protocol != PROTOCOL.DATAGRAM:
+            if (timeout is None) or (timeout >= 0):
+                return self.__send_receive_stream(cmd, timeout)
+            return self.__send_receive_stream(cmd, self.timeout)
+
         self._lock.acquire()
         try:
             if (timeout is None) or (timeout >= 0):
                 self.set_timeout(timeout)
-            if self.protocol == PROTOCOL.DATAGRAM:
-                return self.__send_receive_datagram(cmd)
-            return self.__send_receive_stream(cmd)
+            return self.__send_receive_datagram(cmd)
         finally:
             try:
                 if (timeout is None) or (timeout >= 0):
@@ -132,6 +132,10 @@ class ChannelObject(object):
     def is_connected(self):
         return False
 
+    def close(self):
+        """Stops receiving values, when the channel is discarded"""
+        pass
+
     def update(self, value):
         if self.__first_update:
             self.__first_update = False
@@ -377,6 +381,11 @@ class CommandContainer:
         for chan in self.__channels.values():
             yield chan
 
+    def close_channels(self):
+        """Closes all the channels, when the container is discarded"""
+        for chan in self.__channels.values():
+            chan.close()
+
     def get_command_object(self, cmd_name):
         try:
             return self.__commands.get(cmd_name)
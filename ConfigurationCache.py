@@ -0,0 +1,155 @@
+# encoding: utf-8
+#
+#  Project: MXCuBE
+#  https://github.com/mxcube
+#
+#  This file is part of MXCuBE software.
+#
+#  MXCuBE is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  MXCuBE is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with MXCuBE. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cache of the parsed configuration files, optionally kept on disk between
+program starts.
+
+Entries are keyed by the absolute file path and the kind of parsing, and are
+invalid as soon as the modification time or the size of the file change.
+Without a cache file, the files are parsed on every load, as without a cache.
+
+The cache file is a pickle: loading it can run arbitrary code. It must be in
+a directory that only the user running the program can write to, e.g. under
+its home directory, not under /tmp. A cache file that belongs to another
+user, or that other users can write to, is ignored.
+"""
+
+import logging
+import os
+import pickle
+import tempfile
+
+__copyright__ = """ Copyright © 2010 - 2020 by MXCuBE Collaboration """
+__license__ = "LGPLv3+"
+
+# increase when the format of the cached data changes
+CACHE_VERSION = 2
+
+
+class ConfigurationCache(object):
+    """Parsed configuration files, by (kind, absolute path)"""
+
+    def __init__(self, cache_file=None):
+        """
+        Args:
+            cache_file (str): file keeping the cache between program starts;
+                nothing is cached if None
+        """
+        self.cache_file = cache_file
+        # (kind, path): (mtime [ns], size, pickled data)
+        self._entries = {}
+        self._modified = False
+        self.hits = 0
+        self.misses = 0
+
+        if cache_file is not None:
+            self.load()
+
+    def load(self):
+        """Read the cache file; an unreadable or outdated file is ignored"""
+        try:
+            with open(self.cache_file, "rb") as fp0:
+                if not self._is_trusted(os.fstat(fp0.fileno())):
+                    logging.getLogger("HWR").warning(
+                        "Ignoring configuration cache %s, writable by other users",
+                        self.cache_file,
+                    )
+                    return
+                version, entries = pickle.load(fp0)
+        except (IOError, OSError):
+            return
+        except Exception:
+            logging.getLogger("HWR").warning(
+                "Ignoring invalid configuration cache %s", self.cache_file
+            )
+            return
+        if version == CACHE_VERSION:
+            self._entries.update(entries)
+
+    @staticmethod
+    def _is_trusted(stat):
+        """Whether only the current user can have written the cache file"""
+        if not hasattr(os, "getuid"):
+            return True
+        return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+    def save(self):
+        """Write the cache file, if there are new entries"""
+        if self.cache_file is None or not self._modified:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            # written aside and renamed, not to leave a truncated cache
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, "wb") as fp0:
+                pickle.dump(
+                    (CACHE_VERSION, self._entries), fp0, pickle.HIGHEST_PROTOCOL
+                )
+            getattr(os, "replace", os.rename)(tmp_path, self.cache_file)
+        except Exception:
+            logging.getLogger("HWR").exception(
+                "Cannot write configuration cache %s", self.cache_file
+            )
+        else:
+            self._modified = False
+
+    def get(self, file_path, kind, parse):
+        """Parsed content of a file
+
+        Args:
+            file_path (str): absolute path of the file
+            kind (str): kind of parsing, e.g. "yaml"
+            parse (callable): function parsing the file, called with the
+                file path when the cache entry is missing or outdated; its
+                result must be picklable
+
+        Returns:
+            a new copy of the parsed content, that can be modified freely
+        """
+        if self.cache_file is None:
+            self.misses += 1
+            return parse(file_path)
+
+        stat = os.stat(file_path)
+        # st_mtime (a float) cannot tell apart changes a few 100 ns apart
+        mtime = getattr(stat, "st_mtime_ns", stat.st_mtime)
+        key = (kind, file_path)
+        entry = self._entries.get(key)
+        if entry is not None and entry[:2] == (mtime, stat.st_size):
+            self.hits += 1
+            return pickle.loads(entry[2])
+
+        self.misses += 1
+        data = parse(file_path)
+        self._entries[key] = (
+            mtime,
+            stat.st_size,
+            pickle.dumps(data, pickle.HIGHEST_PROTOCOL),
+        )
+        self._modified = True
+        return data
+
+    def clear(self):
+        """Remove all entries"""
+        self._modified = self._modified or bool(self._entries)
+        self._entries.clear()
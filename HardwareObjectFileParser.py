@@ -25,12 +25,11 @@ __license__ = "LGPLv3+"
 import logging
 import xml.sax
 from xml.sax.handler import ContentHandler
+from xml.sax.xmlreader import AttributesImpl
 
 from HardwareRepository import BaseHardwareObjects
 
 
-CURRENT_XML = None
-
 new_objects_classes = {
     "equipment": BaseHardwareObjects.Equipment,
     "device": BaseHardwareObjects.Device,
@@ -48,16 +47,11 @@ def parse(filename, name):
     Returns:
         [type]: [description]
     """
-    cur_handler = HardwareObjectHandler(name)
-
-    global CURRENT_XML
-    try:
-        xml_file = open(filename)
-        CURRENT_XML = xml_file.read()
-    except Exception:
-        CURRENT_XML = None
+    with open(filename, "rb") as xml_file:
+        xml_source = xml_file.read()
 
-    xml.sax.parse(filename, cur_handler)
+    cur_handler = HardwareObjectHandler(name, xml_source)
+    xml.sax.parseString(xml_source, cur_handler)
 
     return cur_handler.get_hardware_object()
 
@@ -72,13 +66,60 @@ def parse_string(xml_hardware_object, name):
     Returns:
         [type]: [description]
     """
-    global CURRENT_XML
-    CURRENT_XML = xml_hardware_object
-    cur_handler = HardwareObjectHandler(name)
-    xml.sax.parseString(str.encode(xml_hardware_object), cur_handler)
+    xml_source = str.encode(xml_hardware_object)
+    cur_handler = HardwareObjectHandler(name, xml_source)
+    xml.sax.parseString(xml_source, cur_handler)
     return cur_handler.get_hardware_object()
 
 
+def parse_events(events, name):
+    """Load a Hardware Object from the recorded SAX events of its XML file
+
+    Args:
+        events (list): as returned by record_events
+        name (str): Hardware Object name, e.g. /motors/m0
+
+    Returns:
+        the Hardware Object, or a reference name, as parse_string
+    """
+    cur_handler = HardwareObjectHandler(name, events)
+    replay_events(events, cur_handler)
+    return cur_handler.get_hardware_object()
+
+
+def record_events(xml_source):
+    """SAX events of an XML document, to be replayed without parsing the XML
+
+    Args:
+        xml_source (str or bytes): XML document
+
+    Returns:
+        list: picklable ("start", name, attributes), ("characters", content)
+              and ("end", name) tuples
+    """
+    recorder = SaxEventRecorder()
+    xml.sax.parseString(xml_source, recorder)
+    return recorder.events
+
+
+def replay_events(events, handler):
+    """Send recorded SAX events to a content handler
+
+    Args:
+        events (list): as returned by record_events
+        handler (ContentHandler): handler receiving the events
+    """
+    handler.startDocument()
+    for event in events:
+        if event[0] == "start":
+            handler.startElement(event[1], AttributesImpl(event[2]))
+        elif event[0] == "characters":
+            handler.characters(event[1])
+        else:
+            handler.endElement(event[1])
+    handler.endDocument()
+
+
 def load_module(hardware_object_name):
     """[summary]
 
@@ -91,13 +132,65 @@ def load_module(hardware_object_name):
     return __import__(hardware_object_name, globals(), locals(), [""])
 
 
-def instanciate_class(module_name, class_name, object_name):
+# compiled class templates, by module name: (docstring, XMLStructure or None)
+_template_structures = {}
+
+
+def get_xml_structure(xml_source):
+    """Structure of an XML document, to be checked against class templates
+
+    Args:
+        xml_source (str, bytes or list): XML document, or its recorded events
+
+    Returns:
+        XMLStructure
+    """
+    xml_structure_retriever = XmlStructureRetriever()
+    if isinstance(xml_source, list):
+        replay_events(xml_source, xml_structure_retriever)
+    else:
+        xml.sax.parseString(xml_source, xml_structure_retriever)
+    return xml_structure_retriever.get_structure()
+
+
+def get_template_structure(module):
+    """Structure of the XML template of the module docstring, compiled once
+
+    Args:
+        module (module): hardware object module
+
+    Returns:
+        XMLStructure: None if the module has no template
+    """
+    doc = module.__doc__
+    try:
+        cached_doc, template_structure = _template_structures[module.__name__]
+    except KeyError:
+        pass
+    else:
+        # reloaded modules can change their template
+        if cached_doc is doc or cached_doc == doc:
+            return template_structure
+
+    template_structure = None
+    if doc is not None:
+        i = doc.find("template:")
+        if i >= 0:
+            template_structure = get_xml_structure(doc[i + 10 :])
+    _template_structures[module.__name__] = (doc, template_structure)
+    return template_structure
+
+
+def instanciate_class(module_name, class_name, object_name, xml_structure=None):
     """[summary]
 
     Args:
         module_name ([type]): [description]
         class_name ([type]): [description]
         object_name ([type]): [description]
+        xml_structure (XMLStructure or callable): structure of the XML file,
+            or a function returning it; it is only needed if the module has a
+            template, and no check is made if None
 
     Returns:
         [type]: [description]
@@ -114,25 +207,22 @@ def instanciate_class(module_name, class_name, object_name):
             )
         else:
             # check the XML
-            if module.__doc__ is not None and CURRENT_XML is not None:
-                i = module.__doc__.find("template:")
-
-                if i >= 0:
-                    xml_template = module.__doc__[i + 10 :]
-
-                    xml_structure_retriever = XmlStructureRetriever()
-                    xml.sax.parseString(CURRENT_XML, xml_structure_retriever)
-                    current_structure = xml_structure_retriever.get_structure()
-                    xml_structure_retriever = XmlStructureRetriever()
-                    xml.sax.parseString(xml_template, xml_structure_retriever)
-                    template_structure = xml_structure_retriever.get_structure()
-
-                    if not template_structure == current_structure:
-                        logging.getLogger("HWR").error(
-                            "%s: XML file does not match the %s class template"
-                            % (object_name, class_name)
-                        )
-                        return
+            template_structure = None
+            if xml_structure is not None:
+                template_structure = get_template_structure(module)
+
+            if template_structure is not None:
+                if callable(xml_structure):
+                    xml_structure = xml_structure()
+
+                if xml_structure is not None and not (
+                    template_structure == xml_structure
+                ):
+                    logging.getLogger("HWR").error(
+                        "%s: XML file does not match the %s class template"
+                        % (object_name, class_name)
+                    )
+                    return
             try:
                 new_instance = class_obj(object_name)
             except Exception:
@@ -144,15 +234,19 @@ def instanciate_class(module_name, class_name, object_name):
 
 
 class HardwareObjectHandler(ContentHandler):
-    def __init__(self, name):
+    def __init__(self, name, xml_source=None):
         """[summary]
 
         Args:
             name ([type]): [description]
+            xml_source (bytes or list): the parsed XML, or its recorded events,
+                for the class template checks
         """
         ContentHandler.__init__(self)
 
         self.name = name
+        self.xml_source = xml_source
+        self._xml_structure = None
         self.class_error = False
         self.objects = []
         self.reference = ""
@@ -175,6 +269,16 @@ class HardwareObjectHandler(ContentHandler):
         elif len(self.objects) == 1:
             return self.objects[0]
 
+    def get_xml_structure(self):
+        """Structure of the parsed XML, retrieved once per document
+
+        Returns:
+            XMLStructure: None if the XML source is unknown
+        """
+        if self._xml_structure is None and self.xml_source is not None:
+            self._xml_structure = get_xml_structure(self.xml_source)
+        return self._xml_structure
+
     def startElement(self, name, attrs):
         """[summary]
 
@@ -273,7 +377,9 @@ class HardwareObjectHandler(ContentHandler):
                 module_name = str(attrs["class"])
                 class_name = module_name.split(".")[-1]
 
-                new_object = instanciate_class(module_name, class_name, object_name)
+                new_object = instanciate_class(
+                    module_name, class_name, object_name, self.get_xml_structure
+                )
 
                 if new_object is None:
                     self.class_error = True
@@ -303,7 +409,9 @@ class HardwareObjectHandler(ContentHandler):
                     module_name = str(attrs["class"])
                     class_name = module_name.split(".")[-1]
 
-                    new_object = instanciate_class(module_name, class_name, object_name)
+                    new_object = instanciate_class(
+                        module_name, class_name, object_name, self.get_xml_structure
+                    )
 
                     if new_object is None:
                         self.class_error = True
@@ -490,3 +598,25 @@ class XmlStructureRetriever(ContentHandler):
 
         self.previous_path = self.path
         self.path = self.path[: self.path.rfind("/")]
+
+
+class SaxEventRecorder(ContentHandler):
+    """Records the SAX events of a document, see record_events"""
+
+    def __init__(self):
+        ContentHandler.__init__(self)
+
+        self.events = []
+
+    def startElement(self, name, attrs):
+        self.events.append(("start", str(name), dict(attrs.items())))
+
+    def characters(self, content):
+        if self.events and self.events[-1][0] == "characters":
+            # one event for the text split by the parser
+            self.events[-1] = ("characters", self.events[-1][1] + content)
+        else:
+            self.events.append(("characters", content))
+
+    def endElement(self, name):
+        self.events.append(("end", str(name)))
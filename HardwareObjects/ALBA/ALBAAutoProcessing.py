@@ -1,6 +1,5 @@
 from xaloc import XalocJob
-from XSDataCommon import XSDataFile, XSDataString, XSDataInteger
-from XSDataAutoprocv1_0 import XSDataAutoprocInput
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 from HardwareRepository.BaseHardwareObjects import HardwareObject
 from PyTango import DeviceProxy
 import os
@@ -12,6 +11,8 @@ from ALBAClusterJob import ALBAEdnaProcJob
 
 import sys
 
+xsdata = XSDataBindings("XSDataCommon", "XSDataAutoprocv1_0")
+
 sys.path.append("/beamlines/bl13/controls/devel/pycharm/ALBAClusterClient")
 
 
@@ -169,18 +170,18 @@ class ALBAAutoProcessing(HardwareObject):
             output_dir, "EDNAprocInput_%d.xml" % collection_id
         )
 
-        ednaproc_input = XSDataAutoprocInput()
+        ednaproc_input = xsdata.XSDataAutoprocInput()
 
-        input_file = XSDataFile()
-        path = XSDataString()
+        input_file = xsdata.XSDataFile()
+        path = xsdata.XSDataString()
         path.set_value(xds_file)
         input_file.setPath(path)
 
         ednaproc_input.setInput_file(input_file)
-        ednaproc_input.setData_collection_id(XSDataInteger(collection_id))
+        ednaproc_input.setData_collection_id(xsdata.XSDataInteger(collection_id))
 
-        # output_dir = XSDataFile()
-        # outpath = XSDataString()
+        # output_dir = xsdata.XSDataFile()
+        # outpath = xsdata.XSDataString()
         # outpath.set_value(output_dir)
         # output_dir.setPath(path)
 
@@ -1,4 +1,4 @@
-from XSDataMXCuBEv1_3 import XSDataResultMXCuBE
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 from xaloc import XalocJob
 import os
 import time
@@ -6,6 +6,8 @@ import logging
 
 import sys
 
+xsdata = XSDataBindings("XSDataMXCuBEv1_3")
+
 sys.path.append("/beamlines/bl13/controls/devel/pycharm/ALBAClusterClient")
 
 
@@ -102,7 +104,7 @@ class ALBAStrategyJob(ALBAClusterJob):
             if os.path.exists(outfile):
                 job_output = open(outfile).read()
                 open(self.results_file, "w").write(job_output)
-                result = XSDataResultMXCuBE.parseFile(self.results_file)
+                result = xsdata.XSDataResultMXCuBE.parseFile(self.results_file)
             else:
                 logging.getLogger("HWR").debug(
                     "EDNA Job finished without success / cannot find output file "
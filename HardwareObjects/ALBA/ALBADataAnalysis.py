@@ -1,6 +1,5 @@
 from xaloc import XalocJob
-from XSDataCommon import XSDataFile, XSDataString
-from XSDataMXCuBEv1_3 import XSDataResultMXCuBE
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 from HardwareRepository.HardwareObjects.EDNACharacterisation import EDNACharacterisation
 from PyTango import DeviceProxy
 import os
@@ -9,6 +8,8 @@ import logging
 
 import sys
 
+xsdata = XSDataBindings("XSDataCommon", "XSDataMXCuBEv1_3")
+
 sys.path.append("/beamlines/bl13/controls/devel/pycharm/ALBAClusterClient")
 
 
@@ -57,8 +58,8 @@ class ALBADataAnalysis(EDNACharacterisation):
 
         edna_input.process_directory = edna_directory
 
-        output_dir = XSDataFile()
-        path = XSDataString()
+        output_dir = xsdata.XSDataFile()
+        path = xsdata.XSDataString()
         path.set_value(edna_directory)
         output_dir.setPath(path)
         edna_input.setOutputFileDirectory(output_dir)
@@ -156,7 +157,7 @@ class ALBADataAnalysis(EDNACharacterisation):
             # logging.getLogger("HWR").debug("     EDNA results file found. loading it")
             # open(self.results_file, "w").write(job_output)
             logging.getLogger("HWR").debug("     EDNA results file found 2")
-            result = XSDataResultMXCuBE.parseFile(self.results_file)
+            result = xsdata.XSDataResultMXCuBE.parseFile(self.results_file)
             logging.getLogger("HWR").debug("     EDNA results file found 3")
             logging.getLogger("HWR").debug(
                 "EDNA Result loaded from file / result is=%s" % str(type(result))
@@ -58,6 +58,7 @@ class FrameType(Enum):
     """
 
     DATA = "data"
+    DATA_BATCH = "data_batch"
     START = "start"
     STOP = "stop"
 
@@ -76,6 +77,18 @@ def two_d_data(x, y):
     return {"x": x, "y": y, "z": z}
 
 
+def _axes(desc):
+    return ("x", "y", "z")[: desc["data_dim"] + 1]
+
+
+def _to_columns(points, axes):
+    """
+    Converts a list of x, y, (z) points to lists of values per axis
+    """
+    nan = float("nan")
+    return dict((axis, [point.get(axis, nan) for point in points]) for axis in axes)
+
+
 class DataPublisher(HardwareObject):
     """
     DataPublisher handles data publishing
@@ -85,6 +98,10 @@ class DataPublisher(HardwareObject):
         super(DataPublisher, self).__init__(name)
         self._r = None
         self._subsribe_task = None
+        self._batch_size = 1
+        self._flush_interval = 0.1
+        self._pending_points = {}
+        self._flush_tasks = {}
 
     def init(self):
         """
@@ -96,6 +113,11 @@ class DataPublisher(HardwareObject):
         rport = self.get_property("port", 6379)
         rdb = self.get_property("db", 11)
 
+        # Points published with pub() are sent in batches of batch_size
+        # points, or after flush_interval seconds
+        self._batch_size = self.get_property("batch_size", 1)
+        self._flush_interval = self.get_property("flush_interval", 0.1)
+
         self._r = redis.Redis(
             host=rhost, port=rport, db=rdb, charset="utf-8", decode_responses=True
         )
@@ -110,8 +132,6 @@ class DataPublisher(HardwareObject):
         pubsub = self._r.pubsub(ignore_subscribe_messages=True)
         pubsub.psubscribe("HWR_DP_NEW_DATA_POINT_*")
 
-        _data = {}
-
         # The descriptions of active sources for fast access
         # while publishing data
         active_source_desc = {}
@@ -125,8 +145,6 @@ class DataPublisher(HardwareObject):
                     data = json.loads(message["data"])
 
                     if data["type"] == FrameType.START.value:
-                        _data[redis_channel] = {"x": [], "y": []}
-
                         self._update_description(_id, {"running": True})
 
                         # Clear previous data so that we are not acumelating
@@ -146,18 +164,23 @@ class DataPublisher(HardwareObject):
                         )
                         active_source_desc.pop(redis_channel)
                     elif data["type"] == FrameType.DATA.value:
-                        _data[redis_channel] = {
-                            "x": _data[redis_channel]["x"] + [data["data"]["x"]],
-                            "y": _data[redis_channel]["y"] + [data["data"]["y"]],
-                        }
+                        desc = active_source_desc[redis_channel]
+                        columns = _to_columns([data["data"]], _axes(desc))
 
                         self.emit(
                             "data", {"id": _id, "data": data["data"]},
                         )
 
-                        self._append_data(
-                            _id, data["data"], active_source_desc[redis_channel]
+                        self._append_data(_id, columns, desc)
+                    elif data["type"] == FrameType.DATA_BATCH.value:
+                        desc = active_source_desc[redis_channel]
+                        columns = _to_columns(data["data"], _axes(desc))
+
+                        self.emit(
+                            "data_batch", {"id": _id, "data": data["data"]},
                         )
+
+                        self._append_data(_id, columns, desc)
                     else:
                         msg = "Unknown frame type %s" % message
                         logging.getLogger("HWR").error(msg)
@@ -254,18 +277,21 @@ class DataPublisher(HardwareObject):
 
     def _append_data(self, _id, data, desc):
         """
-        Append data to source with _id
+        Append data to source with _id, in a single round trip
 
         Args:
             _id (str): The id of the source to remove
             desc (dict): Publisher description
-            data: x, y, (z) data to append
+            data (dict): x, y, (z) lists of values to append
         """
-        self._r.rpush("HWR_DP_%s_DATA_X" % _id, data.get("x", float("nan")))
-        self._r.rpush("HWR_DP_%s_DATA_Y" % _id, data.get("y", float("nan")))
+        pipe = self._r.pipeline(transaction=False)
+        pipe.rpush("HWR_DP_%s_DATA_X" % _id, *data["x"])
+        pipe.rpush("HWR_DP_%s_DATA_Y" % _id, *data["y"])
 
         if desc["data_dim"] > 1:
-            self._r.rpush("HWR_DP_%s_DATA_Z" % _id, data.get("z", float("nan")))
+            pipe.rpush("HWR_DP_%s_DATA_Z" % _id, *data["z"])
+
+        pipe.execute()
 
     def _clear_data(self, _id):
         """
@@ -324,13 +350,44 @@ class DataPublisher(HardwareObject):
 
         return _id
 
+    def _flush(self, _id):
+        """
+        Publish the points of source with _id waiting to be sent, as one
+        batch
+        """
+        task = self._flush_tasks.pop(_id, None)
+        if task is not None and task is not gevent.getcurrent():
+            task.kill(block=False)
+
+        points = self._pending_points.pop(_id, None)
+        if points:
+            self._publish(_id, {"type": FrameType.DATA_BATCH.value, "data": points})
+
     def pub(self, _id, data):
-        self._publish(_id, {"type": FrameType.DATA.value, "data": data})
+        """
+        Publish a data point. With batch_size > 1, points are published in
+        batches (emitted with the "data_batch" signal)
+        """
+        if self._batch_size <= 1:
+            self._publish(_id, {"type": FrameType.DATA.value, "data": data})
+            return
+
+        points = self._pending_points.setdefault(_id, [])
+        points.append(data)
+
+        if len(points) >= self._batch_size:
+            self._flush(_id)
+        elif _id not in self._flush_tasks:
+            self._flush_tasks[_id] = gevent.spawn_later(
+                self._flush_interval, self._flush, _id
+            )
 
     def start(self, _id):
+        self._flush(_id)
         self._publish(_id, {"type": FrameType.START.value, "data": {}})
 
     def stop(self, _id):
+        self._flush(_id)
         self._update_description(_id, {"running": False})
         self._publish(_id, {"type": FrameType.STOP.value, "data": {}})
 
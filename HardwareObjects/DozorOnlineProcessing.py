@@ -18,11 +18,9 @@
 #  along with MXCuBE. If not, see <http://www.gnu.org/licenses/>.
 
 
-from XSDataCommon import XSDataBoolean
-from XSDataCommon import XSDataDouble
-from XSDataCommon import XSDataInteger
-from XSDataCommon import XSDataString
-from XSDataControlDozorv1_1 import XSDataInputControlDozor
+import numpy as np
+
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 
 from HardwareRepository.HardwareObjects.abstract.AbstractOnlineProcessing import (
     AbstractOnlineProcessing,
@@ -30,6 +28,8 @@ from HardwareRepository.HardwareObjects.abstract.AbstractOnlineProcessing import
 from HardwareRepository import HardwareRepository as HWR
 
 
+xsdata = XSDataBindings("XSDataCommon", "XSDataControlDozorv1_1")
+
 __credits__ = ["MXCuBE collaboration"]
 __license__ = "LGPLv3+"
 
@@ -41,24 +41,38 @@ class DozorOnlineProcessing(AbstractOnlineProcessing):
         :param processing_input_filename
         :type : str
         """
-        input_file = XSDataInputControlDozor()
-        input_file.setTemplate(XSDataString(self.params_dict["template"]))
+        input_file = xsdata.XSDataInputControlDozor()
+        input_file.setTemplate(xsdata.XSDataString(self.params_dict["template"]))
         input_file.setFirst_image_number(
-            XSDataInteger(self.params_dict["first_image_num"])
+            xsdata.XSDataInteger(self.params_dict["first_image_num"])
+        )
+        input_file.setLast_image_number(
+            xsdata.XSDataInteger(self.params_dict["images_num"])
+        )
+        input_file.setFirst_run_number(
+            xsdata.XSDataInteger(self.params_dict["run_number"])
+        )
+        input_file.setLast_run_number(
+            xsdata.XSDataInteger(self.params_dict["run_number"])
+        )
+        input_file.setLine_number_of(
+            xsdata.XSDataInteger(self.params_dict["lines_num"])
         )
-        input_file.setLast_image_number(XSDataInteger(self.params_dict["images_num"]))
-        input_file.setFirst_run_number(XSDataInteger(self.params_dict["run_number"]))
-        input_file.setLast_run_number(XSDataInteger(self.params_dict["run_number"]))
-        input_file.setLine_number_of(XSDataInteger(self.params_dict["lines_num"]))
         input_file.setReversing_rotation(
-            XSDataBoolean(self.params_dict["reversing_rotation"])
+            xsdata.XSDataBoolean(self.params_dict["reversing_rotation"])
+        )
+        input_file.setPixelMin(
+            xsdata.XSDataInteger(HWR.beamline.detector.get_pixel_min())
+        )
+        input_file.setPixelMax(
+            xsdata.XSDataInteger(HWR.beamline.detector.get_pixel_max())
+        )
+        input_file.setBeamstopSize(xsdata.XSDataDouble(self.beamstop_hwobj.get_size()))
+        input_file.setBeamstopDistance(
+            xsdata.XSDataDouble(self.beamstop_hwobj.get_distance())
         )
-        input_file.setPixelMin(XSDataInteger(HWR.beamline.detector.get_pixel_min()))
-        input_file.setPixelMax(XSDataInteger(HWR.beamline.detector.get_pixel_max()))
-        input_file.setBeamstopSize(XSDataDouble(self.beamstop_hwobj.get_size()))
-        input_file.setBeamstopDistance(XSDataDouble(self.beamstop_hwobj.get_distance()))
         input_file.setBeamstopDirection(
-            XSDataString(self.beamstop_hwobj.get_direction())
+            xsdata.XSDataString(self.beamstop_hwobj.get_direction())
         )
 
         input_file.exportToFile(processing_input_filename)
@@ -71,10 +85,11 @@ class DozorOnlineProcessing(AbstractOnlineProcessing):
         """
 
         if self.started:
-            for image in batch:
-                self.results_raw["spots_num"][image[0] - 1] = image[1]
-                self.results_raw["spots_resolution"][image[0] - 1] = image[3]
-                self.results_raw["score"][image[0] - 1] = image[4]
+            batch = np.array(batch)
+            indexes = batch[:, 0].astype(int) - 1
+            self.results_raw["spots_num"][indexes] = batch[:, 1]
+            self.results_raw["spots_resolution"][indexes] = batch[:, 3]
+            self.results_raw["score"][indexes] = batch[:, 4]
 
-            self.align_processing_results(batch[0][0] - 1, batch[-1][0] - 1)
+            self.align_processing_results(indexes.min(), indexes.max())
             self.emit("processingResultsUpdate", False)
@@ -9,26 +9,15 @@ import queue_model_objects as qmo
 from HardwareRepository import HardwareRepository as HWR
 from abstract.AbstractCharacterisation import AbstractCharacterisation
 
-from XSDataMXCuBEv1_3 import XSDataInputMXCuBE
-from XSDataMXCuBEv1_3 import XSDataMXCuBEDataSet
-from XSDataMXCuBEv1_3 import XSDataResultMXCuBE
-
-from XSDataCommon import XSDataAngle
-from XSDataCommon import XSDataBoolean
-from XSDataCommon import XSDataDouble
-from XSDataCommon import XSDataFile
-from XSDataCommon import XSDataFlux
-from XSDataCommon import XSDataLength
-from XSDataCommon import XSDataTime
-from XSDataCommon import XSDataWavelength
-from XSDataCommon import XSDataInteger
-from XSDataCommon import XSDataSize
-from XSDataCommon import XSDataString
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 
 # from edna_test_data import EDNA_DEFAULT_INPUT
 # from edna_test_data import EDNA_TEST_DATA
 
 
+xsdata = XSDataBindings("XSDataCommon", "XSDataMXCuBEv1_3")
+
+
 class EDNACharacterisation(AbstractCharacterisation):
     def __init__(self, name):
         super(EDNACharacterisation, self).__init__(name)
@@ -63,7 +52,7 @@ class EDNACharacterisation(AbstractCharacterisation):
                 diff_plan.getStrategyOption().getValue() + " " + strategy_option
             )
 
-        diff_plan.setStrategyOption(XSDataString(new_strategy_option))
+        diff_plan.setStrategyOption(xsdata.XSDataString(new_strategy_option))
 
     def _run_edna(self, input_file, results_file, process_directory):
         """Starts EDNA"""
@@ -75,7 +64,7 @@ class EDNACharacterisation(AbstractCharacterisation):
 
         self.result = None
         if os.path.exists(results_file):
-            self.result = XSDataResultMXCuBE.parseFile(results_file)
+            self.result = xsdata.XSDataResultMXCuBE.parseFile(results_file)
 
         return self.result
 
@@ -98,17 +87,17 @@ class EDNACharacterisation(AbstractCharacterisation):
         return html_report
 
     def input_from_params(self, data_collection, char_params):
-        edna_input = XSDataInputMXCuBE.parseString(self.edna_default_input)
+        edna_input = xsdata.XSDataInputMXCuBE.parseString(self.edna_default_input)
 
         if data_collection.id:
-            edna_input.setDataCollectionId(XSDataInteger(data_collection.id))
+            edna_input.setDataCollectionId(xsdata.XSDataInteger(data_collection.id))
 
         # Beam object
         beam = edna_input.getExperimentalCondition().getBeam()
 
         try:
             transmission = HWR.beamline.transmission.get_value()
-            beam.setTransmission(XSDataDouble(transmission))
+            beam.setTransmission(xsdata.XSDataDouble(transmission))
         except AttributeError:
             import traceback
 
@@ -119,18 +108,18 @@ class EDNACharacterisation(AbstractCharacterisation):
 
         try:
             wavelength = HWR.beamline.energy.get_wavelength()
-            beam.setWavelength(XSDataWavelength(wavelength))
+            beam.setWavelength(xsdata.XSDataWavelength(wavelength))
         except AttributeError:
             pass
 
         try:
-            beam.setFlux(XSDataFlux(HWR.beamline.flux.get_value()))
+            beam.setFlux(xsdata.XSDataFlux(HWR.beamline.flux.get_value()))
         except AttributeError:
             pass
 
         try:
             min_exp_time = self.collect_obj.detector_hwobj.get_exposure_time_limits()[0]
-            beam.setMinExposureTimePerImage(XSDataTime(min_exp_time))
+            beam.setMinExposureTimePerImage(xsdata.XSDataTime(min_exp_time))
         except AttributeError:
             pass
 
@@ -139,9 +128,9 @@ class EDNACharacterisation(AbstractCharacterisation):
 
             if None not in beamsize:
                 beam.setSize(
-                    XSDataSize(
-                        x=XSDataLength(float(beamsize[0])),
-                        y=XSDataLength(float(beamsize[1])),
+                    xsdata.XSDataSize(
+                        x=xsdata.XSDataLength(float(beamsize[0])),
+                        y=xsdata.XSDataLength(float(beamsize[1])),
                     )
                 )
         except AttributeError:
@@ -150,17 +139,17 @@ class EDNACharacterisation(AbstractCharacterisation):
         # Optimization parameters
         diff_plan = edna_input.getDiffractionPlan()
 
-        aimed_i_sigma = XSDataDouble(char_params.aimed_i_sigma)
-        aimed_completness = XSDataDouble(char_params.aimed_completness)
-        aimed_multiplicity = XSDataDouble(char_params.aimed_multiplicity)
-        aimed_resolution = XSDataDouble(char_params.aimed_resolution)
+        aimed_i_sigma = xsdata.XSDataDouble(char_params.aimed_i_sigma)
+        aimed_completness = xsdata.XSDataDouble(char_params.aimed_completness)
+        aimed_multiplicity = xsdata.XSDataDouble(char_params.aimed_multiplicity)
+        aimed_resolution = xsdata.XSDataDouble(char_params.aimed_resolution)
 
         complexity = char_params.strategy_complexity
-        complexity = XSDataString(qme.STRATEGY_COMPLEXITY[complexity])
+        complexity = xsdata.XSDataString(qme.STRATEGY_COMPLEXITY[complexity])
 
-        permitted_phi_start = XSDataAngle(char_params.permitted_phi_start)
+        permitted_phi_start = xsdata.XSDataAngle(char_params.permitted_phi_start)
         _range = char_params.permitted_phi_end - char_params.permitted_phi_start
-        rotation_range = XSDataAngle(_range)
+        rotation_range = xsdata.XSDataAngle(_range)
 
         if char_params.aimed_i_sigma:
             diff_plan.setAimedIOverSigmaAtHighestResolution(aimed_i_sigma)
@@ -182,23 +171,25 @@ class EDNACharacterisation(AbstractCharacterisation):
 
         # Vertical crystal dimension
         sample = edna_input.getSample()
-        sample.getSize().setY(XSDataLength(char_params.max_crystal_vdim))
-        sample.getSize().setZ(XSDataLength(char_params.min_crystal_vdim))
+        sample.getSize().setY(xsdata.XSDataLength(char_params.max_crystal_vdim))
+        sample.getSize().setZ(xsdata.XSDataLength(char_params.min_crystal_vdim))
 
         # Radiation damage model
-        sample.setSusceptibility(XSDataDouble(char_params.rad_suscept))
+        sample.setSusceptibility(xsdata.XSDataDouble(char_params.rad_suscept))
         sample.setChemicalComposition(None)
-        sample.setRadiationDamageModelBeta(XSDataDouble(char_params.beta / 1e6))
-        sample.setRadiationDamageModelGamma(XSDataDouble(char_params.gamma / 1e6))
+        sample.setRadiationDamageModelBeta(xsdata.XSDataDouble(char_params.beta / 1e6))
+        sample.setRadiationDamageModelGamma(
+            xsdata.XSDataDouble(char_params.gamma / 1e6)
+        )
 
-        diff_plan.setForcedSpaceGroup(XSDataString(char_params.space_group))
+        diff_plan.setForcedSpaceGroup(xsdata.XSDataString(char_params.space_group))
 
         # Characterisation type - Routine DC
         if char_params.use_min_dose:
             pass
 
         if char_params.use_min_time:
-            time = XSDataTime(char_params.min_time)
+            time = xsdata.XSDataTime(char_params.min_time)
             diff_plan.setMaxExposureTimePerDataCollection(time)
 
         # Account for radiation damage
@@ -208,16 +199,16 @@ class EDNACharacterisation(AbstractCharacterisation):
         # Characterisation type - SAD
         if char_params.opt_sad:
             if char_params.auto_res:
-                diff_plan.setAnomalousData(XSDataBoolean(True))
+                diff_plan.setAnomalousData(xsdata.XSDataBoolean(True))
             else:
-                diff_plan.setAnomalousData(XSDataBoolean(False))
+                diff_plan.setAnomalousData(xsdata.XSDataBoolean(False))
                 self._modify_strategy_option(diff_plan, "-SAD yes")
-                diff_plan.setAimedResolution(XSDataDouble(char_params.sad_res))
+                diff_plan.setAimedResolution(xsdata.XSDataDouble(char_params.sad_res))
         else:
-            diff_plan.setAnomalousData(XSDataBoolean(False))
+            diff_plan.setAnomalousData(xsdata.XSDataBoolean(False))
 
         # Data set
-        data_set = XSDataMXCuBEDataSet()
+        data_set = xsdata.XSDataMXCuBEDataSet()
         acquisition_parameters = data_collection.acquisitions[0].acquisition_parameters
         path_template = data_collection.acquisitions[0].path_template
         path_str = os.path.join(
@@ -225,8 +216,8 @@ class EDNACharacterisation(AbstractCharacterisation):
         )
 
         for img_num in range(int(acquisition_parameters.num_images)):
-            image_file = XSDataFile()
-            path = XSDataString()
+            image_file = xsdata.XSDataFile()
+            path = xsdata.XSDataString()
             path.set_value(path_str % (img_num + 1))
             image_file.setPath(path)
             data_set.addImageFile(image_file)
@@ -411,7 +402,7 @@ class EDNACharacterisation(AbstractCharacterisation):
             (queue_model_objects.CharacterisationsParameters) object with default
             parameters.
         """
-        edna_input = XSDataInputMXCuBE.parseString(self.edna_default_input)
+        edna_input = xsdata.XSDataInputMXCuBE.parseString(self.edna_default_input)
         diff_plan = edna_input.getDiffractionPlan()
 
         edna_sample = edna_input.getSample()
@@ -34,21 +34,13 @@ from HardwareRepository.HardwareObjects.abstract.AbstractOnlineProcessing import
     AbstractOnlineProcessing,
 )
 
-from HardwareRepository.HardwareObjects.XSDataCommon import (
-    XSDataBoolean,
-    XSDataDouble,
-    XSDataInteger,
-    XSDataString,
-)
-from HardwareRepository.HardwareObjects.XSDataControlDozorv1_1 import (
-    XSDataInputControlDozor,
-    XSDataResultControlDozor,
-    XSDataControlImageDozor,
-)
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 
 
 from HardwareRepository import HardwareRepository as HWR
 
+xsdata = XSDataBindings("XSDataCommon", "XSDataControlDozorv1_1")
+
 __credits__ = ["EMBL Hamburg"]
 __license__ = "LGPLv3+"
 
@@ -155,24 +147,38 @@ class EMBLOnlineProcessing(AbstractOnlineProcessing):
         :param processing_input_filename
         :type : str
         """
-        input_file = XSDataInputControlDozor()
-        input_file.setTemplate(XSDataString(self.params_dict["template"]))
+        input_file = xsdata.XSDataInputControlDozor()
+        input_file.setTemplate(xsdata.XSDataString(self.params_dict["template"]))
         input_file.setFirst_image_number(
-            XSDataInteger(self.params_dict["first_image_num"])
+            xsdata.XSDataInteger(self.params_dict["first_image_num"])
+        )
+        input_file.setLast_image_number(
+            xsdata.XSDataInteger(self.params_dict["images_num"])
+        )
+        input_file.setFirst_run_number(
+            xsdata.XSDataInteger(self.params_dict["run_number"])
+        )
+        input_file.setLast_run_number(
+            xsdata.XSDataInteger(self.params_dict["run_number"])
+        )
+        input_file.setLine_number_of(
+            xsdata.XSDataInteger(self.params_dict["lines_num"])
         )
-        input_file.setLast_image_number(XSDataInteger(self.params_dict["images_num"]))
-        input_file.setFirst_run_number(XSDataInteger(self.params_dict["run_number"]))
-        input_file.setLast_run_number(XSDataInteger(self.params_dict["run_number"]))
-        input_file.setLine_number_of(XSDataInteger(self.params_dict["lines_num"]))
         input_file.setReversing_rotation(
-            XSDataBoolean(self.params_dict["reversing_rotation"])
+            xsdata.XSDataBoolean(self.params_dict["reversing_rotation"])
+        )
+        input_file.setPixelMin(
+            xsdata.XSDataInteger(HWR.beamline.detector.get_pixel_min())
+        )
+        input_file.setPixelMax(
+            xsdata.XSDataInteger(HWR.beamline.detector.get_pixel_max())
+        )
+        input_file.setBeamstopSize(xsdata.XSDataDouble(self.beamstop_hwobj.get_size()))
+        input_file.setBeamstopDistance(
+            xsdata.XSDataDouble(self.beamstop_hwobj.get_distance())
         )
-        input_file.setPixelMin(XSDataInteger(HWR.beamline.detector.get_pixel_min()))
-        input_file.setPixelMax(XSDataInteger(HWR.beamline.detector.get_pixel_max()))
-        input_file.setBeamstopSize(XSDataDouble(self.beamstop_hwobj.get_size()))
-        input_file.setBeamstopDistance(XSDataDouble(self.beamstop_hwobj.get_distance()))
         input_file.setBeamstopDirection(
-            XSDataString(self.beamstop_hwobj.get_direction())
+            xsdata.XSDataString(self.beamstop_hwobj.get_direction())
         )
 
         input_file.exportToFile(processing_input_filename)
@@ -335,16 +341,16 @@ class EMBLOnlineProcessing(AbstractOnlineProcessing):
         processing_xml_filename = os.path.join(
             self.params_dict["process_directory"], "dozor_result.xml"
         )
-        dozor_result = XSDataResultControlDozor()
+        dozor_result = xsdata.XSDataResultControlDozor()
         for index in range(self.params_dict["images_num"]):
-            dozor_image = XSDataControlImageDozor()
-            dozor_image.setNumber(XSDataInteger(index))
-            dozor_image.setScore(XSDataDouble(self.results_raw["score"][index]))
+            dozor_image = xsdata.XSDataControlImageDozor()
+            dozor_image.setNumber(xsdata.XSDataInteger(index))
+            dozor_image.setScore(xsdata.XSDataDouble(self.results_raw["score"][index]))
             dozor_image.setSpots_num_of(
-                XSDataInteger(self.results_raw["spots_num"][index])
+                xsdata.XSDataInteger(self.results_raw["spots_num"][index])
             )
             dozor_image.setSpots_resolution(
-                XSDataDouble(self.results_raw["spots_resolution"][index])
+                xsdata.XSDataDouble(self.results_raw["spots_resolution"][index])
             )
             dozor_result.addImageDozor(dozor_image)
         dozor_result.exportToFile(processing_xml_filename)
@@ -24,13 +24,16 @@ Example xml file:
   <exporter_address>wid30bmd2s:9001</exporter_address>
   <actuator_name>AlignmentY</actuator_name>
   <tolerance>1e-2</tolerance>
+  <!-- fallback poll of the ready state when state events are missing [s] -->
+  <ready_poll_interval>0.01</ready_poll_interval>
 </device>
 """
 
 import sys
 import math
 
-from gevent import Timeout, sleep
+from gevent import Timeout
+from gevent.event import Event
 from HardwareRepository.HardwareObjects.abstract.AbstractMotor import AbstractMotor
 from HardwareRepository.Command.Exporter import Exporter
 from HardwareRepository.Command.exporter.ExporterStates import ExporterStates
@@ -51,6 +54,12 @@ class ExporterMotor(AbstractMotor):
         self._exporter_address = None
         self.motor_position = None
         self.motor_state = None
+        self.ready_poll_interval = None
+        self._app_state = None
+        self._hw_state = None
+        self._app_ready_event = Event()
+        # a not "Ready" state was seen since the last move was started
+        self._move_started = True
 
     def init(self):
         """Initialise the motor"""
@@ -87,7 +96,30 @@ class ExporterMotor(AbstractMotor):
         if self.motor_state:
             self.motor_state.connect_signal("update", self._update_state)
 
+        # application states, updated by the exporter events
+        self.ready_poll_interval = self.get_property("ready_poll_interval", 0.01)
+        self._app_state = self.add_channel(
+            {
+                "type": "exporter",
+                "exporter_address": self._exporter_address,
+                "name": "app_state",
+            },
+            "State",
+        )
+        self._hw_state = self.add_channel(
+            {
+                "type": "exporter",
+                "exporter_address": self._exporter_address,
+                "name": "hw_state",
+            },
+            "HardwareState",
+        )
+        for channel in (self._app_state, self._hw_state):
+            if channel:
+                channel.connect_signal("update", self._update_ready)
+
         self.update_state()
+        self._update_ready()
 
     def get_state(self):
         """Get the motor state.
@@ -107,6 +139,7 @@ class ExporterMotor(AbstractMotor):
             state = ExporterStates.__members__[state].value
         except (AttributeError, KeyError):
             state = self.STATES.UNKNOWN
+        self._update_ready()
         return self.update_state(state)
 
     def _get_hwstate(self):
@@ -139,6 +172,32 @@ class ExporterMotor(AbstractMotor):
             return True
         return False
 
+    def _cached_ready(self):
+        """Get the "Ready" state from the last state events, without reading.
+        Returns:
+            (bool): True if software, hardware and motor state are "Ready".
+        """
+        if not (self._app_state and self.motor_state):
+            return False
+        # no HardwareState on some applications
+        hw_state = self._hw_state.value if self._hw_state else None
+        return (
+            self._app_state.value == "Ready"
+            and hw_state in (None, "Ready")
+            and self.motor_state.value == "Ready"
+        )
+
+    def _update_ready(self, *args):
+        """Set or clear the application ready event, on a state event.
+        After a move is started, the "Ready" states are only trusted once
+        a not "Ready" state was seen: they may predate the move.
+        """
+        if not self._cached_ready():
+            self._move_started = True
+            self._app_ready_event.clear()
+        elif self._move_started:
+            self._app_ready_event.set()
+
     def _wait_ready(self, timeout=3):
         """Wait for the state to be "Ready".
         Args:
@@ -147,8 +206,11 @@ class ExporterMotor(AbstractMotor):
             RuntimeError: Execution timeout.
         """
         with Timeout(timeout, RuntimeError("Execution timeout")):
-            while not self._ready():
-                sleep(0.01)
+            # set by the state events, read only if events are missing
+            while not self._app_ready_event.wait(self.ready_poll_interval):
+                if self._ready():
+                    self._move_started = True
+                    self._app_ready_event.set()
 
     def wait_move(self, timeout=20):
         """Wait until the end of move ended, using the application state.
@@ -165,8 +227,10 @@ class ExporterMotor(AbstractMotor):
             RuntimeError: Execution timeout.
         """
         with Timeout(timeout, RuntimeError("Execution timeout")):
-            while self.get_state() != self.STATES.READY:
-                sleep(0.01)
+            # set by the motor state events, read only if events are missing
+            while not self._ready_event.wait(self.ready_poll_interval):
+                if self.get_state() == self.STATES.READY:
+                    self.update_state(self.STATES.READY)
 
     def get_value(self):
         """Get the motor position.
@@ -224,6 +288,8 @@ class ExporterMotor(AbstractMotor):
         Args:
             value (float): target value
         """
+        self._move_started = False
+        self._app_ready_event.clear()
         self.update_state(self.STATES.BUSY)
         self.motor_position.set_value(value)
 
@@ -130,6 +130,9 @@ class GenericDiffractometer(HardwareObject):
         "beam_y",
     ]
 
+    # columns of the centred positions given to motor_positions_to_screen_batch
+    SCREEN_PROJECTION_MOTORS = ("sampx", "sampy", "phiy", "phiz")
+
     STATE_CHANGED_EVENT = "stateChanged"
     STATUS_CHANGED_EVENT = "statusChanged"
     MOTOR_POSITION_CHANGED_EVENT = "motorPositionsChanged"
@@ -186,6 +189,12 @@ class GenericDiffractometer(HardwareObject):
         )
         # not updating state inmediately after cmd started
 
+        # move_motors starts all the motors at once, except the conflicting
+        # motors (list of tuples of motor roles) that move in sequence
+        self.concurrent_moves = False
+        self.continuous_auto_centring = False
+        self.conflicting_motors = []
+
         # Internal values -----------------------------------------------------
         self.ready_event = None
         self.head_type = GenericDiffractometer.HEAD_TYPE_MINIKAPPA
@@ -205,6 +214,8 @@ class GenericDiffractometer(HardwareObject):
         self.current_centring_method = None
         self.current_motor_positions = {}
         self.current_motor_states = {}
+        self._position_snapshot = None
+        self._position_snapshot_version = 0
 
         self.fast_shutter_is_open = None
         self.centring_status = {"valid": False}
@@ -383,6 +394,17 @@ class GenericDiffractometer(HardwareObject):
         except Exception:
             pass
 
+        self.concurrent_moves = self.get_property("concurrent_moves", False)
+        self.continuous_auto_centring = self.get_property(
+            "continuous_auto_centring", False
+        )
+        try:
+            self.conflicting_motors = eval(self.get_property("conflicting_motors", "[]"))
+        except Exception:
+            logging.getLogger("HWR").warning(
+                "Diffractometer: could not parse conflicting_motors"
+            )
+
         # Other parameters ---------------------------------------------------
         try:
             self.zoom_centre = eval(self.get_property("zoom_centre"))
@@ -822,6 +844,7 @@ class GenericDiffractometer(HardwareObject):
                     new_point_cb=lambda point: self.emit(
                         "newAutomaticCentringPoint", (point,)
                     ),
+                    continuous=self.continuous_auto_centring,
                 )
             else:
                 self.current_centring_procedure = gevent.spawn(self.automatic_centring)
@@ -924,6 +947,7 @@ class GenericDiffractometer(HardwareObject):
     def centring_motor_moved(self, pos):
         """
         """
+        self.invalidate_position_snapshot()
         if time.time() - self.centring_time > 1.0:
             self.invalidate_centring()
         self.emit_diffractometer_moved()
@@ -941,49 +965,119 @@ class GenericDiffractometer(HardwareObject):
         """
         self.emit("diffractometerMoved", ())
 
-    def motor_positions_to_screen(self, centred_positions_dict):
+    def invalidate_position_snapshot(self):
         """
+        Forget the position snapshot, on centring motor change
         """
-        if self.use_sample_centring:
-            self.update_zoom_calibration()
-            if None in (self.pixels_per_mm_x, self.pixels_per_mm_y):
-                return 0, 0
+        self._position_snapshot = None
+        self._position_snapshot_version += 1
+
+    def get_position_snapshot(self):
+        """
+        Positions of the centring motors and rotation, read once and kept
+        until a centring motor moves, with the current zoom calibration and
+        beam position.
+        Returns:
+            (dict): version, phi, sampx, sampy, phiy, phiz (motor positions),
+                    inv_rot_matrix (2x2 array), pixels_per_mm (x, y) and
+                    beam_position (x, y)
+        """
+        snapshot = self._position_snapshot
+        if snapshot is None:
+            version = self._position_snapshot_version
             phi_angle = math.radians(
                 self.centring_phi.direction * self.centring_phi.get_value()
             )
-            sampx = self.centring_sampx.direction * (
-                centred_positions_dict["sampx"] - self.centring_sampx.get_value()
-            )
-            sampy = self.centring_sampy.direction * (
-                centred_positions_dict["sampy"] - self.centring_sampy.get_value()
-            )
-            phiy = self.centring_phiy.direction * (
-                centred_positions_dict["phiy"] - self.centring_phiy.get_value()
-            )
-            phiz = self.centring_phiz.direction * (
-                centred_positions_dict["phiz"] - self.centring_phiz.get_value()
-            )
-            rot_matrix = numpy.matrix(
-                [
-                    math.cos(phi_angle),
-                    -math.sin(phi_angle),
-                    math.sin(phi_angle),
-                    math.cos(phi_angle),
-                ]
-            )
-            rot_matrix.shape = (2, 2)
-            inv_rot_matrix = numpy.array(rot_matrix.I)
-            dx, dy = (
-                numpy.dot(numpy.array([sampx, sampy]), inv_rot_matrix)
-                * self.pixels_per_mm_x
-            )
+            cos_phi, sin_phi = math.cos(phi_angle), math.sin(phi_angle)
+            snapshot = {
+                "version": version,
+                "sampx": self.centring_sampx.get_value(),
+                "sampy": self.centring_sampy.get_value(),
+                "phiy": self.centring_phiy.get_value(),
+                "phiz": self.centring_phiz.get_value(),
+                # inverse of the rotation matrix [[cos, -sin], [sin, cos]]
+                "inv_rot_matrix": numpy.array(
+                    [[cos_phi, sin_phi], [-sin_phi, cos_phi]]
+                ),
+            }
+            # not kept if a motor moved while reading
+            if version == self._position_snapshot_version:
+                self._position_snapshot = snapshot
 
-            x = (phiy * self.pixels_per_mm_x) + self.beam_position[0]
-            y = dy + (phiz * self.pixels_per_mm_y) + self.beam_position[1]
+        # not cached: subclasses calibrate and set beam_position on their own
+        self.update_zoom_calibration()
+        snapshot = dict(snapshot)
+        snapshot["pixels_per_mm"] = (self.pixels_per_mm_x, self.pixels_per_mm_y)
+        snapshot["beam_position"] = tuple(self.beam_position)
+        return snapshot
 
-            return x, y
-        else:
+    def motor_positions_to_screen(self, centred_positions_dict):
+        """
+        """
+        positions = [
+            [centred_positions_dict[motor] for motor in self.SCREEN_PROJECTION_MOTORS]
+        ]
+        x, y = self._project_to_screen(positions)[0]
+        return x, y
+
+    def motor_positions_to_screen_batch(self, positions):
+        """
+        Screen coordinates of several centred positions, in one pass
+        Args:
+            positions (array): (N, 4) centred positions, with the motors of
+                               SCREEN_PROJECTION_MOTORS as columns
+        Returns:
+            (numpy.ndarray): (N, 2) screen coordinates (x, y)
+        Raises:
+            NotImplementedError: projection specific to a subclass
+        """
+        if (
+            type(self).motor_positions_to_screen
+            is not GenericDiffractometer.motor_positions_to_screen
+        ):
             raise NotImplementedError
+        positions = numpy.asarray(positions, dtype=float).reshape(
+            -1, len(self.SCREEN_PROJECTION_MOTORS)
+        )
+        return self._project_to_screen(positions)
+
+    def _project_to_screen(self, positions):
+        """
+        Args:
+            positions (array): (N, 4) centred positions (sampx, sampy, phiy, phiz)
+        Returns:
+            (numpy.ndarray): (N, 2) screen coordinates
+        """
+        if not self.use_sample_centring:
+            raise NotImplementedError
+
+        positions = numpy.asarray(positions, dtype=float)
+        snapshot = self.get_position_snapshot()
+        pixels_per_mm_x, pixels_per_mm_y = snapshot["pixels_per_mm"]
+        if None in (pixels_per_mm_x, pixels_per_mm_y):
+            return numpy.zeros((len(positions), 2))
+
+        current = numpy.array(
+            [snapshot[motor] for motor in self.SCREEN_PROJECTION_MOTORS]
+        )
+        directions = numpy.array(
+            [
+                self.centring_sampx.direction,
+                self.centring_sampy.direction,
+                self.centring_phiy.direction,
+                self.centring_phiz.direction,
+            ]
+        )
+        # sampx, sampy, phiy, phiz offsets from the current positions
+        offsets = (positions - current) * directions
+        screen_positions = numpy.empty((len(positions), 2))
+        screen_positions[:, 0] = offsets[:, 2] * pixels_per_mm_x
+        screen_positions[:, 1] = (
+            offsets[:, :2].dot(snapshot["inv_rot_matrix"][:, 1]) * pixels_per_mm_x
+            + offsets[:, 3] * pixels_per_mm_y
+        )
+        screen_positions += snapshot["beam_position"]
+        return screen_positions
 
     def move_to_centred_position(self, centred_position):
         """
@@ -1001,19 +1095,30 @@ class GenericDiffractometer(HardwareObject):
         if wait:
             self.wait_device_ready(10)
 
-    def move_motors(self, motor_positions, timeout=15):
+    def move_motors(self, motor_positions, timeout=15, concurrent=None):
         """
         Moves diffractometer motors to the requested positions
 
         :param motors_dict: dictionary with motor names or hwobj
                             and target values.
         :type motors_dict: dict
+        :param concurrent: move all the motors at once and wait for all of
+                           them (default: concurrent_moves property)
+        :type concurrent: bool
         """
         if not isinstance(motor_positions, dict):
             motor_positions = motor_positions.as_dict()
 
+        if concurrent is None:
+            concurrent = self.concurrent_moves
+
         self.wait_device_ready(timeout)
 
+        if concurrent:
+            self.move_motors_concurrently(motor_positions, timeout)
+            self.wait_device_ready(timeout)
+            return
+
         for motor in motor_positions.keys():
             position = motor_positions[motor]
             """
@@ -1033,13 +1138,95 @@ class GenericDiffractometer(HardwareObject):
                 # motor_positions[motor] = position
             motor.set_value(position)
         self.wait_device_ready(timeout)
+        self._delay_state_polling()
+        self.wait_device_ready(timeout)
 
+    def _delay_state_polling(self):
         if self.delay_state_polling is not None and self.delay_state_polling > 0:
             # delay polling for state in the
             # case of controller not reporting MOVING inmediately after cmd
             gevent.sleep(self.delay_state_polling)
 
-        self.wait_device_ready(timeout)
+    def get_motor_move_groups(self, motor_positions):
+        """
+        Groups the motors to move: each conflicting motors group moves in
+        sequence, the other motors move on their own
+
+        :param motor_positions: dictionary with motor names or hwobj
+                                and target values.
+        :type motor_positions: dict
+        :returns: list of lists of (motor role, motor hwobj, position)
+        """
+        motor_roles = dict(
+            (id(motor), role) for role, motor in self.motor_hwobj_dict.items()
+        )
+        moves = {}
+        for motor, position in motor_positions.items():
+            if isinstance(motor, (str, unicode)):
+                motor_role = motor
+                motor = self.motor_hwobj_dict.get(motor_role)
+            else:
+                motor_role = motor_roles.get(id(motor), motor.name())
+            if None in (motor, position):
+                continue
+            moves[motor_role] = (motor_role, motor, position)
+
+        groups = []
+        for conflicting_roles in self.conflicting_motors:
+            group = [moves.pop(role) for role in conflicting_roles if role in moves]
+            if group:
+                groups.append(group)
+        groups.extend([move] for move in moves.values())
+
+        return groups
+
+    def _move_motors_in_sequence(self, moves, moved, errors):
+        for motor_role, motor, position in moves:
+            try:
+                # a motor still moving finishes its move first
+                motor.wait_ready()
+                motor.set_value(position, timeout=None)
+            except Exception as ex:
+                errors[motor_role] = ex
+                break
+            moved.add(motor_role)
+            # before the next motor of the group waits for this one
+            self._delay_state_polling()
+
+    def move_motors_concurrently(self, motor_positions, timeout=15):
+        """
+        Starts all the motors at once (the conflicting motors one after the
+        other), and waits for all of them with a single timeout
+
+        :param motor_positions: dictionary with motor names or hwobj
+                                and target values.
+        :type motor_positions: dict
+        :raises: RuntimeError with the errors of all the motors that failed
+        """
+        groups = self.get_motor_move_groups(motor_positions)
+        moved = set()
+        errors = {}
+
+        tasks = [
+            gevent.spawn(self._move_motors_in_sequence, group, moved, errors)
+            for group in groups
+        ]
+        gevent.joinall(tasks, timeout=timeout)
+
+        for group, task in zip(groups, tasks):
+            if not task.ready():
+                task.kill()
+                for motor_role, motor, position in group:
+                    if motor_role not in moved and motor_role not in errors:
+                        errors[motor_role] = "timeout"
+
+        if errors:
+            msg = ", ".join(
+                "%s: %s" % (motor_role, errors[motor_role])
+                for motor_role in sorted(errors)
+            )
+            logging.getLogger("HWR").error("Diffractometer: could not move %s", msg)
+            raise RuntimeError("Could not move motors (%s)" % msg)
 
     def move_motors_done(self, move_motors_procedure):
         """
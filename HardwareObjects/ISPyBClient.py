@@ -17,7 +17,7 @@ except Exception:
     from urllib.parse import urljoin
     from urllib.error import URLError
 
-from suds.sudsobject import asdict
+from suds.sudsobject import asdict, Object as SudsObject, Property as SudsProperty
 from suds import WebFault
 from suds.client import Client
 from HardwareRepository.BaseHardwareObjects import HardwareObject
@@ -53,6 +53,24 @@ _WS_AUTOPROC_URL = _WSDL_ROOT + "ToolsForAutoprocessingWebService?wsdl"
 _WS_USERNAME = None
 _WS_PASSWORD = None
 
+# Complex types of the collection web service created by ISPyBValueFactory
+_WS_COLLECTION_TYPES = (
+    "ns0:beamLineSetup3VO",
+    "ns0:dataCollectionGroupWS3VO",
+    "ns0:dataCollectionWS3VO",
+    "robotActionWS3VO",
+    "workflow3VO",
+    "workflowMeshWS3VO",
+    "gridInfoWS3VO",
+    "workflowStep3VO",
+)
+
+# suds clients by WSDL url, and the prototypes of the complex types they
+# created by (WSDL url, type name). Shared by the whole process, as parsing
+# a WSDL and building a type from its schema are expensive.
+_SUDS_CLIENTS = {}
+_SUDS_PROTOTYPES = {}
+
 _CONNECTION_ERROR_MSG = (
     "Could not connect to ISPyB, please verify that "
     + "the server is running and that your "
@@ -66,6 +84,46 @@ SampleReference = namedtuple(
 )
 
 
+def get_suds_client(url):
+    """
+    Returns the suds client of the WSDL at url, created on first use.
+    """
+    client = _SUDS_CLIENTS.get(url)
+    if client is None:
+        client = Client(url, cache=None)
+        _SUDS_CLIENTS[url] = client
+    return client
+
+
+def _copy_suds_object(prototype):
+    obj = prototype.__class__()
+    for name, value in prototype.__metadata__:
+        setattr(obj.__metadata__, name, value)
+    for name, value in prototype:
+        if isinstance(value, SudsObject):
+            value = _copy_suds_object(value)
+        elif isinstance(value, list):
+            value = list(value)
+        setattr(obj, name, value)
+    return obj
+
+
+def create_suds_object(client, type_name):
+    """
+    Creates an object of a WSDL complex type, as client.factory.create does,
+    but copied from a prototype built once per type.
+    """
+    key = (client.wsdl.url, type_name)
+    prototype = _SUDS_PROTOTYPES.get(key)
+    if prototype is None:
+        prototype = client.factory.create(type_name)
+        if isinstance(prototype, SudsProperty):
+            # mixed content types are not copied
+            return prototype
+        _SUDS_PROTOTYPES[key] = prototype
+    return _copy_suds_object(prototype)
+
+
 def trace(fun):
     def _trace(*args):
         log_msg = "lims client " + fun.__name__ + " called with: "
@@ -293,6 +351,17 @@ class ISPyBClient(HardwareObject):
                     )
                     self._tools_ws.set_options(cache=None, location=_WS_BL_SAMPLE_URL)
                     self._autoproc_ws.set_options(cache=None, location=_WS_AUTOPROC_URL)
+
+                    # ISPyBValueFactory reuses the collection client, and
+                    # its types are built once here
+                    _SUDS_CLIENTS[_WS_COLLECTION_URL] = self._collection
+                    for type_name in _WS_COLLECTION_TYPES:
+                        try:
+                            create_suds_object(self._collection, type_name)
+                        except Exception:
+                            logging.getLogger("HWR").debug(
+                                "[ISPYB] Type %s not available" % type_name
+                            )
                 except URLError:
                     logging.getLogger("ispyb_client").exception(_CONNECTION_ERROR_MSG)
                     return
@@ -1131,6 +1200,52 @@ class ISPyBClient(HardwareObject):
                 "Error in store_image: could not connect to server"
             )
 
+    def store_images(self, image_dicts):
+        """
+        Stores several images, in order. The stored images are removed from
+        <image_dicts>, so that a failed call can be retried with the others.
+
+        :param image_dicts: dictonaries with image pramaters.
+        :type image_dicts: list
+
+        :returns: the image ids
+        :rtype: list
+        :raises: URLError if the server cannot be reached
+        """
+        image_ids = []
+        if self._disabled:
+            del image_dicts[:]
+            return image_ids
+
+        if not self._collection:
+            logging.getLogger("ispyb_client").error(
+                "Error in store_images: could not connect to server"
+            )
+            del image_dicts[:]
+            return image_ids
+
+        while image_dicts:
+            if "dataCollectionId" in image_dicts[0]:
+                try:
+                    image_ids.append(
+                        self._collection.service.storeOrUpdateImage(image_dicts[0])
+                    )
+                except WebFault:
+                    # rejected by the server: not retried
+                    logging.getLogger("ispyb_client").exception(
+                        "ISPyBClient: exception in store_images"
+                    )
+            else:
+                logging.getLogger("ispyb_client").error(
+                    "Error in store_images: "
+                    + "data_collection_id missing, could not store image in ISPyB"
+                )
+            image_dicts.pop(0)
+        logging.getLogger("HWR").debug(
+            "  - storing %d images in lims ok" % len(image_ids)
+        )
+        return image_ids
+
     def __find_sample(self, sample_ref_list, code=None, location=None):
         """
         Returns the sample with the matching "search criteria" <code> and/or
@@ -1994,7 +2109,7 @@ class ISPyBClient(HardwareObject):
         action_id = None
         if True:
             # try:
-            robot_action_vo = self._collection.factory.create("robotActionWS3VO")
+            robot_action_vo = create_suds_object(self._collection, "robotActionWS3VO")
 
             robot_action_vo.actionType = robot_action_dict.get("actionType")
             robot_action_vo.containerLocation = robot_action_dict.get(
@@ -2089,7 +2204,7 @@ class ISPyBValueFactory:
         """
         beamline_setup = None
         try:
-            beamline_setup = ws_client.factory.create("ns0:beamLineSetup3VO")
+            beamline_setup = create_suds_object(ws_client, "ns0:beamLineSetup3VO")
         except Exception:
             raise
         try:
@@ -2141,7 +2256,7 @@ class ISPyBValueFactory:
         group = None
 
         try:
-            group = ws_client.factory.create("ns0:dataCollectionGroupWS3VO")
+            group = create_suds_object(ws_client, "ns0:dataCollectionGroupWS3VO")
         except Exception:
             raise
         else:
@@ -2255,7 +2370,7 @@ class ISPyBValueFactory:
 
         try:
 
-            data_collection = ws_client.factory.create("ns0:dataCollectionWS3VO")
+            data_collection = create_suds_object(ws_client, "ns0:dataCollectionWS3VO")
         except Exception:
             raise
 
@@ -2475,8 +2590,8 @@ class ISPyBValueFactory:
         workflow_vo = None
 
         try:
-            ws_client = Client(_WS_COLLECTION_URL, cache=None)
-            workflow_vo = ws_client.factory.create("workflow3VO")
+            ws_client = get_suds_client(_WS_COLLECTION_URL)
+            workflow_vo = create_suds_object(ws_client, "workflow3VO")
         except Exception:
             raise
 
@@ -2506,8 +2621,8 @@ class ISPyBValueFactory:
         workflow_mesh_vo = None
 
         try:
-            ws_client = Client(_WS_COLLECTION_URL, cache=None)
-            workflow_mesh_vo = ws_client.factory.create("workflowMeshWS3VO")
+            ws_client = get_suds_client(_WS_COLLECTION_URL)
+            workflow_mesh_vo = create_suds_object(ws_client, "workflowMeshWS3VO")
         except Exception:
             raise
 
@@ -2540,8 +2655,8 @@ class ISPyBValueFactory:
         grid_info_vo = None
 
         try:
-            ws_client = Client(_WS_COLLECTION_URL, cache=None)
-            grid_info_vo = ws_client.factory.create("gridInfoWS3VO")
+            ws_client = get_suds_client(_WS_COLLECTION_URL)
+            grid_info_vo = create_suds_object(ws_client, "gridInfoWS3VO")
         except Exception:
             raise
 
@@ -2570,8 +2685,8 @@ class ISPyBValueFactory:
         workflow_vo = None
 
         try:
-            ws_client = Client(_WS_COLLECTION_URL, cache=None)
-            workflow_step_vo = ws_client.factory.create("workflowStep3VO")
+            ws_client = get_suds_client(_WS_COLLECTION_URL)
+            workflow_step_vo = create_suds_object(ws_client, "workflowStep3VO")
         except Exception:
             raise
 
@@ -2608,8 +2723,8 @@ class ISPyBValueFactory:
         grid_info_vo = None
 
         try:
-            ws_client = Client(_WS_COLLECTION_URL, cache=None)
-            grid_info_vo = ws_client.factory.create("gridInfoWS3VO")
+            ws_client = get_suds_client(_WS_COLLECTION_URL)
+            grid_info_vo = create_suds_object(ws_client, "gridInfoWS3VO")
         except Exception:
             raise
 
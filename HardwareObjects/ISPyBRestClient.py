@@ -4,9 +4,12 @@ A client for ISPyB Webservices.
 import logging
 import json
 import cgi
+import time
 
+from collections import namedtuple, OrderedDict
 from datetime import datetime
-from requests import post, get
+from requests import Session
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
 from HardwareRepository.BaseHardwareObjects import HardwareObject
 from HardwareRepository import HardwareRepository as HWR
@@ -18,6 +21,86 @@ _CONNECTION_ERROR_MSG = (
 )
 _NO_TOKEN_MSG = "Could not connect to ISPyB, no valid REST token available."
 
+CachedImage = namedtuple(
+    "CachedImage", ("filename", "data", "etag", "last_modified", "timestamp")
+)
+
+
+class ImageCache(object):
+    """
+    Least recently used images downloaded from LIMS, bounded by their total
+    size. Entries older than max_age are revalidated with a conditional
+    request (ETag / Last-Modified) before being used again.
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024, max_age=300.0):
+        """
+        :param int max_size: maximum total size of the cached images [bytes]
+        :param float max_age: age after which an entry is revalidated [s]
+        """
+        self.max_size = max_size
+        self.max_age = max_age
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        :returns: the CachedImage for key, None if not cached
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def is_fresh(self, entry, max_age=None):
+        if max_age is None:
+            max_age = self.max_age
+        return time.time() - entry.timestamp < max_age
+
+    def put(self, key, filename, data, etag=None, last_modified=None):
+        self.remove(key)
+        if len(data) > self.max_size:
+            return
+        self._entries[key] = CachedImage(
+            filename, data, etag, last_modified, time.time()
+        )
+        self.size += len(data)
+        while self.size > self.max_size:
+            _, entry = self._entries.popitem(last=False)
+            self.size -= len(entry.data)
+
+    def touch(self, key):
+        """Mark the entry for key as fresh, after a successful revalidation"""
+        self._entries[key] = self._entries[key]._replace(timestamp=time.time())
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.data)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def get_statistics(self):
+        """
+        :returns: dict with the number of entries, their size, the hits (served
+                  without downloading the image, after a revalidation or
+                  not), misses, revalidations and the hit rate
+        """
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_rate": float(self.hits) / requests if requests else 0.0,
+        }
+
 
 class ISPyBRestClient(HardwareObject):
     """
@@ -35,6 +118,8 @@ class ISPyBRestClient(HardwareObject):
         self.__rest_token_timestamp = None
         self.base_result_url = None
         self.beamline_name = None
+        self.image_cache = None
+        self._session = None
 
     def init(self):
 
@@ -45,6 +130,18 @@ class ISPyBRestClient(HardwareObject):
 
         logging.getLogger("requests").setLevel(logging.WARNING)
 
+        # Connections are kept open and reused by all requests
+        pool_size = int(self.get_property("http_pool_size", 10))
+        self._session = Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self.image_cache = ImageCache(
+            max_size=int(self.get_property("image_cache_size", 64 * 1024 * 1024)),
+            max_age=float(self.get_property("image_cache_max_age", 300.0)),
+        )
+
         self.__rest_root = self.get_property("restRoot").strip()
         self.__rest_username = self.get_property("restUserName").strip()
         self.__rest_password = self.get_property("restPass").strip()
@@ -91,7 +188,7 @@ class ISPyBRestClient(HardwareObject):
 
         try:
             data = {"login": str(user), "password": str(password)}
-            response = post(auth_url, data=data)
+            response = self._session.post(auth_url, data=data)
 
             self.__rest_token = response.json().get("token")
             self.__rest_token_timestamp = datetime.now()
@@ -154,7 +251,7 @@ class ISPyBRestClient(HardwareObject):
         )
 
         try:
-            response = json.loads(get(url).text)
+            response = json.loads(self._session.get(url).text)
         except Exception as ex:
             response = []
             logging.getLogger("ispyb_client").exception(str(ex))
@@ -180,7 +277,7 @@ class ISPyBRestClient(HardwareObject):
             dc_id=dc_id,
         )
         try:
-            response = json.loads(get(url).text)[0]
+            response = json.loads(self._session.get(url).text)[0]
         except Exception as ex:
             response = None
             logging.getLogger("ispyb_client").exception(str(ex))
@@ -230,7 +327,6 @@ class ISPyBRestClient(HardwareObject):
         :returns: tuple on the form (file name, base64 encoded data)
         """
         self.__update_rest_token()
-        fname, data = ("", "")
 
         url = "{rest_root}{token}"
         url += (
@@ -244,14 +340,8 @@ class ISPyBRestClient(HardwareObject):
             dcid=collection_id,
         )
 
-        try:
-            response = get(url)
-            data = response.content
-        except Exception as ex:
-            response = []
-            logging.getLogger("ispyb_client").exception(str(ex))
-
-        return data
+        # the plot grows while the images are processed: always revalidated
+        return self._get_image(("qualityindicatorplot", collection_id), url, 0)[1]
 
     def get_dc_thumbnail(self, image_id):
         """
@@ -262,7 +352,6 @@ class ISPyBRestClient(HardwareObject):
         """
 
         self.__update_rest_token()
-        fname, data = ("", "")
 
         url = "{rest_root}{token}"
         url += "/proposal/{pcode}{pnumber}/mx/image/{image_id}/thumbnail"
@@ -274,17 +363,7 @@ class ISPyBRestClient(HardwareObject):
             image_id=image_id,
         )
 
-        try:
-            response = get(url)
-            data = response.content
-            value, params = cgi.parse_header(response.headers)
-            fname = params["filename"]
-
-        except Exception as ex:
-            response = []
-            logging.getLogger("ispyb_client").exception(str(ex))
-
-        return fname, data
+        return self._get_image(("thumbnail", image_id), url)
 
     def get_dc_image(self, image_id):
         """
@@ -295,7 +374,6 @@ class ISPyBRestClient(HardwareObject):
         """
 
         self.__update_rest_token()
-        fname, data = ("", "")
 
         url = "{rest_root}{token}"
         url += "/proposal/{pcode}{pnumber}/mx/image/{image_id}/get"
@@ -307,17 +385,62 @@ class ISPyBRestClient(HardwareObject):
             image_id=image_id,
         )
 
-        try:
-            response = get(url)
-            data = response.content
-            value, params = cgi.parse_header(response.headers)
-            fname = params["filename"]
+        return self._get_image(("image", image_id), url)
 
+    def _get_image(self, key, url, max_age=None):
+        """
+        Get an image from the image cache, downloading it if it is not cached
+        or revalidating it if it is too old.
+
+        :param tuple key: image cache key, (kind of image, id)
+        :param str url: image URL
+        :param float max_age: age after which the cached image is revalidated,
+                              by default the max_age of the image cache [s]
+        :returns: tuple on the form (file name, data)
+        """
+        entry = self.image_cache.get(key)
+        if entry is not None and self.image_cache.is_fresh(entry, max_age):
+            self.image_cache.hits += 1
+            return entry.filename, entry.data
+
+        headers = {}
+        if entry is not None:
+            self.image_cache.revalidations += 1
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            response = self._session.get(url, headers=headers)
+            if entry is not None and response.status_code == 304:
+                self.image_cache.hits += 1
+                self.image_cache.touch(key)
+                return entry.filename, entry.data
+            response.raise_for_status()
         except Exception as ex:
-            response = []
             logging.getLogger("ispyb_client").exception(str(ex))
+            return "", ""
+
+        self.image_cache.misses += 1
+        _, params = cgi.parse_header(
+            response.headers.get("Content-Disposition", "")
+        )
+        fname = params.get("filename", "")
+        self.image_cache.put(
+            key,
+            fname,
+            response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return fname, response.content
 
-        return fname, data
+    def get_image_cache_statistics(self):
+        """
+        :returns: image cache statistics, see ImageCache.get_statistics
+        """
+        return self.image_cache.get_statistics()
 
     def get_proposals_by_user(self, user_name):
         """
@@ -337,7 +460,7 @@ class ISPyBRestClient(HardwareObject):
                     username=user_name,
                 )
 
-                response = get(url)
+                response = self._session.get(url)
                 proposal_list = json.loads(str(response.text))
 
                 for proposal in proposal_list:
@@ -400,7 +523,7 @@ class ISPyBRestClient(HardwareObject):
         session_list = []
         if self.__rest_token:
             try:
-                response = get(
+                response = self._session.get(
                     self.__rest_root
                     + self.__rest_token
                     + "/proposal/%s/session/list" % proposal_id
@@ -429,7 +552,7 @@ class ISPyBRestClient(HardwareObject):
         result = {}
 
         if self.__rest_token:
-            response = get(
+            response = self._session.get(
                 self.__rest_root
                 + self.__rest_token
                 + "/proposal/session/%d/localcontact" % session_id
@@ -586,7 +709,7 @@ class ISPyBRestClient(HardwareObject):
         self.update_rest_token()
         if self.__rest_token:
             try:
-                response = get(
+                response = self._session.get(
                     self.__rest_root
                     + self.__rest_token
                     + "/proposal/%s/session/list" % self.__rest_username
@@ -661,48 +661,7 @@ class QtGraphicsManager(AbstractSampleView):
            If diffractometer not ready then hides all shapes.
         """
         if self.diffractometer_hwobj.is_ready() and not self.in_centring_state:
-            for shape in self.get_shapes():
-                if isinstance(shape, GraphicsLib.GraphicsItemPoint):
-                    cpos = shape.get_centred_position()
-                    new_x, new_y = self.diffractometer_hwobj.motor_positions_to_screen(
-                        cpos.as_dict()
-                    )
-                    shape.set_start_position(new_x, new_y)
-                elif isinstance(shape, GraphicsLib.GraphicsItemGrid):
-                    grid_cpos = shape.get_centred_position()
-                    if grid_cpos is not None:
-                        current_cpos = queue_model_objects.CentredPosition(
-                            self.diffractometer_hwobj.get_positions()
-                        )
-
-                        current_cpos.set_motor_pos_delta(0.1)
-                        grid_cpos.set_motor_pos_delta(0.1)
-
-                        if hasattr(grid_cpos, "zoom"):
-                            current_cpos.zoom = grid_cpos.zoom
-
-                        center_coord = self.diffractometer_hwobj.motor_positions_to_screen(
-                            grid_cpos.as_dict()
-                        )
-                        if center_coord:
-                            shape.set_center_coord(center_coord)
-
-                            corner_coord = []
-                            for motor_pos in shape.get_motor_pos_corner():
-                                corner_coord.append(
-                                    (
-                                        self.diffractometer_hwobj.motor_positions_to_screen(
-                                            motor_pos
-                                        )
-                                    )
-                                )
-                            shape.set_corner_coord(corner_coord)
-
-                            if current_cpos == grid_cpos:
-                                shape.set_projection_mode(False)
-                            else:
-                                shape.set_projection_mode(True)
-
+            self.update_shapes_screen_positions()
             self.show_all_items()
             self.graphics_view.graphics_scene.update()
             # self.update_histogram()
@@ -711,6 +670,65 @@ class QtGraphicsManager(AbstractSampleView):
             self.hide_all_items()
             self.emit("diffractometerReady", False)
 
+    def update_shapes_screen_positions(self):
+        """Reprojects points and grids to the screen, with a single
+           projection of all their centred positions.
+        """
+        # (shape, index of its first position)
+        points = []
+        grids = []
+        positions = []
+        for shape in self.get_shapes():
+            if isinstance(shape, GraphicsLib.GraphicsItemPoint):
+                points.append((shape, len(positions)))
+                positions.append(shape.get_centred_position().as_dict())
+            elif isinstance(shape, GraphicsLib.GraphicsItemGrid):
+                grid_cpos = shape.get_centred_position()
+                if grid_cpos is not None:
+                    grids.append((shape, len(positions)))
+                    positions.append(grid_cpos.as_dict())
+                    positions.extend(shape.get_motor_pos_corner())
+        if not positions:
+            return
+
+        screen_positions = None
+        if hasattr(self.diffractometer_hwobj, "motor_positions_to_screen_batch"):
+            motor_names = self.diffractometer_hwobj.SCREEN_PROJECTION_MOTORS
+            try:
+                screen_positions = self.diffractometer_hwobj.motor_positions_to_screen_batch(
+                    [[cpos[name] for name in motor_names] for cpos in positions]
+                )
+            except NotImplementedError:
+                pass
+        if screen_positions is None:
+            screen_positions = [
+                self.diffractometer_hwobj.motor_positions_to_screen(cpos)
+                for cpos in positions
+            ]
+
+        for shape, index in points:
+            new_x, new_y = screen_positions[index]
+            shape.set_start_position(new_x, new_y)
+
+        if grids:
+            current_cpos = queue_model_objects.CentredPosition(
+                self.diffractometer_hwobj.get_positions()
+            )
+            current_cpos.set_motor_pos_delta(0.1)
+        for shape, index in grids:
+            grid_cpos = shape.get_centred_position()
+            grid_cpos.set_motor_pos_delta(0.1)
+            if hasattr(grid_cpos, "zoom"):
+                current_cpos.zoom = grid_cpos.zoom
+
+            corner_count = len(shape.get_motor_pos_corner())
+            center_coord = screen_positions[index]
+            corner_coord = screen_positions[index + 1 : index + 1 + corner_count]
+            if center_coord is not None:
+                shape.set_center_coord(center_coord)
+                shape.set_corner_coord(corner_coord)
+                shape.set_projection_mode(current_cpos != grid_cpos)
+
     def resizeEvent(self, event):
         GraphicsLib.GraphicsView.resizeEvent(self.graphics_view, event)
         if self.graphics_view.verticalScrollBar().isVisible():
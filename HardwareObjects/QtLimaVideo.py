@@ -124,6 +124,9 @@ class QtLimaVideo(AbstractVideoDevice):
         else:
             return [None, None]
 
+    def get_frame_number(self):
+        return self.video.getLastImageCounter()
+
     def get_image(self):
         image = self.video.getLastImage()
         if image.frameNumber() > -1:
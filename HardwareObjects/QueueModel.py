@@ -42,6 +42,106 @@ class Serializer(object):
         return json.dumps(object, default=lambda o: o.__dict__.values()[0])
 
 
+class _ModelIndex(object):
+    """
+    Incremental indexes of the nodes of one model: node id -> node and
+    path template (directory, prefix) -> run number -> nodes.
+    Nodes are re-indexed through the change callbacks of their path
+    template (changed in place) and of its owner (path template replaced).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.nodes = {}
+        # (directory, prefix): {run number: {id(node): node}}
+        self.path_nodes = {}
+        # id(node): (node, path template, key, run number, owner)
+        self._node_paths = {}
+        # id(path template or owner): set of id(node)
+        self._watched_nodes = {}
+
+        for child in root._children:
+            self.add_subtree(child)
+
+    def clear(self):
+        for entry in list(self._node_paths.values()):
+            self.unindex_path(entry[0])
+        self.nodes.clear()
+
+    def add_subtree(self, node):
+        self.nodes[node._node_id] = node
+        self.index_path(node)
+        for child in node._children:
+            self.add_subtree(child)
+
+    def remove_subtree(self, node):
+        if self.nodes.get(node._node_id) is node:
+            del self.nodes[node._node_id]
+        self.unindex_path(node)
+        for child in node._children:
+            self.remove_subtree(child)
+
+    def index_path(self, node):
+        self.unindex_path(node)
+        path_template = node.get_path_template()
+        if not path_template:
+            return
+
+        key = path_template.get_key()
+        run_number = path_template.run_number
+        owner = node.get_path_template_owner()
+        runs = self.path_nodes.setdefault(key, {})
+        runs.setdefault(run_number, {})[id(node)] = node
+        self._node_paths[id(node)] = (node, path_template, key, run_number, owner)
+        self._watch(path_template, node)
+        self._watch(owner, node)
+
+    def unindex_path(self, node):
+        entry = self._node_paths.pop(id(node), None)
+        if entry is None:
+            return
+
+        _, path_template, key, run_number, owner = entry
+        runs = self.path_nodes[key]
+        del runs[run_number][id(node)]
+        if not runs[run_number]:
+            del runs[run_number]
+            if not runs:
+                del self.path_nodes[key]
+        self._unwatch(path_template, node)
+        self._unwatch(owner, node)
+
+    def _watch(self, obj, node):
+        self._watched_nodes.setdefault(id(obj), set()).add(id(node))
+        obj.set_change_callback(self.changed)
+
+    def _unwatch(self, obj, node):
+        node_ids = self._watched_nodes[id(obj)]
+        node_ids.discard(id(node))
+        if not node_ids:
+            del self._watched_nodes[id(obj)]
+            obj.set_change_callback(None)
+
+    def changed(self, obj):
+        """Re-indexes the nodes of the path template or owner <obj>"""
+        for node_id in list(self._watched_nodes.get(id(obj), ())):
+            self.index_path(self._node_paths[node_id][0])
+
+    def get_run_numbers(self, key):
+        """
+        :returns: The run numbers used with the key (directory, prefix)
+        """
+        return list(self.path_nodes.get(key, {}))
+
+    def get_path_templates(self, key, run_number):
+        """
+        :returns: The path templates with the key (directory, prefix)
+                  and the run number <run_number>
+        """
+        nodes = self.path_nodes.get(key, {}).get(run_number, {})
+        return [self._node_paths[node_id][1] for node_id in nodes]
+
+
 class QueueModel(HardwareObject):
     def __init__(self, name):
         HardwareObject.__init__(self, name)
@@ -60,6 +160,8 @@ class QueueModel(HardwareObject):
         }
 
         self._selected_model = self._ispyb_model
+        # id(model root): _ModelIndex
+        self._indexes = {}
 
     def __getstate__(self):
         d = dict(self.__dict__)
@@ -79,6 +181,33 @@ class QueueModel(HardwareObject):
         """
         pass
 
+    def _get_index(self, root=None):
+        """
+        :returns: The indexes of the model with root <root>, by default
+                  the selected model. Built on first use.
+        :rtype: _ModelIndex
+        """
+        if root is None:
+            root = self._selected_model
+        index = self._indexes.get(id(root))
+        if index is None or index.root is not root:
+            index = _ModelIndex(root)
+            self._indexes[id(root)] = index
+        return index
+
+    def _find_index(self, node):
+        """
+        :returns: The indexes of the model containing <node>, None if
+                  they are not built
+        :rtype: _ModelIndex
+        """
+        while node._parent is not None:
+            node = node._parent
+        index = self._indexes.get(id(node))
+        if index is not None and index.root is node:
+            return index
+        return None
+
     def select_model(self, name):
         """
         Selects the model with the name <name>
@@ -110,6 +239,13 @@ class QueueModel(HardwareObject):
         :returns: None
         :rtype: NoneType
         """
+        for root in [self._models.get(name)] + (
+            [] if name else list(self._models.values())
+        ):
+            index = self._indexes.pop(id(root), None)
+            if index is not None:
+                index.clear()
+
         self._models[name] = queue_model_objects.RootNode()
 
         if not name:
@@ -159,11 +295,14 @@ class QueueModel(HardwareObject):
         """
         if True:
             # if isinstance(child, queue_model_objects.TaskNode):
+            if child._parent is not None and child in child._parent._children:
+                self._detach_child(child._parent, child)
             self._selected_model._total_node_count += 1
             child._parent = parent
             child._node_id = self._selected_model._total_node_count
             parent._children.append(child)
             child._set_name(child._name)
+            self._get_index().add_subtree(child)
             self.emit("child_added", (parent, child))
         else:
             raise TypeError("Expected type TaskNode, got %s " % str(type(child)))
@@ -201,11 +340,25 @@ class QueueModel(HardwareObject):
         if parent is None:
             parent = self._selected_model
 
+        node = self._get_index().nodes.get(_id)
+        ancestor = node
+        while ancestor is not None:
+            ancestor = ancestor._parent
+            if ancestor is parent:
+                return node
+
+        # Not indexed (or not in the selected model), search the tree
+        return self._find_node(_id, parent)
+
+    def _find_node(self, _id, parent):
+        """
+        Recursive part of get_node.
+        """
         for node in parent._children:
             if node._node_id == _id:
                 return node
             else:
-                result = self.get_node(_id, node)
+                result = self._find_node(_id, node)
 
                 if result:
                     return result
@@ -222,6 +375,7 @@ class QueueModel(HardwareObject):
         """
         if child in parent._children:
             parent._children.remove(child)
+            self._get_index().remove_subtree(child)
             self.emit("child_removed", (parent, child))
 
     def _detach_child(self, parent, child):
@@ -234,7 +388,10 @@ class QueueModel(HardwareObject):
         :returns: None
         :rtype: None
         """
-        child = parent._children.pop(child)
+        parent._children.remove(child)
+        index = self._find_index(parent)
+        if index is not None:
+            index.remove_subtree(child)
         return child
 
     def set_parent(self, parent, child):
@@ -247,11 +404,14 @@ class QueueModel(HardwareObject):
         :param child: The child
         :type child: TaskNode Object
         """
-        if child._parent:
-            self._detach_child(parent, child)
-            child.set_parent(parent)
-        else:
-            child._parent = parent
+        if child._parent is not None and child in child._parent._children:
+            self._detach_child(child._parent, child)
+            parent._children.append(child)
+        child._parent = parent
+
+        index = self._find_index(parent)
+        if index is not None and child in parent._children:
+            index.add_subtree(child)
 
     def view_created(self, view_item, task_model):
         """
@@ -302,19 +462,19 @@ class QueueModel(HardwareObject):
         :returns: The next available run number for the given path_template.
         :rtype: int
         """
-        all_path_templates = self.get_path_templates()
-        conflicting_path_templates = [0]
+        index = self._get_index()
+        key = new_path_template.get_key()
+        conflicting_path_templates = index.get_run_numbers(key)
 
-        for pt in all_path_templates:
-            if exclude_current:
-                if pt[1] is not new_path_template:
-                    if pt[1] == new_path_template:
-                        conflicting_path_templates.append(pt[1].run_number)
+        if exclude_current:
+            for pt in index.get_path_templates(key, new_path_template.run_number):
+                if pt is not new_path_template:
+                    break
             else:
-                if pt[1] == new_path_template:
-                    conflicting_path_templates.append(pt[1].run_number)
+                if new_path_template.run_number in conflicting_path_templates:
+                    conflicting_path_templates.remove(new_path_template.run_number)
 
-        return max(conflicting_path_templates) + 1
+        return max([0] + conflicting_path_templates) + 1
 
     def get_path_templates(self):
         """
@@ -349,11 +509,15 @@ class QueueModel(HardwareObject):
         :returns: True if there is a potential path collision.
         """
         result = False
-        path_template_list = self.get_path_templates()
+        # Only path templates with the same directory, prefix and run number
+        # can collide
+        path_template_list = self._get_index().get_path_templates(
+            new_path_template.get_key(), new_path_template.run_number
+        )
 
         for pt in path_template_list:
-            if pt[1] is not new_path_template:
-                if new_path_template.intersection(pt[1]):
+            if pt is not new_path_template:
+                if new_path_template.intersection(pt):
                     result = True
 
         return result
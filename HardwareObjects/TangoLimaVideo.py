@@ -19,35 +19,33 @@ import numpy
 import gevent
 import PyTango
 from PIL import Image
-import io
 import gipc
 import os
 
 from PyTango.gevent import DeviceProxy
 
 from HardwareRepository import BaseHardwareObjects
+from HardwareRepository.HardwareObjects.abstract.AbstractVideoDevice import (
+    FrameCounter,
+)
+
+HEADER_FORMAT = ">IHHqiiHHHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
 
 
 def poll_image(lima_tango_device, video_mode, FORMATS):
+    """
+    Returns the last image data (bytes), its width and height
+    """
     img_data = lima_tango_device.video_last_image
 
-    hfmt = ">IHHqiiHHHH"
-    hsize = struct.calcsize(hfmt)
-    _, _, img_mode, frame_number, width, height, _, _, _, _ = struct.unpack(
-        hfmt, img_data[1][:hsize]
+    _, _, img_mode, _, width, height, _, _, _, _ = struct.unpack(
+        HEADER_FORMAT, img_data[1][:HEADER_SIZE]
     )
 
-    raw_data = img_data[1][hsize:]
-    _from, _to = FORMATS.get(video_mode, (None, None))
-
-    if _from and _to:
-        img = Image.frombuffer(_from, (height, width), raw_data, "raw", _from, 0, 1)
-
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format=_to)
-        img = img.tobytes()
-    else:
-        img = raw_data
+    # The image data is passed on as it is, in the pixel layout of the video
+    # mode (see FORMATS)
+    img = img_data[1][HEADER_SIZE:]
 
     return img, width, height
 
@@ -62,6 +60,7 @@ class TangoLimaVideo(BaseHardwareObjects.Device):
         self.__polling = None
         self._video_mode = None
         self._last_image = (0, 0, 0)
+        self.frame_counter = FrameCounter()
 
         # Dictionary containing conversion information for a given
         # video_mode. The camera video mode is the key and the first
@@ -113,16 +112,30 @@ class TangoLimaVideo(BaseHardwareObjects.Device):
     def get_last_image(self):
         return self._last_image
 
+    def get_frame_statistics(self):
+        """
+        Returns:
+            (dict): frame_number, frames (count), dropped_frames (count)
+                    and fps
+        """
+        return self.frame_counter.get_statistics()
+
     def _do_polling(self, sleep_time):
         lima_tango_device = self.device
 
         while True:
-            data, width, height = poll_image(
-                lima_tango_device, self.video_mode, self._FORMATS
-            )
+            # the image is only read and emitted for a new frame
+            frame_number = lima_tango_device.video_last_image_counter
+
+            if frame_number != self.frame_counter.frame_number:
+                data, width, height = poll_image(
+                    lima_tango_device, self._video_mode, self._FORMATS
+                )
+
+                if self.frame_counter.update(frame_number):
+                    self._last_image = data, width, height
+                    self.emit("imageReceived", data, width, height, False)
 
-            self._last_image = data, width, heigh
-            self.emit("imageReceived", data, width, height, False)
             time.sleep(sleep_time)
 
     def connect_notify(self, signal):
@@ -139,9 +152,12 @@ class TangoLimaVideo(BaseHardwareObjects.Device):
         return self.device.image_height
 
     def take_snapshot(self, path=None, bw=False):
-        data, width, height = poll_image(self.device, self.video_mode, self._FORMATS)
+        data, width, height = poll_image(
+            self.device, self._video_mode, self._FORMATS
+        )
 
-        img = Image.frombytes("RGB", (width, height), data)
+        mode = self._FORMATS.get(self._video_mode, (None, None))[0] or "RGB"
+        img = Image.frombuffer(mode, (width, height), data, "raw", mode, 0, 1)
 
         if bw:
             img.convert("1")
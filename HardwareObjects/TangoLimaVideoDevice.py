@@ -68,6 +68,10 @@ import numpy as np
 
 import PyTango
 
+from HardwareRepository.HardwareObjects.abstract.AbstractVideoDevice import (
+    AbstractVideoDevice,
+)
+
 
 class TangoLimaVideoDevice(AbstractVideoDevice):
     """
@@ -114,12 +118,18 @@ class TangoLimaVideoDevice(AbstractVideoDevice):
     def get_image_dimensions(self):
         return [self.device.image_width, self.device.image_height]
 
+    def get_raw_image_size(self):
+        return [self.device.image_width, self.device.image_height]
+
+    def get_frame_number(self):
+        return self.device.video_last_image_counter
+
     def get_image(self):
         img_data = self.device.video_last_image
 
         if img_data[0] == "VIDEO_IMAGE":
-            raw_fmt = img_data[1][: self.header_size]
-            raw_buffer = np.fromstring(img_data[1][self.header_size :], np.uint16)
+            # view on the image data, after the header
+            raw_buffer = np.frombuffer(img_data[1], np.uint8, offset=self.header_size)
             _, ver, img_mode, frame_number, width, height, _, _, _, _ = struct.unpack(
                 self.header_fmt, img_data[1][: self.header_size]
             )
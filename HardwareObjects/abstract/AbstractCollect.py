@@ -36,6 +36,7 @@ from HardwareRepository.TaskUtils import task  # , cleanup_and_handle_error
 from HardwareRepository.BaseHardwareObjects import HardwareObject
 from HardwareRepository.ConvertUtils import string_types
 from HardwareRepository import HardwareRepository as HWR
+from HardwareRepository.HardwareObjects.lims_image_writer import get_image_writer
 
 from HardwareRepository.utils.dataobject import DataObject
 
@@ -503,9 +504,15 @@ class AbstractCollect(HardwareObject, object):
                     "Could not update data collection in LIMS"
                 )
 
-    def _store_image_in_lims(self, cp, frame_number, motor_position_id=None):
-        """
-        Descript. :
+    def _store_image_in_lims(
+        self, cp, frame_number, motor_position_id=None, wait=False
+    ):
+        """Register an image in LIMS
+
+        :param wait: store the image now, returning its id; the image is
+            queued and written in the background if False
+        :type wait: bool
+        :returns: the image id, if wait
         """
         if HWR.beamline.lims and not cp["in_interleave"]:
             file_location = cp["fileinfo"]["directory"]
@@ -539,8 +546,9 @@ class AbstractCollect(HardwareObject, object):
                 lims_image["jpegThumbnailFileFullPath"] = jpeg_thumbnail_full_path
             if motor_position_id:
                 lims_image["motorPositionId"] = motor_position_id
-            image_id = HWR.beamline.lims.store_image(lims_image)
-            return image_id
+            if wait:
+                return HWR.beamline.lims.store_image(lims_image)
+            get_image_writer(HWR.beamline.lims).store_image(lims_image)
 
     def _update_lims_with_workflow(self, cp, workflow_id, grid_snapshot_filename):
         """Updates collection with information about workflow
@@ -11,6 +11,7 @@ import gevent
 from HardwareRepository.TaskUtils import task, cleanup, error_cleanup
 
 from HardwareRepository import HardwareRepository as HWR
+from HardwareRepository.HardwareObjects.lims_image_writer import get_image_writer
 
 BeamlineControl = collections.namedtuple(
     "BeamlineControl",
@@ -59,6 +60,61 @@ BeamlineConfig = collections.namedtuple(
 )
 
 
+class CollectionContext(object):
+    """Slowly changing beamline parameters of a data collection, sampled when
+    first needed in a wedge, or again after a change signal, instead of once
+    per frame.
+    """
+
+    def __init__(self, collect):
+        self._collect = collect
+        self._snapshot = None
+        self._connections = []
+
+        # (hardware object, signal) invalidating the snapshot
+        for hwobj, signal in (
+            (HWR.beamline.flux, "valueChanged"),
+            (HWR.beamline.machine_info, "valueChanged"),
+            (HWR.beamline.machine_info, "machInfoChanged"),
+        ):
+            if hwobj is not None:
+                hwobj.connect(signal, self.invalidate)
+                self._connections.append((hwobj, signal))
+
+    def sample(self):
+        """Read the beamline parameters
+
+        Returns:
+            dict: the LIMS image parameters of the snapshot
+        """
+        flux = HWR.beamline.flux
+        self._snapshot = {
+            "measuredIntensity": flux.get_value() if flux is not None else None,
+            "synchrotronCurrent": self._collect.get_machine_current(),
+            "machineMessage": self._collect.get_machine_message(),
+            "temperature": self._collect.get_cryo_temperature(),
+        }
+        return self._snapshot
+
+    def invalidate(self, *args):
+        """Have the parameters read again when next needed"""
+        self._snapshot = None
+
+    def get_snapshot(self):
+        """
+        Returns:
+            dict: the last sampled parameters, not to be modified
+        """
+        if self._snapshot is None:
+            return self.sample()
+        return self._snapshot
+
+    def disconnect(self):
+        for hwobj, signal in self._connections:
+            hwobj.disconnect(signal, self.invalidate)
+        self._connections = []
+
+
 class AbstractMultiCollect(object):
     __metaclass__ = abc.ABCMeta
 
@@ -675,7 +731,8 @@ class AbstractMultiCollect(object):
         # 0: software binned, 1: unbinned, 2:hw binned
         # self.set_detector_mode(data_collect_parameters["detector_mode"])
 
-        with cleanup(self.data_collection_cleanup):
+        context = CollectionContext(self)
+        with cleanup(self.data_collection_cleanup, context.disconnect):
             if not self.safety_shutter_opened():
                 logging.getLogger("user_level_log").info("Opening safety shutter")
                 self.open_safety_shutter()
@@ -687,6 +744,9 @@ class AbstractMultiCollect(object):
             osc_range = oscillation_parameters["range"]
             exptime = oscillation_parameters["exposure_time"]
             npass = oscillation_parameters["number_of_passes"]
+            shutterless = data_collect_parameters.get("shutterless", True)
+            processing = data_collect_parameters.get("processing", False) == "True"
+            file_location = file_parameters["directory"]
 
             # update LIMS
             if HWR.beamline.lims:
@@ -754,7 +814,7 @@ class AbstractMultiCollect(object):
 
             # at this point input files should have been written
             # TODO aggree what parameters will be sent to this function
-            if data_collect_parameters.get("processing", False) == "True":
+            if processing:
                 self.trigger_auto_processing(
                     "before",
                     self.xds_directory,
@@ -787,6 +847,7 @@ class AbstractMultiCollect(object):
                         data_collect_parameters.get("comment", ""),
                     )
                     data_collect_parameters["dark"] = 0
+                    context.invalidate()
 
                     i = 0
                     j = wedge_size
@@ -803,15 +864,10 @@ class AbstractMultiCollect(object):
                         except Exception:
                             jpeg_full_path = None
                             jpeg_thumbnail_full_path = None
-                        file_location = file_parameters["directory"]
                         file_path = os.path.join(file_location, filename)
 
                         self.set_detector_filenames(
-                            frame,
-                            frame_start,
-                            str(file_path),
-                            data_collect_parameters.get("shutterless", True),
-                            wait=False,
+                            frame, frame_start, str(file_path), shutterless, wait=False
                         )
 
                         osc_start, osc_end = self.prepare_oscillation(
@@ -819,24 +875,21 @@ class AbstractMultiCollect(object):
                             osc_range,
                             exptime,
                             wedge_size,
-                            data_collect_parameters.get("shutterless", True),
+                            shutterless,
                             npass,
                             j == wedge_size,
                         )
 
                         with error_cleanup(self.reset_detector):
                             self.start_acquisition(
-                                exptime,
-                                npass,
-                                j == wedge_size,
-                                data_collect_parameters.get("shutterless", True),
+                                exptime, npass, j == wedge_size, shutterless
                             )
                             self.do_oscillation(
                                 osc_start,
                                 osc_end,
                                 exptime,
                                 wedge_size,
-                                data_collect_parameters.get("shutterless", True),
+                                shutterless,
                                 npass,
                                 j == wedge_size,
                             )
@@ -851,11 +904,8 @@ class AbstractMultiCollect(object):
                                     "fileName": filename,
                                     "fileLocation": file_location,
                                     "imageNumber": frame,
-                                    "measuredIntensity": HWR.beamline.flux.get_value(),
-                                    "synchrotronCurrent": self.get_machine_current(),
-                                    "machineMessage": self.get_machine_message(),
-                                    "temperature": self.get_cryo_temperature(),
                                 }
+                                lims_image.update(context.get_snapshot())
 
                                 if archive_directory:
                                     lims_image["jpegFileFullPath"] = jpeg_full_path
@@ -863,12 +913,10 @@ class AbstractMultiCollect(object):
                                         "jpegThumbnailFileFullPath"
                                     ] = jpeg_thumbnail_full_path
 
-                                try:
-                                    HWR.beamline.lims.store_image(lims_image)
-                                except Exception:
-                                    logging.getLogger("HWR").exception(
-                                        "Could not store store image in LIMS"
-                                    )
+                                # written in the background, in batches
+                                get_image_writer(HWR.beamline.lims).store_image(
+                                    lims_image
+                                )
 
                                 self.generate_image_jpeg(
                                     str(file_path),
@@ -877,7 +925,7 @@ class AbstractMultiCollect(object):
                                     wait=False,
                                 )
 
-                        if data_collect_parameters.get("processing", False) == "True":
+                        if processing:
                             self.trigger_auto_processing(
                                 "image",
                                 self.xds_directory,
@@ -33,6 +33,7 @@ import gevent
 
 import SimpleHTML
 from HardwareRepository.BaseHardwareObjects import HardwareObject
+from HardwareRepository.HardwareObjects import xsdata_bindings
 from HardwareRepository import HardwareRepository as HWR
 
 
@@ -88,6 +89,15 @@ class AbstractOnlineProcessing(HardwareObject):
         self.current_grid_index = None
         self.grid_properties = []
 
+        # Precomputed (col, row) of each image of the grid, and incremental
+        # alignment state (see init_alignment)
+        self.grid_index = None
+        self.grid_cols = None
+        self.grid_rows = None
+        self.grid_valid = None
+        self.best_indexes = None
+        self.score_sums = None
+
     def init(self):
         self.done_event = gevent.event.Event()
         self.ssx_setup = self.get_object_by_role("ssx_setup")
@@ -100,6 +110,11 @@ class AbstractOnlineProcessing(HardwareObject):
         self.kill_command = str(self.get_property("kill_command"))
         self.interpolate_results = self.get_property("interpolate_results")
 
+        # "stream": parse the XSData results without a DOM tree
+        xsdata_parse_backend = self.get_property("xsdata_parse_backend")
+        if xsdata_parse_backend is not None:
+            xsdata_bindings.set_parse_backend(xsdata_parse_backend)
+
     def get_result_types(self):
         return self.result_types
 
@@ -282,6 +297,8 @@ class AbstractOnlineProcessing(HardwareObject):
                     result_type["key"]
                 ].reshape(self.params_dict["steps_x"], self.params_dict["steps_y"])
 
+        self.init_alignment()
+
         # if not self.data_collection.is_mesh():
         #    self.results_raw["x_array"] = np.linspace(
         #        0, images_num, images_num, dtype=np.int32
@@ -742,32 +759,72 @@ class AbstractOnlineProcessing(HardwareObject):
             )
         # ---------------------------------------------------------------------
 
+    def init_alignment(self):
+        """Precomputes the (col, row) of each image in the grid (once per
+           grid) and resets the incremental alignment state
+        """
+        self.best_indexes = np.array([], dtype=int)
+        # Sum of scores, and sums of scores weighted by col and by row
+        self.score_sums = np.zeros(3)
+
+        if not self.grid:
+            return
+
+        first_image_num = self.params_dict["first_image_num"]
+        images_num = self.params_dict["images_num"]
+        index_key = (first_image_num, images_num)
+        if self.grid_index != (self.grid, index_key):
+            col_row = np.array(
+                [
+                    self.grid.get_col_row_from_image_serial(index + first_image_num)
+                    for index in range(images_num)
+                ],
+                dtype=int,
+            ).reshape(-1, 2)
+            self.grid_cols = col_row[:, 0]
+            self.grid_rows = col_row[:, 1]
+            self.grid_index = (self.grid, index_key)
+
+        self.grid_valid = (self.grid_cols < self.params_dict["steps_x"]) & (
+            self.grid_rows < self.params_dict["steps_y"]
+        )
+
     def align_processing_results(self, start_index, end_index):
-        """Realigns all results. Each results (one dimensional numpy array)
-           is converted to 2d numpy array according to diffractometer geometry.
-           Function also extracts 10 (if they exist) best positions
+        """Aligns the results of images start_index to end_index. Each
+           results (one dimensional numpy array) is converted to 2d numpy
+           array according to diffractometer geometry.
+           Function also extracts 10 (if they exist) best positions.
+           For grids, only the given images are processed.
         """
         # Each result array is realigned
+        indexes = np.arange(start_index, end_index + 1)
+
+        if self.grid:
+            valid = self.grid_valid[indexes]
+            indexes = indexes[valid]
+            cols = self.grid_cols[indexes]
+            rows = self.grid_rows[indexes]
+
+            score_delta = self.results_raw["score"][indexes] - self.results_aligned[
+                "score"
+            ][cols, rows]
+            self.score_sums += (
+                score_delta.sum(),
+                (score_delta * cols).sum(),
+                (score_delta * rows).sum(),
+            )
 
         for score_key in self.results_raw.keys():
             if (
                 self.grid
                 and self.results_raw[score_key].size == self.params_dict["images_num"]
             ):
-                for cell_index in range(start_index, end_index + 1):
-                    col, row = self.grid.get_col_row_from_image_serial(
-                        cell_index + self.params_dict["first_image_num"]
-                    )
-                    if (
-                        col < self.results_aligned[score_key].shape[0]
-                        and row < self.results_aligned[score_key].shape[1]
-                    ):
-                        self.results_aligned[score_key][col][row] = self.results_raw[
-                            score_key
-                        ][cell_index]
+                self.results_aligned[score_key][cols, rows] = self.results_raw[
+                    score_key
+                ][indexes]
             else:
                 self.results_aligned[score_key] = self.results_raw[score_key][
-                    :: self.params_dict["images_num"] / self.plot_points_num
+                    :: int(self.params_dict["images_num"] / self.plot_points_num)
                 ]
                 if self.interpolate_results:
                     x_array = np.linspace(
@@ -783,9 +840,10 @@ class AbstractOnlineProcessing(HardwareObject):
 
         if self.grid:
             self.grid.set_score(self.results_raw["spots_num"])
-            (center_x, center_y) = ndimage.measurements.center_of_mass(
-                self.results_aligned["score"]
-            )
+            # center of mass of the aligned scores
+            with np.errstate(divide="ignore", invalid="ignore"):
+                center_x = self.score_sums[1] / self.score_sums[0]
+                center_y = self.score_sums[2] / self.score_sums[0]
             self.results_aligned["center_mass"] = self.grid.get_motor_pos_from_col_row(
                 center_x, center_y
             )
@@ -806,51 +864,52 @@ class AbstractOnlineProcessing(HardwareObject):
             else:
                 self.results_aligned["center_mass"] = centred_positions[0]
 
-        # Best positions are extracted
-        best_positions_list = []
+        # Best positions are extracted from the previous best positions
+        # and the new images
+        candidates = np.union1d(
+            self.best_indexes, np.arange(start_index, end_index + 1)
+        )
+        scores = self.results_raw["score"][candidates]
+        self.best_indexes = candidates[np.argsort(-scores, kind="stable")[:10]]
 
-        index_arr = (-self.results_raw["score"]).argsort()[:10]
-        if len(index_arr) > 0:
-            for index in index_arr:
-                if self.results_raw["score"][index] > 0:
-                    best_position = {}
-                    best_position["index"] = index
-                    best_position["index_serial"] = (
-                        self.params_dict["first_image_num"] + index
-                    )
-                    best_position["score"] = self.results_raw["score"][index]
-                    best_position["spots_num"] = self.results_raw["spots_num"][index]
-                    best_position["spots_resolution"] = self.results_raw[
-                        "spots_resolution"
-                    ][index]
-                    best_position["filename"] = os.path.basename(
-                        self.params_dict["template"]
-                        % (
-                            self.params_dict["run_number"],
-                            self.params_dict["first_image_num"] + index,
-                        )
+        best_positions_list = []
+        for index in self.best_indexes:
+            if self.results_raw["score"][index] > 0:
+                best_position = {}
+                best_position["index"] = index
+                best_position["index_serial"] = (
+                    self.params_dict["first_image_num"] + index
+                )
+                best_position["score"] = self.results_raw["score"][index]
+                best_position["spots_num"] = self.results_raw["spots_num"][index]
+                best_position["spots_resolution"] = self.results_raw[
+                    "spots_resolution"
+                ][index]
+                best_position["filename"] = os.path.basename(
+                    self.params_dict["template"]
+                    % (
+                        self.params_dict["run_number"],
+                        self.params_dict["first_image_num"] + index,
                     )
+                )
 
+                cpos = None
+                if self.grid:
+                    col = self.grid_cols[index] + 0.5
+                    row = self.params_dict["steps_y"] - self.grid_rows[index] - 0.5
+                    cpos = self.grid.get_motor_pos_from_col_row(col, row)
+                else:
+                    col = index
+                    row = 0
                     cpos = None
-                    if self.grid:
-                        col, row = self.grid.get_col_row_from_image_serial(
-                            index + self.params_dict["first_image_num"]
-                        )
-                        col += 0.5
-                        row = self.params_dict["steps_y"] - row - 0.5
-                        cpos = self.grid.get_motor_pos_from_col_row(col, row)
-                    else:
-                        col = index
-                        row = 0
-                        cpos = None
-                        # TODO make this nicer
-                        # num_images = self.data_collection.acquisitions[0].acquisition_parameters.num_images - 1
-                        # (point_one, point_two) = self.data_collection.get_centred_positions()
-                        # cpos = HWR.beamline.diffractometer.get_point_from_line(point_one, point_two, index, num_images)
-                    best_position["col"] = col
-                    best_position["row"] = row
-                    best_position["cpos"] = cpos
-                    best_positions_list.append(best_position)
+                    # TODO make this nicer
+                    # num_images = self.data_collection.acquisitions[0].acquisition_parameters.num_images - 1
+                    # (point_one, point_two) = self.data_collection.get_centred_positions()
+                    # cpos = HWR.beamline.diffractometer.get_point_from_line(point_one, point_two, index, num_images)
+                best_position["col"] = col
+                best_position["row"] = row
+                best_position["cpos"] = cpos
+                best_positions_list.append(best_position)
 
         self.results_aligned["best_positions"] = best_positions_list
 
@@ -32,6 +32,7 @@ the base class for classes providing access to Video in MXCuBE
 
 from __future__ import print_function
 import abc
+import collections
 import os
 import sys
 import time
@@ -60,6 +61,49 @@ else:
     from PIL import Image
 
 
+class FrameCounter(object):
+    """
+    Counts the frames received from a camera, the frames dropped (gaps in
+    the frame numbers) and the frame rate over the last frames
+    """
+
+    def __init__(self, window=50):
+        self.frame_number = None
+        self.frames_count = 0
+        self.dropped_frames_count = 0
+        self._frame_times = collections.deque(maxlen=window)
+
+    def update(self, frame_number):
+        """
+        Registers the current frame number of the camera (None if not known)
+        Returns True if it is a new frame
+        """
+        if frame_number is not None:
+            if frame_number == self.frame_number:
+                return False
+            if self.frame_number is not None and frame_number > self.frame_number:
+                self.dropped_frames_count += frame_number - self.frame_number - 1
+
+        self.frame_number = frame_number
+        self.frames_count += 1
+        self._frame_times.append(time.time())
+        return True
+
+    def get_frame_rate(self):
+        if len(self._frame_times) < 2:
+            return 0.0
+        elapsed = self._frame_times[-1] - self._frame_times[0]
+        return (len(self._frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def get_statistics(self):
+        return {
+            "frame_number": self.frame_number,
+            "frames": self.frames_count,
+            "dropped_frames": self.dropped_frames_count,
+            "fps": self.get_frame_rate(),
+        }
+
+
 class AbstractVideoDevice(Device):
 
     default_cam_encoding = "yuv422p"
@@ -87,6 +131,11 @@ class AbstractVideoDevice(Device):
         self.default_poll_interval = None
 
         self.decoder = None
+        self.frame_counter = FrameCounter()
+
+        # Preallocated buffers for the intermediate decoding steps. The
+        # decoded images are new arrays, owned by the consumers
+        self._decode_buffers = {}
 
     def init(self):
         self.cam_name = self.get_property("name", "camera")
@@ -236,33 +285,71 @@ class AbstractVideoDevice(Device):
     def get_cam_type(self):
         return self.cam_type
 
+    def get_frame_number(self):
+        """
+        Returns the number of the last frame of the camera, None if not
+        known (then every polled image is decoded). To be overloaded
+        """
+        return None
+
+    def is_new_frame(self):
+        """
+        Returns False if the last frame of the camera was already decoded,
+        and updates the frame statistics
+        """
+        return self.frame_counter.update(self.get_frame_number())
+
+    def get_frame_statistics(self):
+        """
+        Returns:
+            (dict): frame_number, frames (count), dropped_frames (count)
+                    and fps
+        """
+        return self.frame_counter.get_statistics()
+
+    def get_decode_buffer(self, name, shape, dtype=np.uint8):
+        """
+        Returns the preallocated buffer <name> for an intermediate decoding
+        step. It is overwritten by the next decoding and must not be emitted
+        """
+        buffer = self._decode_buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype)
+            self._decode_buffers[name] = buffer
+        return buffer
+
+    def _raw_image(self, raw_buffer, dtype, shape):
+        # view (no copy) of the raw buffer, as an array of the given shape
+        image = np.frombuffer(raw_buffer, dtype=dtype)
+        return image[: int(np.prod(shape))].reshape(shape)
+
     def y8_2_rgb(self, raw_buffer):
-        image = np.fromstring(raw_buffer, dtype=np.uint8)
-        raw_dims = self.get_raw_image_size()
-        image.resize(raw_dims[1], raw_dims[0], 1)
+        width, height = self.get_raw_image_size()
+        image = self._raw_image(raw_buffer, np.uint8, (height, width))
         return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
 
     def y16_2_rgb(self, raw_buffer):
-        image = np.fromstring(raw_buffer, dtype=np.uint8)
-        raw_dims = self.get_raw_image_size()
-        np.resize(image, (raw_dims[1], raw_dims[0], 2))
-        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        width, height = self.get_raw_image_size()
+        image = self._raw_image(raw_buffer, np.uint16, (height, width))
+        gray_buffer = self.get_decode_buffer("gray", (height, width))
+        # 16 bit values => keep the 8 most significant bits
+        np.right_shift(image, 8, out=gray_buffer, casting="unsafe")
+        return cv2.cvtColor(gray_buffer, cv2.COLOR_GRAY2RGB)
 
     def yuv_2_rgb(self, raw_buffer):
-        image = np.fromstring(raw_buffer, dtype=np.uint8)
-        raw_dims = self.get_raw_image_size()
-        image.resize(raw_dims[1], raw_dims[0], 2)
+        width, height = self.get_raw_image_size()
+        image = self._raw_image(raw_buffer, np.uint8, (height, width, 2))
         return cv2.cvtColor(image, cv2.COLOR_YUV2RGB_UYVY)
 
     def bayer_rg16_2_rgb(self, raw_buffer):
-        image = np.fromstring(raw_buffer, dtype=np.uint16)
-        raw_dims = self.get_raw_image_size()
-        image.resize(raw_dims[1], raw_dims[0])
-        out_buffer = cv2.cvtColor(image, cv2.COLOR_BayerRG2BGR)
-        if out_buffer.ndim == 3 and out_buffer.itemsize > 1:
-            # decoding bayer16 gives 12 bit values => scale to 8 bit
-            out_buffer = np.right_shift(out_buffer, 4).astype(np.uint8)
-        return out_buffer
+        width, height = self.get_raw_image_size()
+        image = self._raw_image(raw_buffer, np.uint16, (height, width))
+        bgr_buffer = self.get_decode_buffer("bgr16", (height, width, 3), np.uint16)
+        cv2.cvtColor(image, cv2.COLOR_BayerRG2BGR, dst=bgr_buffer)
+        # decoding bayer16 gives 12 bit values => scale to 8 bit
+        image = np.empty((height, width, 3), np.uint8)
+        np.right_shift(bgr_buffer, 4, out=image, casting="unsafe")
+        return image
 
     def save_snapshot(self, filename, image_type="PNG"):
         if USEQT:
@@ -353,10 +440,12 @@ class AbstractVideoDevice(Device):
         Descript. :
         """
         while self.get_video_live() is True:
-            if USEQT:
-                self.get_new_image()
-            else:
-                self.get_jpg_image()
+            # unchanged frames are not decoded again
+            if self.is_new_frame():
+                if USEQT:
+                    self.get_new_image()
+                else:
+                    self.get_jpg_image()
             time.sleep(sleep_time)
 
     def connect_notify(self, signal):
@@ -0,0 +1,284 @@
+# encoding: utf-8
+#
+#  Project: MXCuBE
+#  https://github.com/mxcube
+#
+#  This file is part of MXCuBE software.
+#
+#  MXCuBE is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  MXCuBE is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with MXCuBE. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Background registration of the collected images in LIMS
+
+The image records are queued and sent by a writer greenlet, in batches, so
+that a data collection never waits for LIMS. Failed batches are retried with
+an increasing delay. When the queue is full (e.g. LIMS is unreachable), the
+records are appended to a spool file, and sent when LIMS is back.
+
+Connection errors (EnvironmentError, e.g. URLError) are retried until LIMS is
+back. A record failing with any other error (e.g. a WebFault for invalid
+data) is dropped, and logged, after max_attempts writes.
+"""
+
+import collections
+import json
+import logging
+import os
+
+import gevent
+import gevent.event
+
+__copyright__ = """ Copyright © 2010 - 2020 by MXCuBE Collaboration """
+__license__ = "LGPLv3+"
+
+
+class LimsImageWriter(object):
+    """Queue of image records, written to LIMS by a background greenlet"""
+
+    def __init__(
+        self,
+        lims,
+        queue_size=1000,
+        batch_size=50,
+        spool_file=None,
+        retry_delay=1.0,
+        max_retry_delay=60.0,
+        max_attempts=3,
+    ):
+        """
+        Args:
+            lims (HardwareObject): LIMS client; its store_images(image_dicts)
+                method is used if it has one, store_image(image_dict) if not
+            queue_size (int): maximum number of records kept in memory
+            batch_size (int): maximum number of records per write
+            spool_file (str): file keeping the records when the queue is full;
+                the oldest records are dropped if None
+            retry_delay (float): delay before the first retry [s]
+            max_retry_delay (float): maximum delay between retries [s]
+            max_attempts (int): writes of a record failing with an error
+                other than a connection error, before it is dropped
+        """
+        self.lims = lims
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.spool_file = spool_file
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+
+        self.stored = 0
+        self.failures = 0
+        self.dropped = 0
+        self.rejected = 0
+
+        # first record of the failed batch, and its failed writes
+        self._failed_record = None
+        self._failed_attempts = 0
+
+        self._queue = collections.deque()
+        self._queue_event = gevent.event.Event()
+        self._idle_event = gevent.event.Event()
+        self._idle_event.set()
+        self._writer = None
+
+        if spool_file is not None and os.path.exists(spool_file):
+            # records left by a previous run
+            self._queue_event.set()
+            self._idle_event.clear()
+            self._start()
+
+    def store_image(self, image_dict):
+        """Queue an image record; never waits for LIMS
+
+        Args:
+            image_dict (dict): image parameters, as for lims.store_image
+        """
+        if len(self._queue) >= self.queue_size:
+            if self.spool_file is not None:
+                records = list(self._queue)
+                self._queue.clear()
+                self._spool(records)
+            else:
+                self._queue.popleft()
+                self.dropped += 1
+                logging.getLogger("HWR").error(
+                    "LIMS image queue full, dropping an image record"
+                )
+        self._queue.append(dict(image_dict))
+        self._idle_event.clear()
+        self._queue_event.set()
+        self._start()
+
+    def flush(self, timeout=None):
+        """Wait until all queued records are written
+
+        Args:
+            timeout (float): maximum waiting time [s]; no limit if None
+
+        Returns:
+            bool: True if all records were written
+        """
+        return self._idle_event.wait(timeout)
+
+    def get_statistics(self):
+        """
+        Returns:
+            dict: queued, stored, failures (failed writes), dropped (queue
+                full, no spool file) and rejected (failing records) counts
+        """
+        return {
+            "queued": len(self._queue),
+            "stored": self.stored,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
+
+    def _start(self):
+        if self._writer is None or self._writer.dead:
+            self._writer = gevent.spawn(self._run)
+
+    def _run(self):
+        retry_delay = self.retry_delay
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                self._queue_event.clear()
+                self._idle_event.set()
+                self._queue_event.wait()
+                continue
+
+            try:
+                self._write(batch)
+            except EnvironmentError:
+                # LIMS unreachable: retried until it is back
+                self._retry(batch, retry_delay)
+                retry_delay = min(2 * retry_delay, self.max_retry_delay)
+            except Exception:
+                # the first record of batch is the failing one
+                if batch[0] is not self._failed_record:
+                    self._failed_record = batch[0]
+                    self._failed_attempts = 0
+                self._failed_attempts += 1
+                if self._failed_attempts >= self.max_attempts:
+                    self.failures += 1
+                    self.rejected += 1
+                    logging.getLogger("HWR").exception(
+                        "LIMS rejected image record %s, dropping it", batch[0]
+                    )
+                    self._queue.extendleft(reversed(batch[1:]))
+                else:
+                    self._retry(batch, retry_delay)
+                    retry_delay = min(2 * retry_delay, self.max_retry_delay)
+            else:
+                retry_delay = self.retry_delay
+
+    def _retry(self, batch, retry_delay):
+        self.failures += 1
+        logging.getLogger("HWR").warning(
+            "Could not store %d images in LIMS, retrying in %g s",
+            len(batch),
+            retry_delay,
+            exc_info=True,
+        )
+        # not written: first again
+        self._queue.extendleft(reversed(batch))
+        gevent.sleep(retry_delay)
+
+    def _next_batch(self):
+        if not self._queue:
+            self._unspool()
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _write(self, batch):
+        # the written records are removed from batch
+        store_images = getattr(self.lims, "store_images", None)
+        if store_images is not None:
+            count = len(batch)
+            try:
+                store_images(batch)
+            finally:
+                self.stored += count - len(batch)
+        else:
+            while batch:
+                self.lims.store_image(batch[0])
+                batch.pop(0)
+                self.stored += 1
+
+    def _spool(self, records):
+        try:
+            with open(self.spool_file, "a") as spool:
+                for record in records:
+                    spool.write(json.dumps(record) + "\n")
+        except Exception:
+            self.dropped += len(records)
+            logging.getLogger("HWR").exception(
+                "Cannot spool %d LIMS image records to %s",
+                len(records),
+                self.spool_file,
+            )
+
+    def _unspool(self):
+        """Move the spooled records back to the queue, at most queue_size"""
+        if self.spool_file is None or not os.path.exists(self.spool_file):
+            return
+        try:
+            with open(self.spool_file) as spool:
+                lines = spool.readlines()
+            remaining = lines[self.queue_size :]
+            if remaining:
+                with open(self.spool_file, "w") as spool:
+                    spool.writelines(remaining)
+            else:
+                os.remove(self.spool_file)
+        except Exception:
+            logging.getLogger("HWR").exception(
+                "Cannot read LIMS image spool file %s", self.spool_file
+            )
+            return
+
+        for line in lines[: self.queue_size]:
+            try:
+                self._queue.append(json.loads(line))
+            except ValueError:
+                self.dropped += 1
+
+
+# LIMS client: its image writer
+_image_writers = {}
+
+
+def get_image_writer(lims):
+    """The image writer of a LIMS client, configured by its properties
+    image_queue_size, image_batch_size and image_spool_file
+
+    Args:
+        lims (HardwareObject): LIMS client
+
+    Returns:
+        LimsImageWriter
+    """
+    try:
+        return _image_writers[lims]
+    except KeyError:
+        writer = _image_writers[lims] = LimsImageWriter(
+            lims,
+            queue_size=int(lims.get_property("image_queue_size", 1000)),
+            batch_size=int(lims.get_property("image_batch_size", 50)),
+            spool_file=lims.get_property("image_spool_file"),
+        )
+        return writer
@@ -20,9 +20,11 @@
 from HardwareRepository.HardwareObjects import edna_test_data
 from HardwareRepository.HardwareObjects.EDNACharacterisation import EDNACharacterisation
 
-from HardwareRepository.HardwareObjects.XSDataMXCuBEv1_3 import XSDataResultMXCuBE
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 
 
+xsdata = XSDataBindings("XSDataMXCuBEv1_3")
+
 __credits__ = ["MXCuBE collaboration"]
 __license__ = "LGPLv3"
 
@@ -35,7 +37,7 @@ class EDNACharacterisationMockup(EDNACharacterisation):
         return
 
     def characterise(self, edna_input):
-        return XSDataResultMXCuBE.parseString(edna_test_data.EDNA_RESULT_DATA)
+        return xsdata.XSDataResultMXCuBE.parseString(edna_test_data.EDNA_RESULT_DATA)
 
     def is_running(self):
         return
@@ -339,6 +339,21 @@ class ISPyBClientMockup(HardwareObject):
         """
         pass
 
+    def store_images(self, image_dicts):
+        """
+        Stores several images, in order. The stored images are removed from
+        <image_dicts>, so that a failed call can be retried with the others.
+
+        :param image_dicts: dictonaries with image pramaters.
+        :type image_dicts: list
+
+        :returns: the image ids
+        :rtype: list
+        """
+        image_ids = [None] * len(image_dicts)
+        del image_dicts[:]
+        return image_ids
+
     def __find_sample(self, sample_ref_list, code=None, location=None):
         """
         Returns the sample with the matching "search criteria" <code> and/or
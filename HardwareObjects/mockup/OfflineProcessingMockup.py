@@ -24,15 +24,11 @@ import subprocess
 import gevent
 
 from HardwareRepository.BaseHardwareObjects import HardwareObject
-from HardwareRepository.HardwareObjects.XSDataCommon import (
-    XSDataDouble,
-    XSDataFile,
-    XSDataInteger,
-    XSDataString,
-)
-from HardwareRepository.HardwareObjects.XSDataAutoprocv1_0 import XSDataAutoprocInput
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
 
 
+xsdata = XSDataBindings("XSDataCommon", "XSDataAutoprocv1_0")
+
 __credits__ = ["EMBL Hamburg"]
 __license__ = "LGPLv3+"
 __category__ = "General"
@@ -157,27 +153,29 @@ class OfflineProcessingMockup(HardwareObject):
             autoproc_path, "edna-autoproc-results-%s.xml" % file_name_timestamp
         )
 
-        autoproc_input = XSDataAutoprocInput()
-        autoproc_xds_file = XSDataFile()
-        autoproc_xds_file.setPath(XSDataString(autoproc_xds_filename))
+        autoproc_input = xsdata.XSDataAutoprocInput()
+        autoproc_xds_file = xsdata.XSDataFile()
+        autoproc_xds_file.setPath(xsdata.XSDataString(autoproc_xds_filename))
         autoproc_input.setInput_file(autoproc_xds_file)
 
-        autoproc_output_file = XSDataFile()
-        autoproc_output_file.setPath(XSDataString(autoproc_output_file_name))
+        autoproc_output_file = xsdata.XSDataFile()
+        autoproc_output_file.setPath(xsdata.XSDataString(autoproc_output_file_name))
         autoproc_input.setOutput_file(autoproc_output_file)
 
-        autoproc_input.setData_collection_id(XSDataInteger(params.get("collection_id")))
+        autoproc_input.setData_collection_id(
+            xsdata.XSDataInteger(params.get("collection_id"))
+        )
         residues_num = float(params.get("residues", 0))
         if residues_num != 0:
-            autoproc_input.setNres(XSDataDouble(residues_num))
+            autoproc_input.setNres(xsdata.XSDataDouble(residues_num))
         space_group = params.get("sample_reference").get("spacegroup", "")
         if len(space_group) > 0:
-            autoproc_input.setSpacegroup(XSDataString(space_group))
+            autoproc_input.setSpacegroup(xsdata.XSDataString(space_group))
         unit_cell = params.get("sample_reference").get("cell", "")
         if len(unit_cell) > 0:
-            autoproc_input.setUnit_cell(XSDataString(unit_cell))
+            autoproc_input.setUnit_cell(xsdata.XSDataString(unit_cell))
 
-        autoproc_input.setCc_half_cutoff(XSDataDouble(18.0))
+        autoproc_input.setCc_half_cutoff(xsdata.XSDataDouble(18.0))
 
         # Maybe we have to check if directory is there.
         # Maybe create dir with mxcube
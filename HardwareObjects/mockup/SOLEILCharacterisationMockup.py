@@ -6,7 +6,10 @@ from HardwareRepository.HardwareObjects.abstract.AbstractCharacterisation import
     AbstractCharacterisation,
 )
 
-from HardwareRepository.HardwareObjects.XSDataMXCuBEv1_3 import XSDataResultMXCuBE
+from HardwareRepository.HardwareObjects.xsdata_bindings import XSDataBindings
+
+
+xsdata = XSDataBindings("XSDataMXCuBEv1_3")
 
 
 class SOLEILEDNACharacterisationMockup(AbstractCharacterisation):
@@ -34,7 +37,9 @@ class SOLEILEDNACharacterisationMockup(AbstractCharacterisation):
         logging.getLogger("queue_exec").info(msg)
 
         self.processing_done_event.set()
-        self.result = XSDataResultMXCuBE.parseString(edna_test_data.EDNA_RESULT_DATA)
+        self.result = xsdata.XSDataResultMXCuBE.parseString(
+            edna_test_data.EDNA_RESULT_DATA
+        )
 
         return self.result
 
@@ -41,12 +41,40 @@ __copyright__ = """ Copyright © 2010 - 2020 by MXCuBE Collaboration """
 __license__ = "LGPLv3+"
 
 
-class TaskNode(object):
+class ChangeNotifier(object):
+    """
+    Calls the change callback, if any, with the object when one of its
+    INDEXED_ATTRIBUTES is set (used by the QueueModel indexes). The
+    callback is not copied or pickled with the object.
+    """
+
+    INDEXED_ATTRIBUTES = ()
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self.INDEXED_ATTRIBUTES:
+            callback = self.__dict__.get("_change_callback")
+            if callback is not None:
+                callback(self)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_change_callback", None)
+        return state
+
+    def set_change_callback(self, callback):
+        object.__setattr__(self, "_change_callback", callback)
+
+
+class TaskNode(ChangeNotifier):
     """
     Objects that inherit TaskNode can be added to and handled by
     the QueueModel object.
     """
 
+    # set when the node holds its path template itself
+    INDEXED_ATTRIBUTES = ("path_template",)
+
     def __init__(self):
         object.__init__(self)
 
@@ -184,6 +212,13 @@ class TaskNode(object):
     def get_path_template(self):
         return None
 
+    def get_path_template_owner(self):
+        """
+        :returns: The object that holds the path template of
+                  get_path_template() as its path_template attribute
+        """
+        return self
+
     def get_files_to_be_written(self):
         return []
 
@@ -673,6 +708,9 @@ class DataCollection(TaskNode):
     def get_path_template(self):
         return self.acquisitions[0].path_template
 
+    def get_path_template_owner(self):
+        return self.acquisitions[0]
+
     def get_files_to_be_written(self):
         path_template = self.acquisitions[0].path_template
         file_locations = path_template.get_files_to_be_written()
@@ -855,6 +893,9 @@ class Characterisation(TaskNode):
     def get_path_template(self):
         return self.reference_image_collection.acquisitions[0].path_template
 
+    def get_path_template_owner(self):
+        return self.reference_image_collection.acquisitions[0]
+
     def get_files_to_be_written(self):
         path_template = self.reference_image_collection.acquisitions[0].path_template
 
@@ -1225,6 +1266,9 @@ class XrayCentering(TaskNode):
     def get_path_template(self):
         return self.reference_image_collection.acquisitions[0].path_template
 
+    def get_path_template_owner(self):
+        return self.reference_image_collection.acquisitions[0]
+
     def get_files_to_be_written(self):
         path_template = self.reference_image_collection.acquisitions[0].path_template
         file_locations = path_template.get_files_to_be_written()
@@ -1320,7 +1364,9 @@ class OpticalCentring(TaskNode):
         return self._name
 
 
-class Acquisition(object):
+class Acquisition(ChangeNotifier):
+    INDEXED_ATTRIBUTES = ("path_template",)
+
     def __init__(self):
         object.__init__(self)
 
@@ -1355,7 +1401,21 @@ class Acquisition(object):
         return paths
 
 
-class PathTemplate(object):
+class PathTemplate(ChangeNotifier):
+    # Attributes that define the (directory, prefix) and run of the files
+    INDEXED_ATTRIBUTES = (
+        "directory",
+        "base_prefix",
+        "mad_prefix",
+        "reference_image_prefix",
+        "wedge_prefix",
+        "run_number",
+    )
+
+    def get_key(self):
+        """(directory, prefix) shared by path templates that are equal"""
+        return (os.path.normpath(self.directory), self.get_prefix())
+
     @staticmethod
     def set_data_base_path(base_directory):
         # os.path.abspath returns path without trailing slash, if any
@@ -1527,14 +1587,7 @@ class PathTemplate(object):
         return archive_directory
 
     def __eq__(self, path_template):
-        result = False
-        lh_dir = os.path.normpath(self.directory)
-        rh_dir = os.path.normpath(path_template.directory)
-
-        if self.get_prefix() == path_template.get_prefix() and lh_dir == rh_dir:
-            result = True
-
-        return result
+        return self.get_key() == path_template.get_key()
 
     def intersection(self, rh_pt):
         result = False
@@ -2048,6 +2101,9 @@ class XrayImaging(TaskNode):
     def get_path_template(self):
         return self.acquisitions[0].path_template
 
+    def get_path_template_owner(self):
+        return self.acquisitions[0]
+
     def get_files_to_be_written(self):
         return self.acquisitions[0].path_template.get_files_to_be_written()
 
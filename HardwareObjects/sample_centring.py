@@ -1,4 +1,3 @@
-from scipy import optimize
 import numpy
 import gevent.event
 import math
@@ -18,15 +17,82 @@ except ImportError:
         )
 
 
+def fit_sinusoid(z, phis):
+    """
+    Linear least-squares fit of z = a * sin(phi) + b * cos(phi) + c;
+    batches of fits are done at once
+    Args:
+        z (array): (..., N) positions
+        phis (array): (..., N) or (N,) angles [rad]
+    Returns:
+        (tuple): (..., 3) coefficients (a, b, c) and their standard errors
+                 (nan with less than 4 points)
+    """
+    z = numpy.asarray(z, dtype=float)
+    phis = numpy.broadcast_to(numpy.asarray(phis, dtype=float), z.shape)
+    design = numpy.stack((numpy.sin(phis), numpy.cos(phis), numpy.ones_like(phis)), -1)
+    normal_matrix = numpy.einsum("...ni,...nj->...ij", design, design)
+    inverse = numpy.linalg.inv(normal_matrix)
+    coefficients = numpy.einsum(
+        "...ij,...nj,...n->...i", inverse, design, z
+    )
+
+    residuals = z - numpy.einsum("...ni,...i->...n", design, coefficients)
+    dof = z.shape[-1] - 3
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        variance = (residuals ** 2).sum(-1) / dof if dof > 0 else numpy.nan
+    errors = numpy.sqrt(
+        numpy.diagonal(inverse, axis1=-2, axis2=-1) * numpy.expand_dims(variance, -1)
+    )
+    return coefficients, errors
+
+
 def multiPointCentre(z, phis):
-    def fitfunc(p, x):
-        return p[0] * numpy.sin(x + p[1]) + p[2]
+    """Returns (r, a, offset) of z = r * sin(phi + a) + offset"""
+    (sin_coef, cos_coef, offset), _ = fit_sinusoid(z, phis)
+    return numpy.array(
+        [numpy.hypot(sin_coef, cos_coef), numpy.arctan2(cos_coef, sin_coef), offset]
+    )
+
+
+def solve_centring(X, Y, phi_positions, chi_angle=0):
+    """
+    Position of the sample relative to the rotation axis, from the sample
+    positions seen at several phi angles; batches of click sets are solved
+    at once
+    Args:
+        X, Y (array): (..., N) horizontal and vertical positions [mm]
+        phi_positions (array): (..., N) or (N,) phi angles [rad]
+        chi_angle (float): chi [deg]
+    Returns:
+        (dict): dx, dy (sampx, sampy offset of the sample), horizontal,
+                vertical (position of the rotation axis in the image [mm]),
+                and their standard errors (dx_error, ...)
+    """
+    X = numpy.asarray(X, dtype=float)
+    Y = numpy.asarray(Y, dtype=float)
+    chi_angle = math.radians(chi_angle)
+    cos_chi, sin_chi = math.cos(chi_angle), math.sin(chi_angle)
 
-    def errfunc(p, x, y):
-        return fitfunc(p, x) - y
+    # positions in the frame rotated by chi
+    z_horizontal = cos_chi * X - sin_chi * Y
+    z_vertical = sin_chi * X + cos_chi * Y
+    avg_pos = z_horizontal.mean(-1)
+    avg_pos_error = z_horizontal.std(-1) / numpy.sqrt(z_horizontal.shape[-1])
 
-    p1, success = optimize.leastsq(errfunc, [1.0, 0.0, 0.0], args=(phis, z))
-    return p1
+    coefficients, errors = fit_sinusoid(z_vertical, phi_positions)
+    offset, offset_error = coefficients[..., 2], errors[..., 2]
+
+    return {
+        "dx": coefficients[..., 0],
+        "dy": coefficients[..., 1],
+        "horizontal": cos_chi * avg_pos + sin_chi * offset,
+        "vertical": -sin_chi * avg_pos + cos_chi * offset,
+        "dx_error": errors[..., 0],
+        "dy_error": errors[..., 1],
+        "horizontal_error": numpy.hypot(cos_chi * avg_pos_error, sin_chi * offset_error),
+        "vertical_error": numpy.hypot(sin_chi * avg_pos_error, cos_chi * offset_error),
+    }
 
 
 USER_CLICKED_EVENT = None
@@ -324,43 +390,21 @@ def centre_plate(
         raise
 
     # logging.info("X=%s,Y=%s", X, Y)
-    chi_angle = math.radians(chi_angle)
-    chiRotMatrix = numpy.matrix(
-        [
-            [math.cos(chi_angle), -math.sin(chi_angle)],
-            [math.sin(chi_angle), math.cos(chi_angle)],
-        ]
-    )
-    Z = chiRotMatrix * numpy.matrix([X, Y])
-    z = Z[1]
-    avg_pos = Z[0].mean()
-
-    r, a, offset = multiPointCentre(numpy.array(z).flatten(), phi_positions)
-    dy = r * numpy.sin(a)
-    dx = r * numpy.cos(a)
-
-    d = chiRotMatrix.transpose() * numpy.matrix([[avg_pos], [offset]])
-
-    d_horizontal = d[0] - (beam_xc / float(pixelsPerMm_Hor))
-    d_vertical = d[1] - (beam_yc / float(pixelsPerMm_Ver))
-
-    phi_pos = math.radians(phi.direction * phi.get_value())
-    phiRotMatrix = numpy.matrix(
-        [
-            [math.cos(phi_pos), -math.sin(phi_pos)],
-            [math.sin(phi_pos), math.cos(phi_pos)],
-        ]
-    )
+    solution = solve_centring(X, Y, phi_positions, chi_angle)
+    dx = solution["dx"]
+    dy = solution["dy"]
+    d_horizontal = solution["horizontal"] - (beam_xc / float(pixelsPerMm_Hor))
+    d_vertical = solution["vertical"] - (beam_yc / float(pixelsPerMm_Ver))
 
     centred_pos = SAVED_INITIAL_POSITIONS.copy()
     centred_pos.update(
         {
             sampx.motor: float(sampx.get_value() + sampx.direction * dx),
             sampy.motor: float(sampy.get_value() + sampy.direction * dy),
-            phiz.motor: float(phiz.get_value() + phiz.direction * d_vertical[0, 0])
+            phiz.motor: float(phiz.get_value() + phiz.direction * d_vertical)
             if phiz.__dict__.get("reference_position") is None
             else phiz.reference_position,
-            phiy.motor: float(phiy.get_value() + phiy.direction * d_horizontal[0, 0])
+            phiy.motor: float(phiy.get_value() + phiy.direction * d_horizontal)
             if phiy.__dict__.get("reference_position") is None
             else phiy.reference_position,
         }
@@ -449,43 +493,57 @@ def center(
         raise
 
     # logging.info("X=%s,Y=%s", X, Y)
-    chi_angle = math.radians(chi_angle)
-    chiRotMatrix = numpy.matrix(
-        [
-            [math.cos(chi_angle), -math.sin(chi_angle)],
-            [math.sin(chi_angle), math.cos(chi_angle)],
-        ]
+    return centred_position(
+        X,
+        Y,
+        phi_positions,
+        phi,
+        phiy,
+        phiz,
+        sampx,
+        sampy,
+        pixelsPerMm_Hor,
+        pixelsPerMm_Ver,
+        beam_xc,
+        beam_yc,
+        chi_angle,
     )
-    Z = chiRotMatrix * numpy.matrix([X, Y])
-    z = Z[1]
-    avg_pos = Z[0].mean()
-
-    r, a, offset = multiPointCentre(numpy.array(z).flatten(), phi_positions)
-    dy = r * numpy.sin(a)
-    dx = r * numpy.cos(a)
 
-    d = chiRotMatrix.transpose() * numpy.matrix([[avg_pos], [offset]])
 
-    d_horizontal = d[0] - (beam_xc / float(pixelsPerMm_Hor))
-    d_vertical = d[1] - (beam_yc / float(pixelsPerMm_Ver))
-
-    phi_pos = math.radians(phi.direction * phi.get_value())
-    phiRotMatrix = numpy.matrix(
-        [
-            [math.cos(phi_pos), -math.sin(phi_pos)],
-            [math.sin(phi_pos), math.cos(phi_pos)],
-        ]
-    )
+def centred_position(
+    X,
+    Y,
+    phi_positions,
+    phi,
+    phiy,
+    phiz,
+    sampx,
+    sampy,
+    pixelsPerMm_Hor,
+    pixelsPerMm_Ver,
+    beam_xc,
+    beam_yc,
+    chi_angle,
+):
+    """
+    Centred motor positions from the sample positions X, Y [mm] seen at the
+    phi_positions [rad]
+    """
+    solution = solve_centring(X, Y, phi_positions, chi_angle)
+    dx = solution["dx"]
+    dy = solution["dy"]
+    d_horizontal = solution["horizontal"] - (beam_xc / float(pixelsPerMm_Hor))
+    d_vertical = solution["vertical"] - (beam_yc / float(pixelsPerMm_Ver))
 
     centred_pos = SAVED_INITIAL_POSITIONS.copy()
     centred_pos.update(
         {
             sampx.motor: float(sampx.get_value() + sampx.direction * dx),
             sampy.motor: float(sampy.get_value() + sampy.direction * dy),
-            phiz.motor: float(phiz.get_value() + phiz.direction * d_vertical[0, 0])
+            phiz.motor: float(phiz.get_value() + phiz.direction * d_vertical)
             if phiz.__dict__.get("reference_position") is None
             else phiz.reference_position,
-            phiy.motor: float(phiy.get_value() + phiy.direction * d_horizontal[0, 0])
+            phiy.motor: float(phiy.get_value() + phiy.direction * d_horizontal)
             if phiy.__dict__.get("reference_position") is None
             else phiy.reference_position,
         }
@@ -516,13 +574,14 @@ def start_auto(
     n_points=3,
     msg_cb=None,
     new_point_cb=None,
+    continuous=False,
 ):
     global CURRENT_CENTRING
 
     phi, phiy, phiz, sampx, sampy = prepare(centring_motors_dict)
 
     CURRENT_CENTRING = gevent.spawn(
-        auto_center,
+        auto_center_continuous if continuous else auto_center,
         camera,
         phi,
         phiy,
@@ -541,14 +600,32 @@ def start_auto(
     return CURRENT_CENTRING
 
 
-def find_loop(camera, pixelsPerMm_Hor, chi_angle, msg_cb, new_point_cb):
-    snapshot_filename = os.path.join(
-        tempfile.gettempdir(), "mxcube_sample_snapshot.png"
-    )
-    camera.take_snapshot(snapshot_filename, bw=True)
+def take_loop_snapshot(camera):
+    """
+    Camera image for the loop detection, as a numpy array (no encoding, no
+    file); None if the camera does not give arrays
+    """
+    try:
+        image = camera.get_snapshot(bw=True, return_as_array=True)
+    except (AttributeError, NotImplementedError):
+        return None
+    if image is None:
+        return None
+    image = numpy.asarray(image)
+    if image.dtype != numpy.uint8:
+        image = numpy.clip(image, 0, 255).astype(numpy.uint8)
+    return image
+
+
+def find_loop(camera, pixelsPerMm_Hor, chi_angle, msg_cb, new_point_cb, image=None):
+    if image is None:
+        image = take_loop_snapshot(camera)
+    if image is None:
+        image = os.path.join(tempfile.gettempdir(), "mxcube_sample_snapshot.png")
+        camera.take_snapshot(image, bw=True)
 
     info, x, y = lucid.find_loop(
-        snapshot_filename, rotation=None, debug=False, IterationClosing=6
+        image, rotation=None, debug=False, IterationClosing=6
     )
 
     try:
@@ -649,3 +726,109 @@ def auto_center(
         end(centred_pos)
 
     return centred_pos
+
+
+def capture_rotation(camera, phi, phi_range, n_frames, timeout=60):
+    """
+    Rotate phi continuously by phi_range, and take n_frames snapshots at
+    evenly spaced angles on the way, without stopping
+    Returns:
+        (list): (timestamp, phi position, image) of the snapshots; the phi
+                position is read just before and after the snapshot
+    """
+    start_position = phi.get_value()
+    step = phi.direction * phi_range / float(n_frames - 1)
+    frames = []
+
+    def take_frame():
+        phi_before = phi.get_value()
+        timestamp = time.time()
+        image = take_loop_snapshot(camera)
+        phi_after = phi.get_value()
+        if image is None:
+            raise RuntimeError("No image array from the camera")
+        frames.append((timestamp, (phi_before + phi_after) / 2.0, image))
+
+    with gevent.Timeout(timeout, RuntimeError("Timeout while rotating phi")):
+        take_frame()
+        phi.set_value(start_position + step * (n_frames - 1))
+        for index in range(1, n_frames - 1):
+            target = start_position + step * index
+            while (phi.get_value() - target) * step < 0:
+                gevent.sleep(0.005)
+            take_frame()
+        phi.wait_ready()
+        take_frame()
+
+    return frames
+
+
+def auto_center_continuous(
+    camera,
+    phi,
+    phiy,
+    phiz,
+    sampx,
+    sampy,
+    pixelsPerMm_Hor,
+    pixelsPerMm_Ver,
+    beam_xc,
+    beam_yc,
+    chi_angle,
+    n_points,
+    msg_cb,
+    new_point_cb,
+    phi_range=180,
+):
+    """
+    Automatic centring with the snapshots taken while phi rotates (see
+    capture_rotation); snapshots without loop are skipped
+    """
+    # check if loop is there at the beginning
+    i = 0
+    while -1 in find_loop(camera, pixelsPerMm_Hor, chi_angle, msg_cb, new_point_cb):
+        phi.set_value_relative(90, timeout=10)
+        i += 1
+        if i > 4:
+            if callable(msg_cb):
+                msg_cb("No loop detected, aborting")
+            return
+
+    if callable(msg_cb):
+        msg_cb("Doing automatic centring")
+
+    X, Y, phi_positions = [], [], []
+    for timestamp, phi_position, image in capture_rotation(
+        camera, phi, phi_range, n_points
+    ):
+        x, y = find_loop(
+            camera, pixelsPerMm_Hor, chi_angle, msg_cb, new_point_cb, image=image
+        )
+        if -1 in (x, y):
+            continue
+        X.append(x / float(pixelsPerMm_Hor))
+        Y.append(y / float(pixelsPerMm_Ver))
+        phi_positions.append(phi.direction * math.radians(phi_position))
+
+    if len(X) < 3:
+        move_motors(SAVED_INITIAL_POSITIONS)
+        raise RuntimeError("Could not centre sample automatically.")
+
+    centred_pos = centred_position(
+        X,
+        Y,
+        phi_positions,
+        phi,
+        phiy,
+        phiz,
+        sampx,
+        sampy,
+        pixelsPerMm_Hor,
+        pixelsPerMm_Ver,
+        beam_xc,
+        beam_yc,
+        chi_angle,
+    )
+    end(centred_pos)
+
+    return centred_pos
@@ -0,0 +1,271 @@
+# encoding: utf-8
+#
+#  Project: MXCuBE
+#  https://github.com/mxcube
+#
+#  This file is part of MXCuBE software.
+#
+#  MXCuBE is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  MXCuBE is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with MXCuBE. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Lazy access to the EDNA XSData binding modules (XSDataCommon, XSDataMXv1...)
+
+The generated binding modules are large: they are only imported when one of
+their classes is used, e.g.
+
+    xsdata = XSDataBindings("XSDataCommon", "XSDataMXCuBEv1_3")
+    ...
+    value = xsdata.XSDataDouble(1.0)
+
+The binding modules import each other by their plain names (e.g.
+"from XSDataCommon import XSData"): each module is registered under its plain
+and its package name, so that it is loaded only once.
+
+The parseString / parseFile methods of the generated classes build the whole
+minidom tree of the document before building the XSData objects. With the
+"stream" parse backend (opt-in, see set_parse_backend), they build the
+objects from an ElementTree iterparse stream instead: each child element of
+the document element is freed once its XSData object is built, e.g. each
+imageDozor of a Dozor result. The backend applies to all the binding modules
+loaded, however they were imported.
+"""
+
+import importlib
+import io
+import sys
+from xml.dom import Node
+from xml.etree import ElementTree
+
+__copyright__ = """ Copyright © 2010 - 2020 by MXCuBE Collaboration """
+__license__ = "LGPLv3+"
+
+PACKAGE = "HardwareRepository.HardwareObjects."
+
+# binding module: binding modules it imports
+XSDATA_MODULES = {
+    "XSDataCommon": (),
+    "XSDataMXv1": ("XSDataCommon",),
+    "XSDataMXCuBEv1_3": ("XSDataCommon", "XSDataMXv1"),
+    "XSDataAutoprocv1_0": ("XSDataCommon",),
+    "XSDataControlDozorv1_1": ("XSDataCommon",),
+}
+
+PARSE_BACKENDS = ("minidom", "stream")
+
+_parse_backend = "minidom"
+
+# XSData class: generated (minidom) parseString and parseFile
+_minidom_parsers = {}
+
+
+def import_binding(module_name):
+    """Import an XSData binding module, if not already done
+
+    Args:
+        module_name (str): plain module name, e.g. XSDataCommon
+
+    Returns:
+        module: the binding module
+    """
+    module = sys.modules.get(module_name) or sys.modules.get(PACKAGE + module_name)
+    if module is None:
+        for dependency in XSDATA_MODULES[module_name]:
+            import_binding(dependency)
+        module = importlib.import_module(PACKAGE + module_name)
+    sys.modules.setdefault(module_name, module)
+    sys.modules.setdefault(PACKAGE + module_name, module)
+    _install_parse_backend(module)
+    return module
+
+
+def set_parse_backend(backend):
+    """Select how the XSData classes parse XML documents, in the whole process
+
+    Args:
+        backend (str): "minidom" (generated code, the default) or "stream"
+    """
+    global _parse_backend
+
+    if backend not in PARSE_BACKENDS:
+        raise ValueError("Unknown XSData parse backend %s" % backend)
+    _parse_backend = backend
+    for module_name in XSDATA_MODULES:
+        # also imported directly, without import_binding
+        module = sys.modules.get(module_name) or sys.modules.get(PACKAGE + module_name)
+        if module is not None:
+            _install_parse_backend(module)
+
+
+def _install_parse_backend(module):
+    if getattr(module, "_xsdata_parse_backend", None) == _parse_backend:
+        return
+    module._xsdata_parse_backend = _parse_backend
+
+    for cls in list(vars(module).values()):
+        if not (isinstance(cls, type) and "parseString" in vars(cls)):
+            continue
+        if cls.__module__ != module.__name__:
+            # imported from another binding module
+            continue
+        if cls not in _minidom_parsers:
+            _minidom_parsers[cls] = (cls.parseString, cls.parseFile)
+
+        if _parse_backend == "stream":
+            cls.parseString = staticmethod(_stream_parser(cls, parse_string))
+            cls.parseFile = staticmethod(_stream_parser(cls, parse_file))
+        else:
+            cls.parseString = staticmethod(_minidom_parsers[cls][0])
+            cls.parseFile = staticmethod(_minidom_parsers[cls][1])
+
+
+def _stream_parser(cls, parse):
+    def parser(source):
+        return parse(cls, source)
+
+    return parser
+
+
+def parse_string(xsdata_class, xml_string):
+    """Build an XSData object from an XML string, without a DOM tree
+
+    Args:
+        xsdata_class (type): XSData class of the document element
+        xml_string (str or bytes): XML document
+
+    Returns:
+        an xsdata_class instance
+    """
+    if isinstance(xml_string, bytes):
+        source = io.BytesIO(xml_string)
+    else:
+        source = io.StringIO(xml_string)
+    root_obj = _build_from_stream(xsdata_class, source)
+    # Check that all minOccurs are obeyed by marshalling the created object
+    root_obj.export(io.StringIO(), 0, name_=xsdata_class.__name__)
+    return root_obj
+
+
+def parse_file(xsdata_class, file_path):
+    """Build an XSData object from an XML file, without a DOM tree
+
+    Args:
+        xsdata_class (type): XSData class of the document element
+        file_path (str): XML file
+
+    Returns:
+        an xsdata_class instance
+    """
+    return _build_from_stream(xsdata_class, file_path)
+
+
+def _build_from_stream(xsdata_class, source):
+    root_obj = xsdata_class()
+    root = None
+    depth = 0
+    for event, element in ElementTree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = element
+        else:
+            depth -= 1
+            if depth == 1:
+                # a complete child of the document element
+                node = _ElementNode(element)
+                root_obj.buildChildren(node, node.nodeName)
+                root.remove(element)
+    return root_obj
+
+
+class _TextNode(object):
+    """minidom Text stand-in, for the generated build methods"""
+
+    nodeType = Node.TEXT_NODE
+    nodeName = "#text"
+    childNodes = ()
+    firstChild = None
+
+    def __init__(self, data):
+        self.nodeValue = self.data = data
+
+
+class _ElementNode(object):
+    """minidom Element stand-in over an ElementTree element, for the generated
+    build methods
+    """
+
+    nodeType = Node.ELEMENT_NODE
+    nodeValue = None
+
+    def __init__(self, element):
+        self._element = element
+        # local name, as nodeName.split(":")[-1] for minidom
+        self.nodeName = element.tag.rpartition("}")[2]
+
+    @property
+    def childNodes(self):
+        nodes = []
+        if self._element.text:
+            nodes.append(_TextNode(self._element.text))
+        for child in self._element:
+            nodes.append(_ElementNode(child))
+            if child.tail:
+                nodes.append(_TextNode(child.tail))
+        return nodes
+
+    @property
+    def firstChild(self):
+        if self._element.text:
+            return _TextNode(self._element.text)
+        for child in self._element:
+            return _ElementNode(child)
+        return None
+
+    def toxml(self):
+        return ElementTree.tostring(self._element).decode()
+
+
+class XSDataBindings(object):
+    """Classes of XSData binding modules, the modules being imported when
+    one of their classes is first used
+    """
+
+    def __init__(self, *module_names):
+        """
+        Args:
+            module_names (str): binding modules, e.g. XSDataCommon, searched
+                in this order
+        """
+        for module_name in module_names:
+            if module_name not in XSDATA_MODULES:
+                raise ValueError("Unknown XSData binding module %s" % module_name)
+        self._module_names = module_names
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        for module_name in self._module_names:
+            module = import_binding(module_name)
+            try:
+                value = getattr(module, name)
+            except AttributeError:
+                continue
+            # next accesses do not go through __getattr__
+            setattr(self, name, value)
+            return value
+
+        raise AttributeError(
+            "No %s in XSData modules %s" % (name, ", ".join(self._module_names))
+        )
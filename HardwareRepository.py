@@ -34,16 +34,18 @@ import sys
 import os
 import time
 import importlib
-from datetime import datetime
 from warnings import warn
 
 import gevent
+import gevent.event
+import gevent.pool
 from ruamel.yaml import YAML
 
 from HardwareRepository.ConvertUtils import string_types, make_table
 from HardwareRepository.dispatcher import dispatcher
 from . import BaseHardwareObjects
 from . import HardwareObjectFileParser
+from .ConfigurationCache import ConfigurationCache
 
 
 # If you want to write out copies of the file, use typ="rt" instead
@@ -98,8 +100,7 @@ def load_from_yaml(configuration_file, role, _container=None, _table=None):
 
     if not msg0:
         # Load the configuration file
-        with open(configuration_path, "r") as fp0:
-            configuration = yaml.load(fp0)
+        configuration = _instance.read_yaml(configuration_path)
 
         # Get actual class
         initialise_class = configuration.pop("_initialise_class", None)
@@ -171,33 +172,11 @@ def load_from_yaml(configuration_file, role, _container=None, _table=None):
                 (role, class_name, configuration_file, "%.1d" % load_time, msg1)
             )
             msg0 = "Done loading contents"
-        for role1, config_file in _objects.items():
-            fname, fext = os.path.splitext(config_file)
-            if fext == ".yml":
-                load_from_yaml(
-                    config_file, role=role1, _container=result, _table=_table
-                )
-            elif fext == ".xml":
-                msg1 = ""
-                time0 = time.time()
-                try:
-                    hwobj = _instance.get_hardware_object(fname)
-                    if hwobj is None:
-                        msg1 = "No object loaded"
-                        class_name1 = "None"
-                    else:
-                        class_name1 = hwobj.__class__.__name__
-                        if hasattr(result, role1):
-                            result.replace_object(role1, hwobj)
-                        else:
-                            msg1 = "No such role: %s.%s" % (class_name, role1)
-                except Exception as ex:
-                    msg1 = "Loading error (%s)" % str(ex)
-                    class_name = ""
-                load_time = 1000 * (time.time() - time0)
-                _table.append(
-                    (role1, class_name1, config_file, "%.1d" % load_time, msg1)
-                )
+        load_concurrency = configuration.pop("_load_concurrency", 1)
+        dependencies = configuration.pop("_dependencies", {})
+        _load_contained_objects(
+            result, class_name, _objects, _table, load_concurrency, dependencies
+        )
 
         # Set simple, miscellaneous properties.
         # NB the attribute must have been initialied in the class __init__ first.
@@ -237,6 +216,114 @@ def load_from_yaml(configuration_file, role, _container=None, _table=None):
     return result
 
 
+def _load_yaml_file(file_path):
+    """Load a yaml file (uncached)"""
+    with open(file_path, "r") as fp0:
+        return yaml.load(fp0)
+
+
+def _load_xml_file(file_path):
+    """Source and SAX events of an xml file (uncached)"""
+    with open(file_path, "r") as fp0:
+        xml_data = fp0.read()
+    return xml_data, HardwareObjectFileParser.record_events(str.encode(xml_data))
+
+
+def _load_contained_object(container, container_class_name, role, config_file):
+    """Load object contained in a yaml-configured container
+
+    Args:
+        container (ConfiguredObject): Container object
+        container_class_name (str): Container class name, for the report
+        role (str): Role name of contained object
+        config_file (str): Configuration file of contained object
+
+    Returns:
+        List: summary output rows
+    """
+    table = []
+    fname, fext = os.path.splitext(config_file)
+    if fext == ".yml":
+        load_from_yaml(config_file, role=role, _container=container, _table=table)
+    elif fext == ".xml":
+        msg1 = ""
+        class_name1 = ""
+        time0 = time.time()
+        try:
+            hwobj = _instance.get_hardware_object(fname)
+            if hwobj is None:
+                msg1 = "No object loaded"
+                class_name1 = "None"
+            else:
+                class_name1 = hwobj.__class__.__name__
+                if hasattr(container, role):
+                    container.replace_object(role, hwobj)
+                else:
+                    msg1 = "No such role: %s.%s" % (container_class_name, role)
+        except Exception as ex:
+            msg1 = "Loading error (%s)" % str(ex)
+        load_time = 1000 * (time.time() - time0)
+        table.append((role, class_name1, config_file, "%.1d" % load_time, msg1))
+    return table
+
+
+def _load_contained_objects(
+    container, container_class_name, objects, _table, concurrency=1, dependencies=None
+):
+    """Load objects contained in a yaml-configured container
+
+    With concurrency 1 objects are loaded in configuration order.
+    Otherwise objects are loaded in successive batches of objects whose
+    dependencies are all loaded, with up to <concurrency> objects
+    initialised in parallel greenlets. Dependencies are the objects
+    referenced in the configuration files (recursively), plus those
+    explicitly given in dependencies.
+
+    Args:
+        container (ConfiguredObject): Container object
+        container_class_name (str): Container class name, for the report
+        objects (dict): role: configuration file
+        _table (List): Collecting summary output
+        concurrency (int): Maximum number of objects loaded in parallel
+        dependencies (dict): role: list of roles that must be loaded first
+    """
+    if concurrency <= 1:
+        for role, config_file in objects.items():
+            _table.extend(
+                _load_contained_object(
+                    container, container_class_name, role, config_file
+                )
+            )
+        return
+
+    graph = _instance.get_dependency_graph(objects, dependencies)
+    tables = {}
+    pool = gevent.pool.Pool(concurrency)
+    loaded = set()
+    while len(loaded) < len(graph):
+        batch = [
+            role
+            for role in objects
+            if role not in loaded and graph[role].issubset(loaded)
+        ]
+        if not batch:
+            # dependency cycle - load the first remaining object on its own
+            batch = [role for role in objects if role not in loaded][:1]
+        for role in batch:
+            tables[role] = pool.spawn(
+                _load_contained_object,
+                container,
+                container_class_name,
+                role,
+                objects[role],
+            )
+        pool.join(raise_error=True)
+        loaded.update(batch)
+
+    for role in objects:
+        _table.extend(tables[role].value)
+
+
 def add_hardware_objects_dirs(ho_dirs):
     """Adds directories with xml/yaml config files
 
@@ -260,12 +347,17 @@ def set_user_file_directory(user_file_directory):
     BaseHardwareObjects.HardwareObjectNode.set_user_file_directory(user_file_directory)
 
 
-def init_hardware_repository(configuration_path):
+def init_hardware_repository(configuration_path, cache_file=None):
     """Initialise hardweare repository - must be run at program start
 
     Args:
         configuration_path (str): PATHSEP-separated string of directories
         giving configuration file lookup path
+        cache_file (str): file keeping the parsed configuration files
+        between program starts. The cache is opt-in: nothing is cached if
+        None (the default). The file is a pickle, loaded at start: it must
+        be in a directory that only the user running the program can write
+        to, e.g. ~/.cache/mxcube/hwr_configuration.pickle, not under /tmp
 
     Returns:
 
@@ -287,9 +379,10 @@ def init_hardware_repository(configuration_path):
         configuration_path = lookup_path
 
     logging.getLogger("HWR").info("Hardware repository: %s", configuration_path)
-    _instance = __HardwareRepositoryClient(configuration_path)
+    _instance = __HardwareRepositoryClient(configuration_path, cache_file)
     _instance.connect()
     beamline = load_from_yaml(BEAMLINE_CONFIG_FILE, role="beamline")
+    _instance.config_cache.save()
 
 
 def get_hardware_repository():
@@ -314,11 +407,13 @@ class __HardwareRepositoryClient:
     call the module's level get_hardware_repository() function instead
     """
 
-    def __init__(self, server_address):
+    def __init__(self, server_address, cache_file=None):
         """Constructor
 
         server_address needs to be the HWR server address (host:port) or
         a list of paths where to find XML files locally (when server is not in use)
+        cache_file is the file keeping the parsed configuration files between
+        program starts (see ConfigurationCache)
         """
         self.server_address = server_address
         self.required_hardware_objects = {}
@@ -328,6 +423,14 @@ class __HardwareRepositoryClient:
         self.hwobj_info_list = []
         self.invalid_hardware_objects = None
         self.hardware_objects = None
+        # name: (loading greenlet, event set when done)
+        self._loading_hardware_objects = {}
+        # greenlet: name of object it waits for
+        self._waiting_greenlets = {}
+        self._config_references = {}
+        self.config_cache = ConfigurationCache(cache_file)
+        # relative path: absolute path of the files in the repository
+        self._file_index = None
 
     def connect(self):
         if self.__connected:
@@ -356,6 +459,13 @@ class __HardwareRepositoryClient:
             if relative_path.startswith(os.path.sep):
                 relative_path = relative_path[1:]
 
+            if self._file_index is None:
+                self._file_index = self._index_repository_files()
+            file_path = self._file_index.get(os.path.normpath(relative_path))
+            if file_path is not None and os.path.exists(file_path):
+                return file_path
+
+            # not there when the repository was indexed, or removed since
             for xml_files_path in self.server_address:
                 file_path = os.path.join(xml_files_path, relative_path)
                 if os.path.exists(file_path):
@@ -363,6 +473,130 @@ class __HardwareRepositoryClient:
             #
             return
 
+    def _index_repository_files(self):
+        """Absolute paths of the files and directories of the repository,
+        by path relative to the repository directories (first one first)
+
+        Symbolic links are followed, but a directory is only indexed once
+        per repository directory (no endless walk on a link to a parent)
+        """
+        index = {}
+        for xml_files_path in self.server_address:
+            xml_files_path = os.path.abspath(xml_files_path)
+            visited = set()
+            for dir_path, dir_names, file_names in os.walk(
+                xml_files_path, followlinks=True
+            ):
+                real_path = os.path.realpath(dir_path)
+                if real_path in visited:
+                    del dir_names[:]
+                    continue
+                visited.add(real_path)
+                for name in dir_names + file_names:
+                    file_path = os.path.join(dir_path, name)
+                    index.setdefault(
+                        os.path.relpath(file_path, xml_files_path), file_path
+                    )
+        return index
+
+    def read_yaml(self, file_path):
+        """Content of a yaml configuration file, from the configuration cache
+
+        Args:
+            file_path (str): absolute path of the file
+
+        Returns:
+            the loaded yaml document
+        """
+        return self.config_cache.get(file_path, "yaml", _load_yaml_file)
+
+    def read_xml(self, file_path):
+        """Source and SAX events of an xml file, from the configuration cache
+
+        Args:
+            file_path (str): absolute path of the file
+
+        Returns:
+            tuple: the xml string, and its events for
+                   HardwareObjectFileParser.parse_events
+        """
+        return self.config_cache.get(file_path, "xml", _load_xml_file)
+
+    def get_config_references(self, config_file):
+        """Get the configuration files referenced by a configuration file,
+        recursively: 'href' of xml files, '_objects' of yaml files
+
+        Args:
+            config_file (str): configuration file, e.g. energy.xml
+
+        Returns:
+            set: referenced files, as Hardware Object names for xml files
+                 (e.g. /energy) and file names for yaml files
+        """
+        fname, fext = os.path.splitext(config_file)
+        key = config_file if fext == ".yml" else "/" + fname.lstrip("/")
+        if key in self._config_references:
+            return self._config_references[key]
+
+        # placeholder, to stop recursion on circular references
+        self._config_references[key] = references = set()
+        direct_references = set()
+        if fext == ".yml":
+            file_path = self.find_in_repository(config_file)
+            if file_path:
+                try:
+                    configuration = self.read_yaml(file_path) or {}
+                    direct_references.update(
+                        configuration.get("_objects", {}).values()
+                    )
+                except Exception:
+                    logging.getLogger("HWR").exception(
+                        "Cannot read references in %s", config_file
+                    )
+        else:
+            file_path = self.find_in_repository(key + os.path.extsep + "xml")
+            if file_path:
+                try:
+                    for event in self.read_xml(file_path)[1]:
+                        if event[0] == "start" and "href" in event[2]:
+                            direct_references.add(event[2]["href"] + ".xml")
+                except Exception:
+                    logging.getLogger("HWR").exception(
+                        "Cannot read references in %s", config_file
+                    )
+
+        for reference in direct_references:
+            fname, fext = os.path.splitext(reference)
+            references.add(reference if fext == ".yml" else "/" + fname.lstrip("/"))
+            references.update(self.get_config_references(reference))
+        return references
+
+    def get_dependency_graph(self, objects, dependencies=None):
+        """Get the dependencies between the objects of a container
+
+        Args:
+            objects (dict): role: configuration file
+            dependencies (dict): role: list of roles, explicit dependencies
+
+        Returns:
+            dict: role: set of roles it depends on
+        """
+        roles_by_file = {}
+        for role, config_file in objects.items():
+            fname, fext = os.path.splitext(config_file)
+            roles_by_file[config_file if fext == ".yml" else "/" + fname] = role
+
+        graph = {}
+        for role, config_file in objects.items():
+            graph[role] = set(
+                roles_by_file[reference]
+                for reference in self.get_config_references(config_file)
+                if reference in roles_by_file
+            )
+            graph[role].update((dependencies or {}).get(role, ()))
+            graph[role].discard(role)
+        return graph
+
     def require(self, mnemonics_list):
         """Download a list of Hardware Objects in one go"""
         self.required_hardware_objects = {}
@@ -378,6 +612,35 @@ class __HardwareRepositoryClient:
                 "Could not execute 'require' on Hardware Repository server"
             )
 
+    def _wait_hardware_object_loading(self, hwobj_name):
+        """Wait for an object being loaded by another greenlet
+
+        Does not wait if the object is not being loaded, or if waiting
+        would deadlock (e.g. the loading greenlet waits for an object
+        that the current greenlet is loading)
+
+        :param hwobj_name:  string name of the Hardware Object, e.g. /motors/m0
+        :return: True if the object was loaded while waiting
+        """
+        loading = self._loading_hardware_objects.get(hwobj_name)
+        if loading is None:
+            return False
+
+        current = gevent.getcurrent()
+        owner = loading[0]
+        while owner is not None:
+            if owner is current:
+                return False
+            name = self._waiting_greenlets.get(owner)
+            owner = self._loading_hardware_objects.get(name, (None,))[0]
+
+        self._waiting_greenlets[current] = hwobj_name
+        try:
+            loading[1].wait()
+        finally:
+            del self._waiting_greenlets[current]
+        return True
+
     def _load_hardware_object(self, hwobj_name=""):
         """
         Load a Hardware Object. Do NOT use externally,
@@ -386,31 +649,37 @@ class __HardwareRepositoryClient:
         :param hwobj_name:  string name of the Hardware Object to load, e.g. /motors/m0
         :return: the loaded Hardware Object, or None if it fails
         """
-
+        loaded_event = gevent.event.Event()
+        self._loading_hardware_objects[hwobj_name] = (gevent.getcurrent(), loaded_event)
+        try:
+            return self._do_load_hardware_object(hwobj_name)
+        finally:
+            # the entry is replaced when the object is loaded again while
+            # loading (circular reference)
+            loading = self._loading_hardware_objects.get(hwobj_name)
+            if loading is not None and loading[1] is loaded_event:
+                del self._loading_hardware_objects[hwobj_name]
+            loaded_event.set()
+
+    def _do_load_hardware_object(self, hwobj_name):
         comment = ""
         class_name = ""
         hwobj_instance = None
         xml_data = ""
+        xml_events = None
 
-        for xml_files_path in self.server_address:
-            file_name = (
-                hwobj_name[1:] if hwobj_name.startswith(os.path.sep) else hwobj_name
-            )
-            file_path = (
-                os.path.join(xml_files_path, file_name) + os.path.extsep + "xml"
-            )
-            if os.path.exists(file_path):
-                try:
-                    xml_data = open(file_path, "r").read()
-                except Exception:
-                    pass
-                break
+        file_path = self.find_in_repository(hwobj_name + os.path.extsep + "xml")
+        if file_path is not None:
+            try:
+                xml_data, xml_events = self.read_xml(file_path)
+            except Exception:
+                pass
 
-        start_time = datetime.now()
+        start_time = time.time()
 
         if xml_data:
             try:
-                hwobj_instance = self.parse_xml(xml_data, hwobj_name)
+                hwobj_instance = self.parse_xml(xml_data, hwobj_name, xml_events)
                 if isinstance(hwobj_instance, string_types):
                     # We have redirection to another file
                     # Enter in dictionaries also under original names
@@ -473,16 +742,10 @@ class __HardwareRepositoryClient:
                 'Cannot load Hardware Object "%s" : file not found.', hwobj_name
             )
 
-        end_time = datetime.now()
-        time_delta = end_time - start_time
+        load_time = 1000 * (time.time() - start_time)
 
         self.hwobj_info_list.append(
-            (
-                hwobj_name,
-                class_name,
-                "%d ms" % (time_delta.microseconds / 1000),
-                comment,
-            )
+            (hwobj_name, class_name, "%d ms" % load_time, comment)
         )
 
         return hwobj_instance
@@ -511,18 +774,27 @@ class __HardwareRepositoryClient:
 
         dispatcher.send("hardwareObjectDiscarded", ho_name, self)
 
-    def parse_xml(self, xml_string, ho_name):
+    def parse_xml(self, xml_string, ho_name, xml_events=None):
         """Load a Hardware Object from its XML string representation
 
         Parameters :
           xml_string -- the XML string
           ho_name -- the name of the Hardware Object to load (i.e. '/motors/m0')
+          xml_events -- the SAX events of xml_string, replayed instead of
+                        parsing it if given (see HardwareObjectFileParser.record_events)
 
         Return :
           the Hardware Object, or None if it fails
         """
         try:
-            hardware_obj = HardwareObjectFileParser.parse_string(xml_string, ho_name)
+            if xml_events is None:
+                hardware_obj = HardwareObjectFileParser.parse_string(
+                    xml_string, ho_name
+                )
+            else:
+                hardware_obj = HardwareObjectFileParser.parse_events(
+                    xml_events, ho_name
+                )
         except Exception:
             logging.getLogger("HWR").exception(
                 "Cannot parse Hardware Repository file %s", ho_name
@@ -643,6 +915,8 @@ class __HardwareRepositoryClient:
 
                 if object_name in self.hardware_objects:
                     hardware_obj = self.hardware_objects[object_name]
+                elif self._wait_hardware_object_loading(object_name):
+                    hardware_obj = self.hardware_objects.get(object_name)
                 else:
                     hardware_obj = self._load_hardware_object(object_name)
                 return hardware_obj
@@ -857,6 +1131,10 @@ class __HardwareRepositoryClient:
         """
         self.end_polling()
 
+        for hwobj in list(self.hardware_objects.values()):
+            close_channels = getattr(hwobj, "close_channels", None)
+            if close_channels is not None:
+                close_channels()
         self.hardware_objects = weakref.WeakValueDictionary()
 
     def timerEvent(self, t_ev):
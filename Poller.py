@@ -1,8 +1,9 @@
 from dispatcher import saferef
+import collections
+import math
+import sys
 import gevent
 import gevent.monkey
-from gevent import _threading
-from gevent.queue import Queue, Empty
 from gevent.event import Event
 import numpy
 
@@ -12,8 +13,22 @@ log = logging.getLogger("HWR")
 
 POLLERS = {}
 
+# (polled call key, args) -> poller, for O(1) deduplication in poll()
+_POLLERS_BY_KEY = {}
+
 gevent_version = list(map(int,gevent.__version__.split('.')))
 
+_start_new_thread, _allocate_lock = gevent.monkey.get_original(
+    "thread" if sys.version_info[0] < 3 else "_thread",
+    ["start_new_thread", "allocate_lock"],
+)
+_sleep, _time = gevent.monkey.get_original("time", ["sleep", "time"])
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_TICK = 0.01
+DEFAULT_WHEEL_SIZE = 512
+
+
 class _NotInitializedValue:
     pass
 
@@ -27,6 +42,171 @@ class PollingException:
         self.poller_id = poller_id
 
 
+class _Worker(object):
+    def __init__(self):
+        self.wakeup = _allocate_lock()
+        self.wakeup.acquire()
+        self.task = None
+
+
+class PollingScheduler(object):
+    """
+    Runs the polled calls of all pollers on a bounded pool of OS threads.
+
+    Pollers are kept in a hashed timer wheel (one slot per tick), so
+    scheduling and unscheduling are O(1). Polled values are handed back
+    to the gevent hub through a single async watcher, and the callbacks
+    are spawned from there.
+    """
+
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_WORKERS,
+        tick=DEFAULT_TICK,
+        wheel_size=DEFAULT_WHEEL_SIZE,
+    ):
+        self.max_workers = max_workers
+        self.tick = tick
+        self._lock = _allocate_lock()
+        self._slots = [set() for _ in range(wheel_size)]
+        self._current_tick = 0
+        self._start_time = _time()
+        self._pending = collections.deque()
+        self._idle_workers = []
+        self._workers_count = 0
+        self._results = collections.deque()
+        self._running = False
+
+        loop = gevent.get_hub().loop
+        if gevent_version < [1,3,0]:
+            # 'async' is a reserved word from python 3.7
+            self._async_watcher = getattr(loop, "async")()
+        else:
+            self._async_watcher = loop.async_()
+        self._async_watcher.start(self._deliver)
+
+    def get_workers_count(self):
+        return self._workers_count
+
+    def schedule(self, poller, delay):
+        """Run poller.poll_once() in <delay> ms (at least one tick)"""
+        ticks = max(1, int(math.ceil(delay / 1000.0 / self.tick)))
+
+        with self._lock:
+            if not self._running:
+                self._running = True
+                _start_new_thread(self._run_timer, ())
+            poller._deadline = self._current_tick + ticks
+            self._slots[poller._deadline % len(self._slots)].add(poller)
+
+    def unschedule(self, poller):
+        with self._lock:
+            deadline = getattr(poller, "_deadline", None)
+            if deadline is not None:
+                self._slots[deadline % len(self._slots)].discard(poller)
+                poller._deadline = None
+
+    def send(self, poller, value):
+        """Deliver a polled value (or PollingException) to the gevent hub"""
+        self._results.append((poller, value))
+        self._async_watcher.send()
+
+    def _deliver(self):
+        while True:
+            try:
+                poller, res = self._results.popleft()
+            except IndexError:
+                break
+
+            if isinstance(res, PollingException):
+                cb = poller.error_callback_ref()
+                if cb is not None:
+                    gevent.spawn(cb, res.original_exception, res.poller_id)
+            else:
+                cb = poller.value_changed_callback_ref()
+                if cb is not None:
+                    gevent.spawn(cb, res)
+
+    def _run_timer(self):
+        nslots = len(self._slots)
+
+        while True:
+            now_tick = int((_time() - self._start_time) / self.tick)
+
+            with self._lock:
+                while self._current_tick < now_tick:
+                    self._current_tick += 1
+                    slot = self._slots[self._current_tick % nslots]
+                    due = [p for p in slot if p._deadline <= self._current_tick]
+                    for poller in due:
+                        slot.discard(poller)
+                        poller._deadline = None
+                        self._dispatch(poller)
+
+            _sleep(self.tick)
+
+    def _dispatch(self, poller):
+        # called with self._lock held
+        if self._idle_workers:
+            worker = self._idle_workers.pop()
+            worker.task = poller
+            worker.wakeup.release()
+        elif self._workers_count < self.max_workers:
+            self._workers_count += 1
+            worker = _Worker()
+            worker.task = poller
+            _start_new_thread(self._run_worker, (worker,))
+        else:
+            self._pending.append(poller)
+
+    def _run_worker(self, worker):
+        while True:
+            task, worker.task = worker.task, None
+
+            try:
+                task.poll_once()
+            except Exception:
+                log.exception("Poller: unexpected error in %r", task)
+
+            with self._lock:
+                if self._pending:
+                    worker.task = self._pending.popleft()
+                    continue
+                self._idle_workers.append(worker)
+
+            worker.wakeup.acquire()
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = PollingScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler):
+    """Replace the polling scheduler; to be called before polling starts"""
+    global _scheduler
+
+    _scheduler = scheduler
+
+
+def _polled_call_key(polled_call, polled_call_args):
+    try:
+        key = (id(polled_call.__self__), id(polled_call.__func__))
+    except AttributeError:
+        key = id(polled_call)
+    try:
+        hash(polled_call_args)
+    except TypeError:
+        return None
+    return key, polled_call_args
+
+
 def get_poller(poller_id):
     return POLLERS.get(poller_id)
 
@@ -41,15 +221,21 @@ def poll(
     start_delay=0,
     start_value=NotInitializedValue,
 ):
-    # logging.info(">>>> %s", POLLERS)
-    for _, poller in POLLERS.items():
+    key = _polled_call_key(polled_call, polled_call_args)
+
+    if key is not None:
+        candidates = (_POLLERS_BY_KEY.get(key),)
+    else:
+        # unhashable arguments: fall back to a full scan
+        candidates = tuple(POLLERS.values())
+    for poller in candidates:
+        if poller is None:
+            continue
         poller_polled_call = poller.polled_call_ref()
-        # logging.info(">>>>> poller.poll_cmd=%s, poll_cmd=%s, poller.args=%s, args=%s", poller_polled_call, polled_call, poller.args, polled_call_args)
         if poller_polled_call == polled_call and poller.args == polled_call_args:
             poller.set_polling_period(min(polling_period, poller.get_polling_period()))
             return poller
 
-    # logging.info(">>>>> CREATING NEW POLLER for cmd %r, args=%s, polling time=%d", polled_call, polled_call_args, polling_period)
     poller = _Poller(
         polled_call,
         polled_call_args,
@@ -59,7 +245,10 @@ def poll(
         compare,
     )
     poller.old_res = start_value
+    poller.key = key
     POLLERS[poller.get_id()] = poller
+    if key is not None:
+        _POLLERS_BY_KEY[key] = poller
     poller.start_delayed(start_delay)
     return poller
 
@@ -81,22 +270,25 @@ class _Poller:
         self.error_callback_ref = saferef.safe_ref(error_callback)
         self.compare = compare
         self.old_res = NotInitializedValue
-        self.queue = _threading.Queue()  # Queue.Queue()
+        self.key = None
         self.delay = 0
         self.stop_event = Event()
-
-        if gevent_version < [1,3,0]:
-            self.async_watcher = gevent.get_hub().loop.async()
-        else:
-            self.async_watcher = gevent.get_hub().loop.async_()
+        self.scheduler = get_scheduler()
+        self._deadline = None
 
     def start_delayed(self, delay):
         self.delay = delay
-        _threading.start_new_thread(self.run, ())  # self.start()
+        self.scheduler.schedule(self, delay)
 
     def stop(self):
         self.stop_event.set()
-        del POLLERS[self.get_id()]
+        self.scheduler.unschedule(self)
+        self._forget()
+
+    def _forget(self):
+        POLLERS.pop(self.get_id(), None)
+        if self.key is not None and _POLLERS_BY_KEY.get(self.key) is self:
+            del _POLLERS_BY_KEY[self.key]
 
     def is_stopped(self):
         return self.stop_event.is_set()
@@ -108,7 +300,6 @@ class _Poller:
         return self.polling_period
 
     def set_polling_period(self, polling_period):
-        # logging.info(">>>>> CHANGIG POLLING PERIOD TO %d", polling_period)
         self.polling_period = polling_period
 
     def restart(self, delay=0):
@@ -129,82 +320,43 @@ class _Poller:
                 start_value=self.old_res,
             )
 
-    def new_event(self):
-        while True:
-            try:
-                #res = Queue().get_nowait()
-                res = self.queue.get_nowait()
-
-            except Empty:
-                break
+    def poll_once(self):
+        """Execute the polled call once, then reschedule the next one"""
+        if self.stop_event.is_set():
+            return
 
-            if isinstance(res, PollingException):
-                cb = self.error_callback_ref()
-                if cb is not None:
-                    gevent.spawn(cb, res.original_exception, res.poller_id)
-            else:
-                cb = self.value_changed_callback_ref()
-                if cb is not None:
-                    gevent.spawn(cb, res)
-
-    def run(self):
-        sleep = gevent.monkey._get_original("time", ["sleep"])[0]
-
-        self.async_watcher.start(self.new_event)
-        err_callback_args = None
-        error_cb = None
-        first_run = True
-
-        while not self.stop_event.is_set():
-            if first_run and self.delay:
-                sleep(self.delay / 1000.0)
-            first_run = False
+        polled_call = self.polled_call_ref()
+        if polled_call is None:
+            self.stop_event.set()
+            return
 
+        try:
+            res = polled_call(*self.args)
+        except Exception as e:
             if self.stop_event.is_set():
-                break
-
-            polled_call = self.polled_call_ref()
-            if polled_call is None:
-                break
+                return
+            if self.error_callback_ref() is not None:
+                self.scheduler.send(self, PollingException(e, self.get_id()))
+            # polling stops on error, until the poller is restarted
+            return
 
-            try:
-                res = polled_call(*self.args)
-            except Exception as e:
-                if self.stop_event.is_set():
-                    break
-                error_cb = self.error_callback_ref()
-                if error_cb is not None:
-                    self.queue.put(PollingException(e, self.get_id()))
-                break
-
-            del polled_call
+        del polled_call
 
-            if self.stop_event.is_set():
-                break
+        if self.stop_event.is_set():
+            return
 
-            if isinstance(res, numpy.ndarray):  # for arrays
-                comparison = res == self.old_res
-                if isinstance(comparison, bool):
-                    is_equal = comparison
-                else:
-                    is_equal = all(comparison)
+        if isinstance(res, numpy.ndarray):  # for arrays
+            comparison = res == self.old_res
+            if isinstance(comparison, bool):
+                is_equal = comparison
             else:
-                is_equal = res == self.old_res
-
-            if self.compare and is_equal:
-                # do nothing: previous value is the same as "new" value
-                pass
-            else:
-                new_value = True
-                if self.compare:
-                    new_value = not is_equal
-
-                if new_value:
-                    self.old_res = res
-                    self.queue.put(res)
-                    self.async_watcher.send()
+                is_equal = all(comparison)
+        else:
+            is_equal = res == self.old_res
 
-            sleep(self.polling_period / 1000.0)
+        if not (self.compare and is_equal):
+            # previous value is not the same as "new" value
+            self.old_res = res
+            self.scheduler.send(self, res)
 
-        if error_cb is not None:
-            self.async_watcher.send()
+        self.scheduler.schedule(self, self.polling_period)
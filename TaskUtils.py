@@ -8,7 +8,6 @@ except ImportError:
     InstanceType = object
 import logging
 import gevent
-import collections
 
 
 class cleanup:
@@ -22,7 +21,7 @@ class cleanup:
     def __exit__(self, *args):
         if self.cleanup_funcs:
             for cleanup_func in self.cleanup_funcs:
-                if not isinstance(cleanup_func, collections.Callable):
+                if not callable(cleanup_func):
                     continue
                 try:
                     cleanup_func(**self.keys)
@@ -45,7 +44,7 @@ class error_cleanup:
         if args[0] is not None and self.error_funcs:
             logging.debug("Doing error cleanup")
             for error_func in self.error_funcs:
-                if not isinstance(error_func, collections.Callable):
+                if not callable(error_func):
                     continue
                 try:
                     error_func(**self.keys)
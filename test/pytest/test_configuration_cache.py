@@ -0,0 +1,104 @@
+import os
+
+from HardwareRepository import HardwareRepository as HWR
+from HardwareRepository.ConfigurationCache import ConfigurationCache
+
+TESTS_DIR = os.path.abspath(os.path.dirname(__file__))
+MOCKUP_DIR = os.path.join(TESTS_DIR, "../../configuration/mockup")
+
+
+def test_cache_invalidation(tmp_path):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(u"value: 1\n")
+    cache_file = str(tmp_path / "cache")
+    parsed = []
+
+    def parse(file_path):
+        parsed.append(file_path)
+        return HWR._load_yaml_file(file_path)
+
+    cache = ConfigurationCache(cache_file)
+    assert cache.get(str(config_file), "yaml", parse) == {"value": 1}
+    cache.save()
+
+    # a new program start
+    cache = ConfigurationCache(cache_file)
+    configuration = cache.get(str(config_file), "yaml", parse)
+    assert configuration == {"value": 1}
+    configuration.pop("value")
+    assert cache.get(str(config_file), "yaml", parse) == {"value": 1}
+    assert len(parsed) == 1
+
+    config_file.write_text(u"value: 22\n")
+    assert cache.get(str(config_file), "yaml", parse) == {"value": 22}
+    assert len(parsed) == 2
+
+
+def test_warm_start(tmp_path):
+    cache_file = str(tmp_path / "cache")
+    lookup_path = os.path.pathsep.join(
+        (MOCKUP_DIR, os.path.join(MOCKUP_DIR, "test"))
+    )
+    roles = []
+    for i in range(2):
+        HWR._instance = HWR.beamline = None
+        HWR.init_hardware_repository(lookup_path, cache_file)
+        roles.append(sorted(HWR.beamline.all_roles))
+        config_cache = HWR.get_hardware_repository().config_cache
+
+    # everything was read from the cache file
+    assert config_cache.misses == 0
+    assert config_cache.hits > 0
+    assert roles[0] == roles[1]
+
+
+def test_close_modification_times(tmp_path):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(u"value: 1\n")
+    mtime_ns = os.stat(str(config_file)).st_mtime_ns
+    cache = ConfigurationCache(str(tmp_path / "cache"))
+    assert cache.get(str(config_file), "yaml", HWR._load_yaml_file) == {"value": 1}
+
+    # same size, modified 100 ns later
+    config_file.write_text(u"value: 2\n")
+    os.utime(str(config_file), ns=(mtime_ns + 100, mtime_ns + 100))
+    assert cache.get(str(config_file), "yaml", HWR._load_yaml_file) == {"value": 2}
+
+
+def test_cache_file_writable_by_others(tmp_path):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text(u"value: 1\n")
+    cache_file = str(tmp_path / "cache")
+    cache = ConfigurationCache(cache_file)
+    cache.get(str(config_file), "yaml", HWR._load_yaml_file)
+    cache.save()
+    assert os.stat(cache_file).st_mode & 0o077 == 0
+
+    os.chmod(cache_file, 0o666)
+    cache = ConfigurationCache(cache_file)
+    cache.get(str(config_file), "yaml", HWR._load_yaml_file)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_find_in_repository_links_and_removed_files(tmp_path):
+    directories = [tmp_path / "first", tmp_path / "second"]
+    for directory in directories:
+        (directory / "sub").mkdir(parents=True)
+        (directory / "sub" / "object.xml").write_text(u"<object/>")
+    # link to a parent directory: indexed once, not walked endlessly
+    os.symlink(str(directories[0]), str(directories[0] / "sub" / "parent"))
+    client = HWR.__HardwareRepositoryClient([str(path) for path in directories])
+
+    assert client.find_in_repository("sub/object.xml") == str(
+        directories[0] / "sub" / "object.xml"
+    )
+    assert client.find_in_repository("sub/parent/sub/object.xml") == str(
+        directories[0] / "sub" / "parent" / "sub" / "object.xml"
+    )
+    assert not any("parent/sub/parent" in path for path in client._file_index)
+
+    # removed after indexing: found in the next directory
+    (directories[0] / "sub" / "object.xml").unlink()
+    assert client.find_in_repository("/sub/object.xml") == str(
+        directories[1] / "sub" / "object.xml"
+    )
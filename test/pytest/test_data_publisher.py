@@ -0,0 +1,47 @@
+import gevent
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from HardwareRepository.HardwareObjects.DataPublisher import DataPublisher, one_d_data
+
+
+@pytest.fixture
+def publisher():
+    data_publisher = DataPublisher("data_publisher")
+    data_publisher._r = fakeredis.FakeRedis(decode_responses=True)
+    data_publisher.register("scan", "scan", "diode")
+    task = gevent.spawn(data_publisher._handle_messages)
+    gevent.sleep(0.05)
+    yield data_publisher
+    task.kill()
+
+
+def _wait_points(data_publisher, npoints):
+    with gevent.Timeout(5):
+        while data_publisher._r.llen("HWR_DP_scan_DATA_X") < npoints:
+            gevent.sleep(0.01)
+
+
+@pytest.mark.parametrize("batch_size", [1, 7])
+def test_publish_points(publisher, batch_size):
+    publisher._batch_size = batch_size
+    publisher.start("scan")
+    for i in range(30):
+        publisher.pub("scan", one_d_data(i, 2 * i))
+    publisher.stop("scan")
+
+    _wait_points(publisher, 30)
+    data = publisher.get_data("scan")
+    assert data["x"] == [str(i) for i in range(30)]
+    assert data["y"] == [str(2 * i) for i in range(30)]
+
+
+def test_flush_interval(publisher):
+    publisher._batch_size = 100
+    publisher._flush_interval = 0.05
+    publisher.start("scan")
+    publisher.pub("scan", one_d_data(0, 1))
+
+    _wait_points(publisher, 1)
+    assert publisher.get_data("scan")["y"] == ["1"]
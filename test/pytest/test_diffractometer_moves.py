@@ -0,0 +1,100 @@
+import time
+
+import gevent
+import pytest
+
+REPORT_DELAY = 0.05
+
+
+def _target_positions(diffractometer, delta):
+    return dict(
+        (role, diffractometer.motor_hwobj_dict[role].get_value() + delta)
+        for role in ("phiy", "phiz", "sampx", "sampy")
+    )
+
+
+def test_move_motors_concurrently(beamline):
+    diffractometer = beamline.diffractometer
+    diffractometer.conflicting_motors = [("sampx", "sampy")]
+    positions = _target_positions(diffractometer, 0.5)
+
+    diffractometer.move_motors(positions, concurrent=True)
+
+    for role, position in positions.items():
+        motor = diffractometer.motor_hwobj_dict[role]
+        assert motor.is_ready()
+        assert motor.get_value() == pytest.approx(position)
+
+
+def test_move_motors_groups(beamline):
+    diffractometer = beamline.diffractometer
+    diffractometer.conflicting_motors = [("sampx", "sampy")]
+    groups = diffractometer.get_motor_move_groups(
+        {"phiy": 1, "sampy": 2, "sampx": 3, "unknown": 4}
+    )
+    assert [[move[0] for move in group] for group in groups] == [
+        ["sampx", "sampy"],
+        ["phiy"],
+    ]
+
+
+def test_move_motors_concurrently_timeout(beamline):
+    diffractometer = beamline.diffractometer
+    motor = diffractometer.motor_hwobj_dict["phiy"]
+    velocity = motor.get_velocity()
+    motor.set_velocity(0.1)
+    try:
+        with pytest.raises(RuntimeError) as excinfo:
+            diffractometer.move_motors_concurrently(
+                {"phiy": motor.get_value() + 1, "phiz": 0.2}, timeout=0.3
+            )
+        assert "phiy: timeout" in str(excinfo.value)
+        assert "phiz" not in str(excinfo.value)
+    finally:
+        motor.set_velocity(velocity)
+
+
+class LateMotorStandIn(object):
+    """Motor reporting its move some time after it was started"""
+
+    def __init__(self, name, moves):
+        self._name = name
+        self.moves = moves
+        self.busy = False
+
+    def name(self):
+        return self._name
+
+    def _move(self):
+        gevent.sleep(REPORT_DELAY)
+        self.busy = True
+        self.moves.append((self._name, "start"))
+        gevent.sleep(REPORT_DELAY)
+        self.moves.append((self._name, "end"))
+        self.busy = False
+
+    def set_value(self, value, timeout=None):
+        gevent.spawn(self._move)
+
+    def wait_ready(self, timeout=None):
+        while self.busy:
+            gevent.sleep(0.001)
+
+
+def test_move_motors_concurrently_late_state(beamline, monkeypatch):
+    diffractometer = beamline.diffractometer
+    moves = []
+    for role in ("sampx", "sampy"):
+        monkeypatch.setitem(
+            diffractometer.motor_hwobj_dict, role, LateMotorStandIn(role, moves)
+        )
+    diffractometer.conflicting_motors = [("sampx", "sampy")]
+    monkeypatch.setattr(diffractometer, "delay_state_polling", 2 * REPORT_DELAY)
+
+    diffractometer.move_motors({"sampx": 1, "sampy": 2}, concurrent=True)
+    # sampy waits for the move of sampx, move_motors for sampy to start
+    assert moves[:3] == [
+        ("sampx", "start"),
+        ("sampx", "end"),
+        ("sampy", "start"),
+    ]
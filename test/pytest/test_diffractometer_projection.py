@@ -0,0 +1,156 @@
+import math
+
+import numpy
+import pytest
+
+from HardwareRepository.HardwareObjects import sample_centring
+from HardwareRepository.HardwareObjects.GenericDiffractometer import (
+    GenericDiffractometer,
+)
+
+
+class CountingMotor(sample_centring.CentringMotor):
+    """CentringMotor counting the position reads"""
+
+    reads = 0
+
+    def get_value(self):
+        CountingMotor.reads += 1
+        return self.motor.get_value()
+
+
+@pytest.fixture
+def diffractometer(beamline, monkeypatch):
+    diffractometer = beamline.diffractometer
+    motors = diffractometer.motor_hwobj_dict
+    diffractometer.use_sample_centring = True
+    diffractometer.centring_phi = CountingMotor(motors["phi"], direction=-1)
+    diffractometer.centring_phiz = CountingMotor(motors["phiz"])
+    diffractometer.centring_phiy = CountingMotor(motors["phiy"], direction=-1)
+    diffractometer.centring_sampx = CountingMotor(motors["sampx"])
+    diffractometer.centring_sampy = CountingMotor(motors["sampy"])
+    diffractometer.beam_position = [320, 240]
+
+    def update_zoom_calibration():
+        diffractometer.pixels_per_mm_x = 2000.0
+        diffractometer.pixels_per_mm_y = 2100.0
+
+    monkeypatch.setattr(
+        diffractometer, "update_zoom_calibration", update_zoom_calibration
+    )
+    diffractometer.invalidate_position_snapshot()
+    return diffractometer
+
+
+def _reference_to_screen(diffractometer, cpos):
+    """Projection as computed before the position snapshot"""
+    phi_angle = math.radians(
+        diffractometer.centring_phi.direction * diffractometer.centring_phi.get_value()
+    )
+    positions = {}
+    for role in ("sampx", "sampy", "phiy", "phiz"):
+        motor = getattr(diffractometer, "centring_" + role)
+        positions[role] = motor.direction * (cpos[role] - motor.get_value())
+    rot_matrix = numpy.array(
+        [
+            [math.cos(phi_angle), -math.sin(phi_angle)],
+            [math.sin(phi_angle), math.cos(phi_angle)],
+        ]
+    )
+    inv_rot_matrix = numpy.linalg.inv(rot_matrix)
+    dx, dy = (
+        numpy.dot(numpy.array([positions["sampx"], positions["sampy"]]), inv_rot_matrix)
+        * diffractometer.pixels_per_mm_x
+    )
+    x = positions["phiy"] * diffractometer.pixels_per_mm_x
+    x += diffractometer.beam_position[0]
+    y = dy + positions["phiz"] * diffractometer.pixels_per_mm_y
+    y += diffractometer.beam_position[1]
+    return x, y
+
+
+def _centred_positions(count):
+    random = numpy.random.RandomState(0)
+    return [
+        dict(zip(("sampx", "sampy", "phiy", "phiz"), random.uniform(-0.2, 0.2, 4)))
+        for _ in range(count)
+    ]
+
+
+def test_motor_positions_to_screen_snapshot(diffractometer):
+    cpos_list = _centred_positions(50)
+    CountingMotor.reads = 0
+    screen_positions = [
+        GenericDiffractometer.motor_positions_to_screen(diffractometer, cpos)
+        for cpos in cpos_list
+    ]
+    # one read per motor for all the positions
+    assert CountingMotor.reads == 5
+
+    for cpos, screen_position in zip(cpos_list, screen_positions):
+        assert screen_position == pytest.approx(
+            _reference_to_screen(diffractometer, cpos)
+        )
+
+
+def test_position_snapshot_invalidated_on_move(diffractometer):
+    cpos = _centred_positions(1)[0]
+    GenericDiffractometer.motor_positions_to_screen(diffractometer, cpos)
+    version = diffractometer.get_position_snapshot()["version"]
+
+    phi = diffractometer.motor_hwobj_dict["phi"]
+    phi.wait_ready()
+    phi.set_value(phi.get_value() + 30, timeout=None)
+
+    snapshot = diffractometer.get_position_snapshot()
+    assert snapshot["version"] > version
+    assert GenericDiffractometer.motor_positions_to_screen(
+        diffractometer, cpos
+    ) == pytest.approx(_reference_to_screen(diffractometer, cpos))
+
+
+def test_motor_positions_to_screen_batch(diffractometer, monkeypatch):
+    # use the GenericDiffractometer projection
+    monkeypatch.delattr(type(diffractometer), "motor_positions_to_screen")
+    cpos_list = _centred_positions(100)
+    positions = numpy.array(
+        [
+            [cpos[name] for name in diffractometer.SCREEN_PROJECTION_MOTORS]
+            for cpos in cpos_list
+        ]
+    )
+    screen_positions = diffractometer.motor_positions_to_screen_batch(positions)
+
+    assert screen_positions.shape == (100, 2)
+    for cpos, screen_position in zip(cpos_list, screen_positions):
+        assert screen_position == pytest.approx(
+            _reference_to_screen(diffractometer, cpos)
+        )
+
+
+def test_motor_positions_to_screen_batch_subclass(diffractometer):
+    # DiffractometerMockup has its own projection
+    with pytest.raises(NotImplementedError):
+        diffractometer.motor_positions_to_screen_batch([[0, 0, 0, 0]])
+
+
+def test_position_snapshot_current_calibration(diffractometer, monkeypatch):
+    cpos = _centred_positions(1)[0]
+    GenericDiffractometer.motor_positions_to_screen(diffractometer, cpos)
+
+    # calibration and beam position changed without any signal
+    def update_zoom_calibration():
+        diffractometer.pixels_per_mm_x = 4000.0
+        diffractometer.pixels_per_mm_y = 4200.0
+
+    monkeypatch.setattr(
+        diffractometer, "update_zoom_calibration", update_zoom_calibration
+    )
+    diffractometer.beam_position = [300, 200]
+    CountingMotor.reads = 0
+    screen_position = GenericDiffractometer.motor_positions_to_screen(
+        diffractometer, cpos
+    )
+
+    assert CountingMotor.reads == 0
+    assert screen_position == pytest.approx(_reference_to_screen(diffractometer, cpos))
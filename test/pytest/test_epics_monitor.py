@@ -0,0 +1,116 @@
+import sys
+import types
+
+import gevent
+import gevent.monkey
+
+from HardwareRepository.Command import Epics
+
+_start_new_thread = gevent.monkey.get_original(
+    "thread" if sys.version_info[0] < 3 else "_thread", "start_new_thread"
+)
+_sleep = gevent.monkey.get_original("time", "sleep")
+
+
+class FakePV(object):
+    """epics.PV stand-in; set_value fires the monitor callbacks"""
+
+    def __init__(self, pvname, auto_monitor=True):
+        self.pvname = pvname
+        self.value = 0
+        self.callbacks = []
+
+    def connect(self):
+        return True
+
+    def get(self, as_string=False):
+        return str(self.value) if as_string else self.value
+
+    def put(self, value, wait=False):
+        self.set_value(value)
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def set_value(self, value):
+        self.value = value
+        for callback in self.callbacks:
+            callback(pvname=self.pvname, value=value, char_value=str(value))
+
+
+class Listener(object):
+    def __init__(self):
+        self.values = []
+
+    def update(self, value):
+        self.values.append(value)
+
+
+def test_monitor_values_from_ca_thread(monkeypatch):
+    monkeypatch.setattr(
+        Epics, "epics", types.SimpleNamespace(PV=FakePV), raising=False
+    )
+    channel = Epics.EpicsChannel("test", "TEST:PV", polling="events")
+    listener = Listener()
+    channel.connect_signal("update", listener.update)
+    values = listener.values
+    pv = channel.command.pv
+
+    def ca_thread():
+        for i in range(1, 1001):
+            pv.set_value(i)
+            if i % 100 == 0:
+                _sleep(0.001)
+
+    _start_new_thread(ca_thread, ())
+    with gevent.Timeout(5):
+        while not values or values[-1] != 1000:
+            gevent.sleep(0.01)
+
+    # values are coalesced, but never delivered out of order
+    assert len(values) <= 1001
+    assert values == sorted(values)
+
+
+def test_monitor_read_as_str(monkeypatch):
+    monkeypatch.setattr(
+        Epics, "epics", types.SimpleNamespace(PV=FakePV), raising=False
+    )
+    command = Epics.EpicsCommand("test", "TEST:PV", read_as_str=True)
+    listener = Listener()
+    command.monitor(listener.update)
+    command.pv.set_value(42)
+    gevent.sleep(0.05)
+    assert listener.values[-1] == "42"
+
+
+class CAThreadPV(FakePV):
+    """FakePV calling a new callback from a CA thread, as soon as it is added"""
+
+    def add_callback(self, callback):
+        FakePV.add_callback(self, callback)
+        done = Epics._allocate_lock()
+        done.acquire()
+
+        def ca_thread():
+            self.value = 7
+            callback(pvname=self.pvname, value=7, char_value="7")
+            done.release()
+
+        _start_new_thread(ca_thread, ())
+        done.acquire()
+
+
+def test_first_value_from_ca_thread(monkeypatch):
+    # no dispatcher yet: the first value comes from the CA thread
+    monkeypatch.setattr(Epics, "_monitor_dispatcher", None)
+    monkeypatch.setattr(
+        Epics, "epics", types.SimpleNamespace(PV=CAThreadPV), raising=False
+    )
+    command = Epics.EpicsCommand("test", "TEST:PV")
+    listener = Listener()
+    command.monitor(listener.update)
+
+    with gevent.Timeout(5):
+        while 7 not in listener.values:
+            gevent.sleep(0.01)
@@ -0,0 +1,120 @@
+import time
+
+import gevent
+import gevent.server
+import pytest
+
+from HardwareRepository.Command.exporter.StandardClient import (
+    SocketError,
+    StreamParser,
+    TimeoutError,
+)
+from HardwareRepository.Command.exporter.ExporterClient import ExporterClient
+from HardwareRepository.Command.exporter.StandardClient import PROTOCOL
+
+STX = b"\x02"
+ETX = b"\x03"
+
+
+def test_stream_parser_split_frames():
+    parser = StreamParser()
+    assert parser.feed(b"garbage" + STX + b"RET:1" + ETX + STX + b"RET") == [b"RET:1"]
+    assert parser.feed(b":2") == []
+    assert parser.feed(ETX + STX + b"EVT:a" + ETX) == [b"RET:2", b"EVT:a"]
+
+
+def test_stream_parser_large_frame():
+    parser = StreamParser()
+    payload = b"RET:" + b"1\x1f" * 100000
+    frame = STX + payload + ETX
+    messages = []
+    for i in range(0, len(frame), 4096):
+        messages.extend(parser.feed(frame[i : i + 4096]))
+    assert messages == [payload]
+
+
+class ExporterStandIn(object):
+    """Reply to READ <prop> with RET:<prop>, after a fixed latency,
+    and never to READ Lost
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.server = gevent.server.StreamServer(("127.0.0.1", 0), self.handle)
+        self.server.start()
+
+    def handle(self, sock, address):
+        parser = StreamParser()
+        while True:
+            data = sock.recv(4096)
+            if not data:
+                break
+            for msg in parser.feed(data):
+                prop = msg.split(b" ")[1]
+                if prop == b"Lost":
+                    continue
+                gevent.spawn_later(
+                    self.latency, sock.sendall, STX + b"RET:" + prop + ETX
+                )
+
+
+def test_exporter_pipelined_reads():
+    stand_in = ExporterStandIn(0.1)
+    client = ExporterClient(
+        "127.0.0.1", stand_in.server.server_port, PROTOCOL.STREAM, 3, 1
+    )
+    try:
+        props = ["Prop%d" % i for i in range(10)]
+        t0 = time.time()
+        reads = [gevent.spawn(client.read_property, prop) for prop in props]
+        gevent.joinall(reads, raise_error=True)
+        elapsed = time.time() - t0
+
+        assert [read.value for read in reads] == props
+        # the reads are not serialized behind each other
+        assert elapsed < 0.5
+    finally:
+        client.disconnect()
+        stand_in.server.stop()
+
+
+def test_exporter_late_reply_is_not_misrouted():
+    stand_in = ExporterStandIn(0.2)
+    client = ExporterClient(
+        "127.0.0.1", stand_in.server.server_port, PROTOCOL.STREAM, 3, 1
+    )
+    try:
+        try:
+            client.read_property("Slow", timeout=0.05)
+        except TimeoutError:
+            pass
+        else:
+            assert False
+        assert client.read_property("Fast") == "Fast"
+    finally:
+        client.disconnect()
+        stand_in.server.stop()
+
+
+def test_exporter_lost_reply():
+    stand_in = ExporterStandIn(0.01)
+    client = ExporterClient(
+        "127.0.0.1", stand_in.server.server_port, PROTOCOL.STREAM, 3, 1
+    )
+    try:
+        pending_read = gevent.spawn(client.read_property, "Lost", timeout=1)
+        gevent.sleep(0)
+        with pytest.raises(TimeoutError):
+            client.read_property("Lost", timeout=0.05)
+        # the other pending requests fail, the next ones reconnect
+        with pytest.raises(SocketError):
+            pending_read.get(timeout=0.5)
+        assert not client.is_connected()
+        assert [client.read_property("Prop%d" % i) for i in range(3)] == [
+            "Prop0",
+            "Prop1",
+            "Prop2",
+        ]
+    finally:
+        client.disconnect()
+        stand_in.server.stop()
@@ -0,0 +1,135 @@
+import time
+
+import gevent
+import gevent.server
+
+from HardwareRepository.Command.exporter.StandardClient import StreamParser
+from HardwareRepository.HardwareObjects.ExporterMotor import ExporterMotor
+
+STX = b"\x02"
+ETX = b"\x03"
+
+
+class MotorStandIn(object):
+    """Exporter stand-in for one motor: a move of MOVE_TIME is started by
+    writing the position, and the state changes are sent as events
+    """
+
+    MOVE_TIME = 0.2
+
+    def __init__(self):
+        self.properties = {
+            "State": "Ready",
+            "HardwareState": "Ready",
+            "PhiPosition": "0",
+            "PhiState": "Ready",
+        }
+        self.requests = 0
+        self.start_delay = 0
+        self.move_end_time = None
+        self.clients = []
+        self.server = gevent.server.StreamServer(("127.0.0.1", 0), self.handle)
+        self.server.start()
+
+    @property
+    def address(self):
+        return "127.0.0.1:%d" % self.server.server_port
+
+    def handle(self, sock, address):
+        self.clients.append(sock)
+        parser = StreamParser()
+        while True:
+            data = sock.recv(4096)
+            if not data:
+                break
+            for msg in parser.feed(data):
+                self.requests += 1
+                cmd, _, args = msg.decode().partition(" ")
+                if cmd == "READ":
+                    reply = "RET:" + self.properties[args]
+                elif cmd == "WRTE":
+                    prop, value = args.split(" ")
+                    reply = "RET:"
+                    gevent.spawn(self.move, value)
+                else:
+                    reply = "NULL"
+                sock.sendall(STX + reply.encode() + ETX)
+
+    def set_state(self, name, value):
+        self.properties[name] = value
+        event = "EVT:%s\t%s\t%d" % (name, value, time.time() * 1000)
+        for sock in self.clients:
+            sock.sendall(STX + event.encode() + ETX)
+
+    def move(self, value):
+        gevent.sleep(self.start_delay)
+        self.set_state("State", "Running")
+        self.set_state("PhiState", "Moving")
+        gevent.sleep(self.MOVE_TIME)
+        self.properties["PhiPosition"] = value
+        self.move_end_time = time.time()
+        self.set_state("PhiState", "Ready")
+        self.set_state("State", "Ready")
+
+
+def _make_motor(stand_in, ready_poll_interval=None):
+    motor = ExporterMotor("phi")
+    motor.set_property("actuator_name", "Phi")
+    motor.set_property("exporter_address", stand_in.address)
+    if ready_poll_interval is not None:
+        motor.set_property("ready_poll_interval", ready_poll_interval)
+    motor.init()
+    return motor
+
+
+def test_wait_move_on_state_events():
+    stand_in = MotorStandIn()
+    try:
+        motor = _make_motor(stand_in, 1)
+        gevent.sleep(0.1)
+        assert motor._app_ready_event.is_set()
+
+        motor.set_value(10)
+        requests = stand_in.requests
+        motor.wait_move(timeout=3)
+        latency = time.time() - stand_in.move_end_time
+
+        # no polling during the move
+        assert stand_in.requests == requests
+        assert latency < 0.05
+        assert motor.get_state() == motor.STATES.READY
+    finally:
+        stand_in.server.stop()
+
+
+def test_wait_move_without_events():
+    stand_in = MotorStandIn()
+    try:
+        motor = _make_motor(stand_in)
+        gevent.sleep(0.1)
+        # the state events are lost
+        stand_in.clients = []
+        motor.set_value(10)
+        motor.wait_move(timeout=3)
+        assert time.time() - stand_in.move_end_time < 0.1
+    finally:
+        stand_in.server.stop()
+
+
+def test_ready_states_before_move_start():
+    stand_in = MotorStandIn()
+    try:
+        motor = _make_motor(stand_in, 1)
+        gevent.sleep(0.1)
+        # the move is reported late
+        stand_in.start_delay = 0.05
+        motor.set_value(10)
+        # "Ready" states, from before the move started
+        motor.get_state()
+        motor._update_ready()
+        assert not motor._app_ready_event.is_set()
+
+        motor.wait_move(timeout=3)
+        assert stand_in.move_end_time is not None
+    finally:
+        stand_in.server.stop()
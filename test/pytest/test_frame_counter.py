@@ -0,0 +1,26 @@
+from HardwareRepository.HardwareObjects.abstract.AbstractVideoDevice import (
+    FrameCounter,
+)
+
+
+def test_frame_counter_skips_unchanged_frames():
+    frame_counter = FrameCounter()
+    assert [frame_counter.update(n) for n in (1, 1, 2, 5, 5, 6)] == [
+        True,
+        False,
+        True,
+        True,
+        False,
+        True,
+    ]
+    statistics = frame_counter.get_statistics()
+    assert statistics["frame_number"] == 6
+    assert statistics["frames"] == 4
+    assert statistics["dropped_frames"] == 2
+
+
+def test_frame_counter_unknown_frame_number():
+    frame_counter = FrameCounter()
+    assert frame_counter.update(None)
+    assert frame_counter.update(None)
+    assert frame_counter.get_statistics()["frames"] == 2
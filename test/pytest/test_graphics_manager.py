@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("gui.utils")
+
+from HardwareRepository.HardwareObjects import QtGraphicsLib
+from HardwareRepository.HardwareObjects.QtGraphicsManager import QtGraphicsManager
+
+
+class CentredPositionStandIn(object):
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+    def as_dict(self):
+        return {"x": self.x, "y": self.y}
+
+    def set_motor_pos_delta(self, delta):
+        pass
+
+
+class PointStandIn(object):
+    def __init__(self, x, y):
+        self.cpos = CentredPositionStandIn(x, y)
+        self.start_position = None
+
+    def get_centred_position(self):
+        return self.cpos
+
+    def set_start_position(self, x, y):
+        self.start_position = (x, y)
+
+
+class GridStandIn(object):
+    def __init__(self, x, y):
+        self.cpos = CentredPositionStandIn(x, y)
+        self.corners = [{"x": x + i, "y": y - i} for i in range(1, 5)]
+        self.center_coord = self.corner_coord = None
+
+    def get_centred_position(self):
+        return self.cpos
+
+    def get_motor_pos_corner(self):
+        return self.corners
+
+    def set_center_coord(self, center_coord):
+        self.center_coord = center_coord
+
+    def set_corner_coord(self, corner_coord):
+        self.corner_coord = corner_coord
+
+    def set_projection_mode(self, mode):
+        pass
+
+
+def test_shapes_screen_positions_in_scene_order(monkeypatch):
+    monkeypatch.setattr(QtGraphicsLib, "GraphicsItemPoint", PointStandIn)
+    monkeypatch.setattr(QtGraphicsLib, "GraphicsItemGrid", GridStandIn)
+    # grids before and between the points
+    shapes = [
+        GridStandIn(10, 20),
+        PointStandIn(1, 2),
+        GridStandIn(30, 40),
+        PointStandIn(3, 4),
+    ]
+    diffractometer = SimpleNamespace(
+        motor_positions_to_screen=lambda cpos: (cpos["x"] * 2, cpos["y"] * 2),
+        get_positions=dict,
+    )
+    manager = SimpleNamespace(
+        get_shapes=lambda: shapes, diffractometer_hwobj=diffractometer
+    )
+    QtGraphicsManager.update_shapes_screen_positions(manager)
+
+    assert shapes[1].start_position == (2, 4)
+    assert shapes[3].start_position == (6, 8)
+    for grid in shapes[0], shapes[2]:
+        assert grid.center_coord == (grid.cpos.x * 2, grid.cpos.y * 2)
+        assert grid.corner_coord == [
+            (corner["x"] * 2, corner["y"] * 2) for corner in grid.corners
+        ]
@@ -0,0 +1,98 @@
+import sys
+import types
+
+import pytest
+
+from HardwareRepository import HardwareObjectFileParser
+from HardwareRepository.BaseHardwareObjects import HardwareObject
+
+TEMPLATE_MODULE = """
+template:
+  <object class="TemplatedObject">
+    <specversion>host:spec</specversion>
+  </object>
+"""
+
+MATCHING_XML = """<object class="%s">
+  <username>templated</username>
+  <specversion>host:spec</specversion>
+</object>"""
+
+MISMATCHING_XML = """<object class="%s">
+  <username>templated</username>
+</object>"""
+
+
+@pytest.fixture
+def templated_module(monkeypatch):
+    module = types.ModuleType("TemplatedObject", TEMPLATE_MODULE)
+
+    class TemplatedObject(HardwareObject):
+        pass
+
+    module.TemplatedObject = TemplatedObject
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setattr(HardwareObjectFileParser, "_template_structures", {})
+
+    retrieved = []
+    get_xml_structure = HardwareObjectFileParser.get_xml_structure
+
+    def counting_get_xml_structure(xml_source):
+        retrieved.append(xml_source)
+        return get_xml_structure(xml_source)
+
+    monkeypatch.setattr(
+        HardwareObjectFileParser, "get_xml_structure", counting_get_xml_structure
+    )
+    return module, retrieved
+
+
+def test_template_compiled_once(templated_module):
+    module, retrieved = templated_module
+    for i in range(5):
+        hwobj = HardwareObjectFileParser.parse_string(
+            MATCHING_XML % module.__name__, "templated%d" % i
+        )
+        assert hwobj.username == "templated"
+
+    # one template, plus one structure per document
+    assert len(retrieved) == 6
+
+
+def test_template_mismatch(templated_module):
+    module, _ = templated_module
+    assert (
+        HardwareObjectFileParser.parse_string(MISMATCHING_XML % module.__name__, "bad")
+        is None
+    )
+    assert (
+        HardwareObjectFileParser.parse_string(MATCHING_XML % module.__name__, "good")
+        is not None
+    )
+
+
+def test_nested_parsing(templated_module, monkeypatch):
+    """A parse started while instantiating the object of another one"""
+    module, _ = templated_module
+    results = []
+
+    class NestingObject(module.TemplatedObject):
+        def __init__(self, name):
+            module.TemplatedObject.__init__(self, name)
+            if name == "outer":
+                results.append(
+                    HardwareObjectFileParser.parse_string(
+                        MISMATCHING_XML % module.__name__, "inner"
+                    )
+                )
+
+    nesting_module = types.ModuleType(
+        "NestingObject", TEMPLATE_MODULE.replace("TemplatedObject", "NestingObject")
+    )
+    nesting_module.NestingObject = NestingObject
+    monkeypatch.setitem(sys.modules, nesting_module.__name__, nesting_module)
+    outer = HardwareObjectFileParser.parse_string(
+        MATCHING_XML % nesting_module.__name__, "outer"
+    )
+    assert outer is not None
+    assert results == [None]
@@ -0,0 +1,214 @@
+import os
+import time
+
+import gevent
+import pytest
+
+from HardwareRepository import HardwareRepository as HWR
+from HardwareRepository.BaseHardwareObjects import ConfiguredObject
+
+from .conftest import HWR_DIR
+
+INIT_TIME = 0.05
+
+# (role, "start" or "end") of the Recorder._init calls
+EVENTS = []
+
+
+class Recorder(ConfiguredObject):
+    """Yaml-configured object recording its initialisation"""
+
+    def _init(self):
+        EVENTS.append((self.name, "start"))
+        gevent.sleep(INIT_TIME)
+        EVENTS.append((self.name, "end"))
+
+
+class ContainerStandIn(object):
+    def __init__(self, roles):
+        for role in roles:
+            setattr(self, role, None)
+
+    def replace_object(self, role, new_object):
+        setattr(self, role, new_object)
+
+
+def _write(directory, file_name, text):
+    with open(os.path.join(directory, file_name), "w") as fp0:
+        fp0.write(text)
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    """Repository client on tmp_path, with recorder objects r0.yml - r5.yml"""
+    del EVENTS[:]
+    for i in range(6):
+        _write(
+            str(tmp_path),
+            "r%d.yml" % i,
+            "_initialise_class:\n    class: %s.Recorder\n" % __name__,
+        )
+    client = HWR.__HardwareRepositoryClient([str(tmp_path)])
+    client.connect()
+    monkeypatch.setattr(HWR, "_instance", client)
+    return client
+
+
+def _load(objects, concurrency, dependencies=None):
+    container = ContainerStandIn(objects)
+    table = []
+    HWR._load_contained_objects(
+        container, "ContainerStandIn", objects, table, concurrency, dependencies
+    )
+    return container, table
+
+
+def _starts(role):
+    return EVENTS.index((role, "start"))
+
+
+def _ends(role):
+    return EVENTS.index((role, "end"))
+
+
+def test_dependency_graph(repository, tmp_path):
+    directory = str(tmp_path)
+    # chain a -> b -> c, through yaml contents and xml references
+    _write(directory, "a.yml", "_objects:\n    child: b.xml\n")
+    _write(
+        directory, "b.xml", '<object class="B"><object href="/c" role="c"/></object>'
+    )
+    _write(directory, "c.xml", '<object class="C"></object>')
+    # cycle d <-> e
+    _write(directory, "d.yml", "_objects:\n    child: e.yml\n")
+    _write(directory, "e.yml", "_objects:\n    child: d.yml\n")
+
+    objects = {
+        "a": "a.yml",
+        "b": "b.xml",
+        "c": "c.xml",
+        "d": "d.yml",
+        "e": "e.yml",
+        "f": "r0.yml",
+    }
+    graph = repository.get_dependency_graph(objects, {"f": ["a"]})
+    assert graph == {
+        "a": {"b", "c"},
+        "b": {"c"},
+        "c": set(),
+        "d": {"e"},
+        "e": {"d"},
+        "f": {"a"},
+    }
+
+
+def test_concurrent_load_matches_serial(repository):
+    objects = dict(("r%d" % i, "r%d.yml" % i) for i in range(6))
+    dependencies = {"r1": ["r0"], "r2": ["r1"], "r3": ["r4"], "r4": ["r3"]}
+
+    start = time.time()
+    serial_container, serial_table = _load(objects, 1, dependencies)
+    serial_time = time.time() - start
+    serial_events = list(EVENTS)
+
+    del EVENTS[:]
+    start = time.time()
+    container, table = _load(objects, 4, dependencies)
+    concurrent_time = time.time() - start
+
+    # same objects and report, in configuration order
+    assert [row[:3] for row in table] == [row[:3] for row in serial_table]
+    for role in objects:
+        assert isinstance(getattr(container, role), Recorder)
+        assert isinstance(getattr(serial_container, role), Recorder)
+    assert sorted(EVENTS) == sorted(serial_events)
+
+    # the chain r0 -> r1 -> r2 is loaded in order
+    assert _ends("r0") < _starts("r1") and _ends("r1") < _starts("r2")
+    # the r3 <-> r4 cycle is loaded one object at a time
+    assert _ends("r3") < _starts("r4")
+    # independent objects are loaded together
+    assert _starts("r5") < _ends("r0")
+    assert concurrent_time < serial_time - INIT_TIME / 2
+
+
+def test_failing_object_releases_waiters(repository, monkeypatch):
+    def do_load_hardware_object(hwobj_name):
+        gevent.sleep(INIT_TIME)
+        raise RuntimeError("cannot load %s" % hwobj_name)
+
+    monkeypatch.setattr(
+        repository, "_do_load_hardware_object", do_load_hardware_object
+    )
+    loading = gevent.spawn(repository.get_hardware_object, "/bad")
+    gevent.sleep(0)
+    waiters = [gevent.spawn(repository.get_hardware_object, "/bad") for _ in range(3)]
+
+    with gevent.Timeout(5):
+        gevent.joinall([loading] + waiters)
+    assert isinstance(loading.exception, RuntimeError)
+    assert [waiter.value for waiter in waiters] == [None, None, None]
+    assert all(waiter.successful() for waiter in waiters)
+    assert not repository._loading_hardware_objects
+    assert not repository._waiting_greenlets
+
+
+def test_circular_wait_does_not_deadlock(repository, monkeypatch):
+    # /a and /b, loaded in parallel, get each other while loading
+    references = {"/a": "/b", "/b": "/a"}
+
+    def do_load_hardware_object(hwobj_name):
+        gevent.sleep(INIT_TIME)
+        reference = references.pop(hwobj_name, None)
+        if reference:
+            repository.get_hardware_object(reference)
+        hwobj = Recorder(hwobj_name)
+        repository.hardware_objects[hwobj_name] = hwobj
+        return hwobj
+
+    monkeypatch.setattr(
+        repository, "_do_load_hardware_object", do_load_hardware_object
+    )
+    greenlets = [gevent.spawn(repository.get_hardware_object, name) for name in "ab"]
+
+    with gevent.Timeout(5):
+        gevent.joinall(greenlets, raise_error=True)
+    assert [greenlet.value.name for greenlet in greenlets] == ["/a", "/b"]
+    assert not repository._waiting_greenlets
+
+
+def _load_mockup(configuration_directory, monkeypatch):
+    monkeypatch.setattr(HWR, "_instance", None)
+    monkeypatch.setattr(HWR, "beamline", None)
+    HWR.init_hardware_repository(
+        os.path.pathsep.join(
+            (
+                configuration_directory,
+                os.path.join(HWR_DIR, "configuration/mockup"),
+                os.path.join(HWR_DIR, "configuration/mockup/test"),
+            )
+        )
+    )
+    return HWR.beamline
+
+
+def test_concurrent_mockup_load(tmp_path, monkeypatch):
+    config_file = os.path.join(
+        HWR_DIR, "configuration/mockup/test", HWR.BEAMLINE_CONFIG_FILE
+    )
+    with open(config_file) as fp0:
+        config = fp0.read()
+    assert "#_load_concurrency: 8" in config
+    _write(
+        str(tmp_path),
+        HWR.BEAMLINE_CONFIG_FILE,
+        config.replace("#_load_concurrency: 8", "_load_concurrency: 8"),
+    )
+
+    serial_objects = _load_mockup(str(tmp_path / "none"), monkeypatch)._objects
+    objects = _load_mockup(str(tmp_path), monkeypatch)._objects
+
+    assert list(objects) == list(serial_objects)
+    for role, hwobj in objects.items():
+        assert type(hwobj) is type(serial_objects[role]), role
+    assert objects["diffractometer"] is not None
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("suds")
+
+from suds.sudsobject import Factory
+
+from HardwareRepository.HardwareObjects import ISPyBClient
+
+URL = "http://ispyb/ToolsForCollectionWebService?wsdl"
+
+
+class FactoryStandIn(object):
+    """suds client factory, creating nested complex types"""
+
+    def __init__(self):
+        self.created = []
+
+    def create(self, type_name):
+        self.created.append(type_name)
+        beamline_setup = Factory.object("beamLineSetup3VO", {"undulatorType1": None})
+        obj = Factory.object(
+            type_name,
+            {
+                "dataCollectionId": None,
+                "beamLineSetup": beamline_setup,
+                "imagePrefixes": [],
+            },
+        )
+        obj.__metadata__.sxtype = type_name
+        return obj
+
+
+class ClientStandIn(object):
+    def __init__(self, url, cache=None):
+        self.wsdl = SimpleNamespace(url=url)
+        self.factory = FactoryStandIn()
+
+
+@pytest.fixture
+def suds_client(monkeypatch):
+    monkeypatch.setattr(ISPyBClient, "Client", ClientStandIn)
+    monkeypatch.setattr(ISPyBClient, "_SUDS_CLIENTS", {})
+    monkeypatch.setattr(ISPyBClient, "_SUDS_PROTOTYPES", {})
+    return ISPyBClient.get_suds_client(URL)
+
+
+def test_suds_client_built_once_per_url(suds_client):
+    assert ISPyBClient.get_suds_client(URL) is suds_client
+    other_client = ISPyBClient.get_suds_client(URL.replace("Collection", "Shipping"))
+    assert other_client is not suds_client
+    assert ISPyBClient._SUDS_CLIENTS == {
+        URL: suds_client,
+        other_client.wsdl.url: other_client,
+    }
+
+
+def test_suds_objects_independent(suds_client):
+    obj1 = ISPyBClient.create_suds_object(suds_client, "dataCollectionWS3VO")
+    obj2 = ISPyBClient.create_suds_object(suds_client, "dataCollectionWS3VO")
+
+    # the type is built once, then copied
+    assert suds_client.factory.created == ["dataCollectionWS3VO"]
+    assert obj1.__class__ is obj2.__class__
+    assert obj2.__metadata__.sxtype == "dataCollectionWS3VO"
+
+    obj1.dataCollectionId = 1
+    obj1.beamLineSetup.undulatorType1 = "U21"
+    obj1.imagePrefixes.append("prefix")
+    assert obj2.dataCollectionId is None
+    assert obj2.beamLineSetup.undulatorType1 is None
+    assert obj2.imagePrefixes == []
+    obj3 = ISPyBClient.create_suds_object(suds_client, "dataCollectionWS3VO")
+    assert obj3.dataCollectionId is None and obj3.imagePrefixes == []
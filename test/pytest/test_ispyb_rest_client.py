@@ -0,0 +1,141 @@
+import socket
+import time
+from types import SimpleNamespace
+
+import gevent.pywsgi
+import pytest
+
+from HardwareRepository import HardwareRepository as HWR
+
+pytest.importorskip("requests")
+
+from HardwareRepository.HardwareObjects.ISPyBRestClient import ISPyBRestClient
+
+
+class _NoDelayServer(gevent.pywsgi.WSGIServer):
+    """WSGI server not delaying the response body after the headers"""
+
+    def handle(self, sock, address):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        gevent.pywsgi.WSGIServer.handle(self, sock, address)
+
+
+class LimsStandIn(object):
+    """ISPyB REST stand-in serving thumbnails, with an ETag, after a delay"""
+
+    DELAY = 0.01
+
+    def __init__(self):
+        self.connections = set()
+        self.downloads = 0
+        self.not_modified = 0
+        self.server = _NoDelayServer(("127.0.0.1", 0), self.application, log=None)
+        self.server.start()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d/" % self.server.server_port
+
+    def application(self, environ, start_response):
+        self.connections.add(environ["REMOTE_PORT"])
+        gevent.sleep(self.DELAY)
+        path = environ["PATH_INFO"]
+        if path.startswith("/authenticate"):
+            start_response("200 OK", [("Content-Type", "application/json")])
+            return [b'{"token": "token"}']
+
+        image_id = path.split("/")[-2]
+        etag = '"%s"' % image_id
+        if environ.get("HTTP_IF_NONE_MATCH") == etag:
+            self.not_modified += 1
+            start_response("304 Not Modified", [("ETag", etag)])
+            return [b""]
+
+        self.downloads += 1
+        data = image_id.encode() * 1000
+        start_response(
+            "200 OK",
+            [
+                ("Content-Type", "image/jpeg"),
+                ("Content-Length", str(len(data))),
+                ("Content-Disposition", "inline; filename=%s.jpeg" % image_id),
+                ("ETag", etag),
+            ],
+        )
+        return [data]
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    session = SimpleNamespace(
+        beamline_name="BL", proposal_code="mx", proposal_number="1"
+    )
+    monkeypatch.setattr(HWR, "beamline", SimpleNamespace(session=session))
+    stand_in = LimsStandIn()
+    yield stand_in
+    stand_in.server.stop()
+
+
+def _make_client(stand_in, **properties):
+    client = ISPyBRestClient("lims-rest")
+    client.set_property("restRoot", stand_in.url)
+    client.set_property("restUserName", "user")
+    client.set_property("restPass", "pass")
+    client.set_property("site", "ESRF")
+    for name, value in properties.items():
+        client.set_property(name, value)
+    client.init()
+    return client
+
+
+def test_browse_thumbnails(stand_in):
+    client = _make_client(stand_in)
+
+    start = time.time()
+    for image_id in range(1, 11):
+        assert client.get_dc_thumbnail(image_id) == (
+            "%d.jpeg" % image_id,
+            str(image_id).encode() * 1000,
+        )
+    first_time = time.time() - start
+
+    start = time.time()
+    for image_id in range(1, 11):
+        client.get_dc_thumbnail(image_id)
+    second_time = time.time() - start
+
+    # one kept-alive connection, images downloaded once
+    assert len(stand_in.connections) == 1
+    assert stand_in.downloads == 10
+    assert second_time < first_time / 10
+    statistics = client.get_image_cache_statistics()
+    assert statistics["hits"] == 10
+    assert statistics["hit_rate"] == 0.5
+
+
+def test_revalidation_and_size_limit(stand_in):
+    client = _make_client(stand_in, image_cache_size=2500, image_cache_max_age=0)
+
+    client.get_dc_image(1)
+    client.get_dc_image(1)
+    assert stand_in.downloads == 1
+    assert stand_in.not_modified == 1
+    assert client.get_image_cache_statistics()["revalidations"] == 1
+
+    # 1000 bytes per image: the least recently used one is evicted
+    client.get_dc_image(2)
+    client.get_dc_image(1)
+    client.get_dc_image(3)
+    assert client.get_image_cache_statistics()["entries"] == 2
+    client.get_dc_image(2)
+    assert stand_in.downloads == 4
+
+
+def test_quality_indicator_plot_revalidated(stand_in):
+    client = _make_client(stand_in)
+
+    assert client.get_quality_indicator_plot(7) == b"7" * 1000
+    assert client.get_quality_indicator_plot(7) == b"7" * 1000
+    # not taken from the cache without asking the server
+    assert stand_in.downloads == 1
+    assert stand_in.not_modified == 1
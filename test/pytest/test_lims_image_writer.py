@@ -0,0 +1,100 @@
+import time
+
+import gevent
+
+from HardwareRepository.HardwareObjects.lims_image_writer import LimsImageWriter
+
+
+class SlowLims(object):
+    """LIMS client taking 10 ms per image, failing while down is set, and
+    rejecting the image numbers in invalid
+    """
+
+    def __init__(self):
+        self.images = []
+        self.down = False
+        self.invalid = ()
+
+    def store_images(self, image_dicts):
+        while image_dicts:
+            gevent.sleep(0.01)
+            if self.down:
+                raise IOError("LIMS is down")
+            if image_dicts[0]["imageNumber"] in self.invalid:
+                raise ValueError("Invalid image")
+            self.images.append(image_dicts.pop(0))
+
+
+def test_store_image_does_not_wait():
+    lims = SlowLims()
+    writer = LimsImageWriter(lims, batch_size=10)
+
+    start = time.time()
+    for frame in range(1, 51):
+        writer.store_image({"imageNumber": frame})
+    # 50 images take 0.5 s to write
+    assert time.time() - start < 0.1
+
+    assert writer.flush(5)
+    assert [image["imageNumber"] for image in lims.images] == list(range(1, 51))
+    assert writer.get_statistics()["stored"] == 50
+
+
+def test_retry_after_failure():
+    lims = SlowLims()
+    lims.down = True
+    writer = LimsImageWriter(lims, retry_delay=0.05, max_retry_delay=0.1)
+
+    for frame in range(1, 6):
+        writer.store_image({"imageNumber": frame})
+    gevent.sleep(0.2)
+    assert not lims.images
+    assert writer.get_statistics()["failures"] >= 2
+
+    lims.down = False
+    assert writer.flush(5)
+    assert [image["imageNumber"] for image in lims.images] == list(range(1, 6))
+
+
+def test_rejected_record_dropped():
+    lims = SlowLims()
+    lims.invalid = (1,)
+    writer = LimsImageWriter(lims, retry_delay=0.01)
+
+    for frame in range(1, 6):
+        writer.store_image({"imageNumber": frame})
+    assert writer.flush(1.0)
+    assert [image["imageNumber"] for image in lims.images] == [2, 3, 4, 5]
+    statistics = writer.get_statistics()
+    assert statistics["rejected"] == 1
+    assert statistics["failures"] == 3
+    assert statistics["queued"] == 0
+
+
+def test_spool_when_queue_full(tmp_path):
+    spool_file = str(tmp_path / "spool.jsonl")
+    lims = SlowLims()
+    lims.down = True
+    writer = LimsImageWriter(
+        lims, queue_size=5, spool_file=spool_file, retry_delay=0.05
+    )
+
+    for frame in range(1, 21):
+        writer.store_image({"imageNumber": frame})
+    assert tmp_path.joinpath("spool.jsonl").exists()
+    assert writer.get_statistics()["dropped"] == 0
+
+    lims.down = False
+    assert writer.flush(5)
+    assert sorted(image["imageNumber"] for image in lims.images) == list(range(1, 21))
+    assert not tmp_path.joinpath("spool.jsonl").exists()
+
+
+def test_spool_replayed_at_start(tmp_path):
+    spool_file = tmp_path / "spool.jsonl"
+    spool_file.write_text(u'{"imageNumber": 1}\n{"imageNumber": 2}\n')
+    lims = SlowLims()
+
+    writer = LimsImageWriter(lims, spool_file=str(spool_file))
+    assert writer.flush(5)
+    assert [image["imageNumber"] for image in lims.images] == [1, 2]
@@ -0,0 +1,243 @@
+import gevent
+import pytest
+
+from HardwareRepository import HardwareRepository as HWR
+from HardwareRepository.BaseHardwareObjects import HardwareObject
+from HardwareRepository.HardwareObjects.abstract.AbstractMultiCollect import (
+    AbstractMultiCollect,
+)
+from HardwareRepository.HardwareObjects.lims_image_writer import get_image_writer
+
+EXPOSURE_TIME = 0.001
+
+
+class LimsStandIn(object):
+    def __init__(self):
+        self.images = []
+
+    def get_property(self, name, default_value=None):
+        return default_value
+
+    def store_data_collection(self, mx_collection, bl_config=None):
+        return 1, None
+
+    def update_data_collection(self, mx_collection, wait=False):
+        pass
+
+    def store_images(self, image_dicts):
+        self.images.extend(image_dicts)
+        del image_dicts[:]
+
+
+class DiffractometerStandIn(object):
+    def get_centring_status(self):
+        return {}
+
+    def get_positions(self):
+        return {}
+
+    def wait_ready(self, timeout=None):
+        pass
+
+
+class FastCollect(AbstractMultiCollect, HardwareObject):
+    """Collection with a mockup detector, counting the beamline reads"""
+
+    def __init__(self, name):
+        AbstractMultiCollect.__init__(self)
+        HardwareObject.__init__(self, name)
+        self.reads = 0
+        self.frames = []
+        self._diffractometer = DiffractometerStandIn()
+
+    def diffractometer(self):
+        return self._diffractometer
+
+    def data_collection_hook(self, data_collect_parameters):
+        pass
+
+    def close_fast_shutter(self):
+        pass
+
+    def move_motors(self, motor_position_dict):
+        pass
+
+    def open_safety_shutter(self):
+        pass
+
+    def safety_shutter_opened(self):
+        return True
+
+    def close_safety_shutter(self):
+        pass
+
+    def prepare_intensity_monitors(self):
+        pass
+
+    def prepare_oscillation(
+        self, start, osc_range, exptime, number_of_images, shutterless, npass, first
+    ):
+        return start, start + osc_range
+
+    def do_oscillation(self, start, end, exptime, *args):
+        gevent.sleep(exptime)
+
+    def set_detector_filenames(self, frame_number, start, filename, *args, **kwargs):
+        self.frames.append(frame_number)
+
+    def last_image_saved(self):
+        return len(self.frames)
+
+    def prepare_acquisition(self, *args):
+        pass
+
+    def start_acquisition(self, *args):
+        pass
+
+    def stop_acquisition(self):
+        pass
+
+    def write_image(self, last_frame):
+        pass
+
+    def reset_detector(self):
+        pass
+
+    def data_collection_cleanup(self):
+        pass
+
+    def get_wavelength(self):
+        return 1.0
+
+    def get_undulators_gaps(self):
+        return {}
+
+    def get_resolution_at_corner(self):
+        return 1.0
+
+    def get_beam_size(self):
+        return 0.1, 0.1
+
+    def get_slit_gaps(self):
+        return 0.1, 0.1
+
+    def get_beam_shape(self):
+        return "ellipse"
+
+    def get_beam_centre(self):
+        return 0.0, 0.0
+
+    def get_machine_current(self):
+        self.reads += 1
+        return HWR.beamline.machine_info.get_current()
+
+    def get_machine_fill_mode(self):
+        return ""
+
+    def get_machine_message(self):
+        return HWR.beamline.machine_info.get_message()
+
+    def get_cryo_temperature(self):
+        return 100.0
+
+    def store_image_in_lims(self, frame, first_frame, last_frame):
+        return True
+
+    def generate_image_jpeg(self, *args, **kwargs):
+        pass
+
+    def take_crystal_snapshots(self, number_of_snapshots):
+        pass
+
+    def set_helical(self, helical_on):
+        pass
+
+    def set_helical_pos(self, helical_pos):
+        pass
+
+    def get_archive_directory(self, directory):
+        return None
+
+    def prepare_input_files(self, *args):
+        return None, None, None
+
+    def write_input_files(self, collection_id, **kwargs):
+        pass
+
+
+def _collect_parameters(directory, number_of_images, reference_interval):
+    return {
+        "fileinfo": {
+            "directory": directory,
+            "process_directory": directory,
+            "prefix": "test",
+            "run_number": 1,
+        },
+        "oscillation_sequence": [
+            {
+                "start": 0.0,
+                "range": 0.1,
+                "overlap": 0,
+                "number_of_images": number_of_images,
+                "start_image_number": 1,
+                "exposure_time": EXPOSURE_TIME,
+                "number_of_passes": 1,
+                "reference_interval": reference_interval,
+            }
+        ],
+        "shutterless": False,
+        "skip_images": False,
+        "motors": {},
+    }
+
+
+@pytest.fixture
+def lims(beamline, monkeypatch):
+    lims = LimsStandIn()
+    monkeypatch.setitem(beamline._objects, "lims", lims)
+    return lims
+
+
+def test_parameters_sampled_per_wedge(lims, tmp_path):
+    collect = FastCollect("collect")
+    collect.do_collect(None, _collect_parameters(str(tmp_path), 100, 4))
+    get_image_writer(lims).flush(5)
+
+    assert collect.frames == list(range(1, 101))
+    # 4 wedges
+    assert collect.reads == 4
+    assert [image["imageNumber"] for image in lims.images] == collect.frames
+    assert all(image["temperature"] == 100.0 for image in lims.images)
+
+
+def test_parameters_sampled_after_change(lims, tmp_path):
+    collect = FastCollect("collect")
+    read_frames = []
+
+    def do_oscillation(start, end, exptime, *args):
+        if len(collect.frames) == 10:
+            HWR.beamline.machine_info.emit("machInfoChanged", {})
+        read_frames.append(collect.reads)
+        gevent.sleep(exptime)
+
+    collect.do_oscillation = do_oscillation
+    collect.do_collect(None, _collect_parameters(str(tmp_path), 20, 1))
+
+    # read at the start of the wedge, then again after the change
+    assert collect.reads == 2
+    assert read_frames[9] == 1 and read_frames[10] == 2
+
+
+@pytest.mark.parametrize("with_lims", [False, True])
+def test_parameters_not_sampled_without_images(
+    with_lims, beamline, monkeypatch, tmp_path
+):
+    lims = LimsStandIn() if with_lims else None
+    monkeypatch.setitem(beamline._objects, "lims", lims)
+    collect = FastCollect("collect")
+    # no LIMS, or no frame stored in LIMS
+    collect.store_image_in_lims = lambda *args: False
+    collect.do_collect(None, _collect_parameters(str(tmp_path), 20, 4))
+
+    assert collect.frames == list(range(1, 21))
+    assert collect.reads == 0
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from scipy import ndimage
+
+from HardwareRepository.HardwareObjects.abstract.AbstractOnlineProcessing import (
+    AbstractOnlineProcessing,
+)
+
+STEPS_X = 13
+STEPS_Y = 7
+FIRST_IMAGE_NUM = 5
+RESULT_KEYS = ("score", "spots_num", "spots_resolution")
+
+
+class GridStandIn(object):
+    """Grid scanned line by line, in alternating directions"""
+
+    def get_col_row_from_image_serial(self, image_serial):
+        col, row = divmod(image_serial - FIRST_IMAGE_NUM, STEPS_Y)
+        if col % 2:
+            row = STEPS_Y - 1 - row
+        return col, row
+
+    def get_motor_pos_from_col_row(self, col, row):
+        return col, row
+
+    def set_score(self, score):
+        pass
+
+
+def _make_processing(images_num):
+    processing = AbstractOnlineProcessing("online-processing")
+    processing.grid = GridStandIn()
+    processing.interpolate_results = False
+    processing.plot_points_num = images_num
+    processing.params_dict = {
+        "first_image_num": FIRST_IMAGE_NUM,
+        "images_num": images_num,
+        "steps_x": STEPS_X,
+        "steps_y": STEPS_Y,
+        "run_number": 1,
+        "template": "test_%d_%05d.cbf",
+    }
+    processing.results_raw = dict((key, np.zeros(images_num)) for key in RESULT_KEYS)
+    processing.results_aligned = dict(
+        (key, np.zeros((STEPS_X, STEPS_Y))) for key in RESULT_KEYS
+    )
+    processing.init_alignment()
+    return processing
+
+
+def _align_all(processing, aligned_score):
+    """Alignment of all the processed images, as done before it was
+    incremental: returns the centre of mass and the best indexes
+    """
+    grid = processing.grid
+    score = processing.results_raw["score"]
+    for index in range(score.size):
+        col, row = grid.get_col_row_from_image_serial(index + FIRST_IMAGE_NUM)
+        if col < STEPS_X and row < STEPS_Y:
+            aligned_score[col][row] = score[index]
+    best_indexes = [
+        index for index in (-score).argsort(kind="stable")[:10] if score[index] > 0
+    ]
+    return ndimage.measurements.center_of_mass(aligned_score), best_indexes
+
+
+@pytest.mark.parametrize("images_num", [STEPS_X * STEPS_Y, STEPS_X * STEPS_Y + 4])
+def test_incremental_alignment(images_num):
+    """Random batches: same alignment as a full realignment after each batch"""
+    random = np.random.RandomState(0)
+    processing = _make_processing(images_num)
+    grid = processing.grid
+
+    # images past the end of the grid are not aligned
+    col_row = [
+        grid.get_col_row_from_image_serial(index + FIRST_IMAGE_NUM)
+        for index in range(images_num)
+    ]
+    assert list(zip(processing.grid_cols, processing.grid_rows)) == col_row
+    assert processing.grid_valid.sum() == STEPS_X * STEPS_Y
+
+    aligned_score = np.zeros((STEPS_X, STEPS_Y))
+    start_index = 0
+    while start_index < images_num:
+        end_index = min(start_index + random.randint(1, 20), images_num) - 1
+        for key in RESULT_KEYS:
+            processing.results_raw[key][start_index : end_index + 1] = random.rand(
+                end_index - start_index + 1
+            )
+        processing.align_processing_results(start_index, end_index)
+        start_index = end_index + 1
+
+        center_mass, best_indexes = _align_all(processing, aligned_score)
+        results = processing.results_aligned
+        assert np.array_equal(results["score"], aligned_score)
+        assert np.allclose(results["center_mass"], center_mass)
+        best_positions = results["best_positions"]
+        assert [position["index"] for position in best_positions] == best_indexes
+        for position in best_positions:
+            col, row = col_row[position["index"]]
+            assert position["col"] == col + 0.5
+            assert position["row"] == STEPS_Y - row - 0.5
@@ -0,0 +1,115 @@
+import gevent
+
+from HardwareRepository import Poller
+
+
+class PolledSource(object):
+    def __init__(self):
+        self.count = 0
+        self.values = []
+        self.errors = []
+
+    def read(self):
+        self.count += 1
+        return self.count
+
+    def fail(self):
+        raise RuntimeError("read failed")
+
+    def value_changed(self, value):
+        self.values.append(value)
+
+    def error(self, exc, poller_id):
+        self.errors.append((exc, poller_id))
+
+
+def test_poll_delivers_values():
+    source = PolledSource()
+    poller = Poller.poll(
+        source.read,
+        polling_period=20,
+        value_changed_callback=source.value_changed,
+        error_callback=source.error,
+    )
+    try:
+        gevent.sleep(0.3)
+        assert len(source.values) > 2
+        assert source.values == sorted(source.values)
+    finally:
+        poller.stop()
+
+
+def test_poll_deduplicates():
+    source = PolledSource()
+    poller = Poller.poll(
+        source.read,
+        polling_period=500,
+        value_changed_callback=source.value_changed,
+        error_callback=source.error,
+    )
+    try:
+        same_poller = Poller.poll(
+            source.read,
+            polling_period=100,
+            value_changed_callback=source.value_changed,
+            error_callback=source.error,
+        )
+        assert same_poller is poller
+        assert poller.get_polling_period() == 100
+        assert Poller.get_poller(poller.get_id()) is poller
+    finally:
+        poller.stop()
+    assert Poller.get_poller(poller.get_id()) is None
+
+
+def test_poll_stop():
+    source = PolledSource()
+    poller = Poller.poll(
+        source.read,
+        polling_period=20,
+        value_changed_callback=source.value_changed,
+        error_callback=source.error,
+    )
+    gevent.sleep(0.1)
+    poller.stop()
+    gevent.sleep(0.05)
+    count = source.count
+    gevent.sleep(0.1)
+    assert source.count == count
+
+
+def test_poll_error_callback():
+    source = PolledSource()
+    poller = Poller.poll(
+        source.fail,
+        polling_period=20,
+        value_changed_callback=source.value_changed,
+        error_callback=source.error,
+    )
+    try:
+        gevent.sleep(0.2)
+        assert len(source.errors) == 1
+        assert source.errors[0][1] == poller.get_id()
+    finally:
+        poller.stop()
+
+
+def test_pollers_share_bounded_workers():
+    sources = [PolledSource() for _ in range(200)]
+    pollers = [
+        Poller.poll(
+            source.read,
+            polling_period=50,
+            value_changed_callback=source.value_changed,
+            error_callback=source.error,
+        )
+        for source in sources
+    ]
+    try:
+        gevent.sleep(0.3)
+        scheduler = Poller.get_scheduler()
+        assert scheduler.get_workers_count() <= scheduler.max_workers
+        assert all(source.values for source in sources)
+    finally:
+        for poller in pollers:
+            poller.stop()
@@ -0,0 +1,123 @@
+import copy
+
+from HardwareRepository.HardwareObjects import queue_model_objects as qmo
+from HardwareRepository.HardwareObjects.QueueModel import QueueModel
+
+
+def make_queue_model():
+    queue_model = QueueModel("queue-model")
+    queue_model.emit = lambda *args, **kwargs: None
+    sample = qmo.Sample()
+    queue_model.add_child(queue_model.get_model_root(), sample)
+    group = qmo.TaskGroup()
+    queue_model.add_child(sample, group)
+    return queue_model, group
+
+
+def add_data_collection(queue_model, group, directory, prefix):
+    dc = qmo.DataCollection()
+    path_template = dc.acquisitions[0].path_template
+    path_template.directory = directory
+    path_template.base_prefix = prefix
+    path_template.start_num = 1
+    path_template.num_files = 10
+    path_template.run_number = queue_model.get_next_run_number(path_template)
+    queue_model.add_child(group, dc)
+    return dc
+
+
+def new_path_template(directory, prefix, run_number=1):
+    path_template = qmo.PathTemplate()
+    path_template.directory = directory
+    path_template.base_prefix = prefix
+    path_template.run_number = run_number
+    path_template.start_num = 1
+    path_template.num_files = 10
+    return path_template
+
+
+def test_get_node():
+    queue_model, group = make_queue_model()
+    dcs = [add_data_collection(queue_model, group, "/data", "p") for _ in range(5)]
+
+    for dc in dcs:
+        assert queue_model.get_node(dc._node_id) is dc
+        assert queue_model.get_node(dc._node_id, group) is dc
+    queue_model.del_child(group, dcs[0])
+    assert queue_model.get_node(dcs[0]._node_id) is None
+
+
+def test_run_numbers_and_collisions():
+    queue_model, group = make_queue_model()
+    dcs = [add_data_collection(queue_model, group, "/data", "p") for _ in range(3)]
+    add_data_collection(queue_model, group, "/data", "other")
+
+    assert [dc.acquisitions[0].path_template.run_number for dc in dcs] == [1, 2, 3]
+    assert queue_model.get_next_run_number(new_path_template("/data/", "p")) == 4
+    assert queue_model.check_for_path_collisions(new_path_template("/data", "p", 2))
+    assert not queue_model.check_for_path_collisions(new_path_template("/data", "p", 4))
+
+    # The current path template is excluded
+    path_template = dcs[2].acquisitions[0].path_template
+    assert queue_model.get_next_run_number(path_template) == 3
+    assert queue_model.get_next_run_number(path_template, False) == 4
+
+
+def test_index_follows_remove_and_rename():
+    queue_model, group = make_queue_model()
+    dcs = [add_data_collection(queue_model, group, "/data", "p") for _ in range(3)]
+
+    queue_model.del_child(group, dcs[2])
+    assert queue_model.get_next_run_number(new_path_template("/data", "p")) == 3
+
+    dcs[1].acquisitions[0].path_template.base_prefix = "renamed"
+    assert queue_model.get_next_run_number(new_path_template("/data", "p")) == 2
+    assert queue_model.get_next_run_number(new_path_template("/data", "renamed")) == 3
+    assert queue_model.check_for_path_collisions(
+        new_path_template("/data", "renamed", 2)
+    )
+
+
+def test_index_follows_replaced_path_template():
+    queue_model, group = make_queue_model()
+    dcs = [add_data_collection(queue_model, group, "/data", "p") for _ in range(2)]
+    old_path_template = dcs[1].acquisitions[0].path_template
+
+    dcs[1].acquisitions[0].path_template = new_path_template("/data", "other", 5)
+    assert queue_model.get_next_run_number(new_path_template("/data", "p")) == 2
+    assert queue_model.get_next_run_number(new_path_template("/data", "other")) == 6
+
+    # the replaced path template is no longer watched
+    old_path_template.base_prefix = "old"
+    assert queue_model.get_next_run_number(new_path_template("/data", "old")) == 1
+
+
+def test_index_follows_reparenting():
+    queue_model, group = make_queue_model()
+    other_group = qmo.TaskGroup()
+    queue_model.add_child(group.get_parent(), other_group)
+    dc = add_data_collection(queue_model, group, "/data", "p")
+    old_node_id = dc._node_id
+
+    queue_model.add_child(other_group, dc)
+    assert dc not in group.get_children()
+    assert queue_model.get_node(old_node_id) is None
+    assert queue_model.get_node(dc._node_id, other_group) is dc
+
+    queue_model.set_parent(group, dc)
+    assert dc in group.get_children() and dc not in other_group.get_children()
+    assert queue_model.get_node(dc._node_id, group) is dc
+    assert queue_model.get_node(dc._node_id, other_group) is None
+    assert queue_model.get_next_run_number(new_path_template("/data", "p")) == 2
+
+
+def test_change_callbacks_released():
+    queue_model, group = make_queue_model()
+    dc = add_data_collection(queue_model, group, "/data", "p")
+    path_template = dc.acquisitions[0].path_template
+    assert path_template.__dict__.get("_change_callback") is not None
+    assert "_change_callback" not in copy.deepcopy(path_template).__dict__
+
+    queue_model.del_child(group, dc)
+    assert path_template.__dict__.get("_change_callback") is None
+    assert dc.acquisitions[0].__dict__.get("_change_callback") is None
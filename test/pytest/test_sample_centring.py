@@ -0,0 +1,205 @@
+import math
+import time
+import types
+
+import gevent
+import numpy
+import pytest
+
+from HardwareRepository.HardwareObjects import sample_centring
+
+PIXELS_PER_MM = 1000.0
+BEAM = (320, 240)
+# sample offset from the rotation axis [mm]
+RADIUS = 0.1
+ANGLE = math.radians(30)
+
+
+class FakeMotor(object):
+    """Motor moving at velocity (instantly if None)"""
+
+    def __init__(self, position=0.0, velocity=None):
+        self.velocity = velocity
+        self._start = self._target = position
+        self._start_time = self._end_time = 0
+
+    def get_value(self):
+        now = time.time()
+        if now >= self._end_time:
+            return self._target
+        fraction = (now - self._start_time) / (self._end_time - self._start_time)
+        return self._start + fraction * (self._target - self._start)
+
+    def is_ready(self):
+        return time.time() >= self._end_time
+
+    def wait_ready(self, timeout=None):
+        gevent.sleep(max(0, self._end_time - time.time()))
+
+    def set_value(self, value, timeout=0):
+        self._start = self.get_value()
+        self._target = value
+        self._start_time = time.time()
+        self._end_time = self._start_time
+        if self.velocity:
+            self._end_time += abs(value - self._start) / self.velocity
+        if timeout != 0:
+            self.wait_ready()
+
+    def set_value_relative(self, delta, timeout=0):
+        self.set_value(self._target + delta, timeout)
+
+
+class FakeCamera(object):
+    """Image of a bright spot (the loop) turning with phi"""
+
+    def __init__(self, phi, sampx, sampy):
+        self.phi, self.sampx, self.sampy = phi, sampx, sampy
+        self.snapshots = 0
+
+    def get_width(self):
+        return 640
+
+    def get_height(self):
+        return 480
+
+    def get_snapshot(self, bw=None, return_as_array=True):
+        self.snapshots += 1
+        phi = math.radians(self.phi.get_value())
+        # the loop offset, seen from the current sampx/sampy
+        offset_x = RADIUS * math.cos(ANGLE) - self.sampx.get_value()
+        offset_y = RADIUS * math.sin(ANGLE) - self.sampy.get_value()
+        vertical = offset_x * math.sin(phi) + offset_y * math.cos(phi)
+        image = numpy.zeros((480, 640), numpy.uint8)
+        image[int(round(BEAM[1] + vertical * PIXELS_PER_MM)), BEAM[0]] = 255
+        return image
+
+
+def fake_find_loop(image, **kwargs):
+    y, x = numpy.unravel_index(numpy.argmax(image), image.shape)
+    return "Coord", x, y
+
+
+@pytest.fixture
+def centring(monkeypatch):
+    monkeypatch.setattr(
+        sample_centring,
+        "lucid",
+        types.SimpleNamespace(find_loop=fake_find_loop),
+        raising=False,
+    )
+    motors = {
+        "phi": sample_centring.CentringMotor(FakeMotor(0.0, velocity=360.0)),
+        "phiy": sample_centring.CentringMotor(FakeMotor()),
+        "phiz": sample_centring.CentringMotor(FakeMotor()),
+        "sampx": sample_centring.CentringMotor(FakeMotor()),
+        "sampy": sample_centring.CentringMotor(FakeMotor()),
+    }
+    camera = FakeCamera(motors["phi"], motors["sampx"], motors["sampy"])
+    return camera, motors
+
+
+@pytest.mark.parametrize("continuous", [False, True])
+def test_auto_centring(centring, continuous):
+    camera, motors = centring
+    procedure = sample_centring.start_auto(
+        camera,
+        motors,
+        PIXELS_PER_MM,
+        PIXELS_PER_MM,
+        BEAM[0],
+        BEAM[1],
+        n_points=5,
+        continuous=continuous,
+    )
+    centred_pos = procedure.get(timeout=10)
+
+    positions = dict((role, centred_pos[motor.motor]) for role, motor in motors.items())
+    assert positions["sampx"] == pytest.approx(RADIUS * math.cos(ANGLE), abs=2e-3)
+    assert positions["sampy"] == pytest.approx(RADIUS * math.sin(ANGLE), abs=2e-3)
+    assert positions["phiz"] == pytest.approx(0, abs=2e-3)
+    # the sample does not move on screen anymore
+    images = [camera.get_snapshot()]
+    motors["phi"].set_value(90, timeout=None)
+    images.append(camera.get_snapshot())
+    assert abs(fake_find_loop(images[0])[2] - fake_find_loop(images[1])[2]) <= 2
+
+
+def test_capture_rotation(centring):
+    camera, motors = centring
+    phi = motors["phi"]
+    t0 = time.time()
+    frames = sample_centring.capture_rotation(camera, phi, 180, 7)
+
+    # one move of 0.5 s, no stop at each snapshot
+    assert time.time() - t0 < 0.6
+    phi_positions = [phi_position for _, phi_position, _ in frames]
+    assert phi_positions == pytest.approx([0, 30, 60, 90, 120, 150, 180], abs=3)
+    assert all(isinstance(image, numpy.ndarray) for _, _, image in frames)
+
+
+def _reference_solution(X, Y, phi_positions, chi_angle):
+    """leastsq and numpy.matrix fit, as before the closed-form solver"""
+    from scipy import optimize
+
+    def errfunc(p, x, y):
+        return p[0] * numpy.sin(x + p[1]) + p[2] - y
+
+    chi_angle = math.radians(chi_angle)
+    chi_rot = numpy.array(
+        [
+            [math.cos(chi_angle), -math.sin(chi_angle)],
+            [math.sin(chi_angle), math.cos(chi_angle)],
+        ]
+    )
+    Z = chi_rot.dot([X, Y])
+    (r, a, offset), _ = optimize.leastsq(
+        errfunc, [1.0, 0.0, 0.0], args=(numpy.array(phi_positions), Z[1])
+    )
+    d = chi_rot.T.dot([Z[0].mean(), offset])
+    return r * math.cos(a), r * math.sin(a), d[0], d[1]
+
+
+def _click_sets(count, n_points, noise=0.002):
+    random = numpy.random.RandomState(1)
+    phi_positions = numpy.radians(numpy.linspace(0, 180, n_points))
+    radius = random.uniform(0.01, 0.3, (count, 1))
+    angle = random.uniform(-math.pi, math.pi, (count, 1))
+    X = random.uniform(0.2, 0.4, (count, 1)) + random.normal(
+        0, noise, (count, n_points)
+    )
+    Y = (
+        random.uniform(0.2, 0.3, (count, 1))
+        + radius * numpy.sin(phi_positions + angle)
+        + random.normal(0, noise, (count, n_points))
+    )
+    return X, Y, phi_positions
+
+
+@pytest.mark.parametrize("chi_angle", [0, 25])
+def test_solve_centring_equivalence(chi_angle):
+    X, Y, phi_positions = _click_sets(50, 5)
+    solution = sample_centring.solve_centring(X, Y, phi_positions, chi_angle)
+
+    for index in range(len(X)):
+        reference = _reference_solution(X[index], Y[index], phi_positions, chi_angle)
+        result = [
+            solution[name][index] for name in ("dx", "dy", "horizontal", "vertical")
+        ]
+        assert result == pytest.approx(reference, abs=1e-6)
+
+
+def test_solve_centring_errors():
+    X, Y, phi_positions = _click_sets(2000, 8, noise=0.01)
+    solution = sample_centring.solve_centring(X, Y, phi_positions)
+    exact = sample_centring.solve_centring(*_click_sets(2000, 8, noise=0))
+
+    # the standard errors match the scatter of the solutions
+    scatter = numpy.std(solution["dx"] - exact["dx"])
+    assert numpy.median(solution["dx_error"]) == pytest.approx(scatter, rel=0.2)
+
+    # three points: exact fit, no error estimate
+    solution = sample_centring.solve_centring(
+        X[0, :3], Y[0, :3], phi_positions[:3]
+    )
+    assert numpy.isnan(solution["dx_error"])
@@ -0,0 +1,113 @@
+import types
+
+import pytest
+
+from HardwareRepository.Command import Tango
+
+
+class FakeDeviceProxy(object):
+    instances = []
+
+    def __init__(self, device_name):
+        self.device_name = device_name
+        self.timeout = None
+        self.calls = []
+        FakeDeviceProxy.instances.append(self)
+
+    def ping(self):
+        self.calls.append("ping")
+        return 0
+
+    def set_timeout_millis(self, timeout):
+        self.timeout = timeout
+
+    def attribute_list_query(self):
+        self.calls.append("attribute_list_query")
+        return [types.SimpleNamespace(name="Attr%d" % i) for i in range(30)]
+
+    def read_attribute(self, attr_name):
+        return types.SimpleNamespace(value=0)
+
+    def Open(self):
+        self.calls.append("Open")
+        return True
+
+    def Close(self):
+        raise Tango.PyTango.ConnectionFailed("device server not running")
+
+
+@pytest.fixture(autouse=True)
+def fake_tango(monkeypatch):
+    fake_pytango = types.SimpleNamespace(DevFailed=Exception)
+    fake_pytango.ConnectionFailed = type("ConnectionFailed", (Exception,), {})
+    monkeypatch.setattr(Tango, "PyTango", fake_pytango, raising=False)
+    monkeypatch.setattr(Tango, "DeviceProxy", FakeDeviceProxy, raising=False)
+    monkeypatch.setattr(FakeDeviceProxy, "instances", [])
+    for cache in ("_devices", "_attribute_names"):
+        monkeypatch.setattr(Tango.TangoDevicePool, cache, {})
+
+
+def test_channels_and_commands_share_device():
+    channels = [
+        Tango.TangoChannel("ch%d" % i, "attr%d" % i, "test/fake/device")
+        for i in range(30)
+    ]
+    command = Tango.TangoCommand("open", "Open", "test/fake/device")
+    assert command() is True
+
+    assert len(FakeDeviceProxy.instances) == 1
+    device = FakeDeviceProxy.instances[0]
+    assert all(channel.device is device for channel in channels)
+    assert command.device is device
+    assert device.calls == ["ping", "attribute_list_query", "Open"]
+    assert device.timeout == Tango.DEFAULT_TIMEOUT
+
+
+def test_timeouts_not_shared():
+    channel = Tango.TangoChannel("ch", "attr0", "test/fake/device", timeout=100)
+    slow_channel = Tango.TangoChannel("slow", "attr1", "test/fake/device")
+    command = Tango.TangoCommand("open", "Open", "test/fake/device")
+    command()
+    # same default timeout
+    assert command.device is slow_channel.device
+    command.set_device_timeout(30000)
+
+    assert channel.device.timeout == 100
+    assert slow_channel.device.timeout == Tango.DEFAULT_TIMEOUT
+    assert [device.timeout for device in FakeDeviceProxy.instances] == [
+        100,
+        Tango.DEFAULT_TIMEOUT,
+        30000,
+    ]
+    assert command.device.timeout == 30000
+
+
+def test_reconnect_after_connection_failure():
+    command = Tango.TangoCommand("close", "Close", "test/fake/device")
+    channel = Tango.TangoChannel("ch", "attr0", "test/fake/device")
+    command()
+    assert command.device is None
+    assert Tango.TangoDevicePool._devices == {}
+    assert Tango.TangoDevicePool._attribute_names == {}
+
+    # a new proxy, pinged
+    command()
+    assert len(FakeDeviceProxy.instances) == 2
+    assert FakeDeviceProxy.instances[-1].calls == ["ping"]
+    assert channel.device is FakeDeviceProxy.instances[0]
+
+
+def test_unknown_attribute():
+    channel = Tango.TangoChannel("ch", "missing", "test/fake/device")
+    assert channel.device is None
+    assert Tango.TangoDevicePool.get_device("test/fake/device") is not None
+
+
+def test_failed_ping_is_not_pooled(monkeypatch):
+    def ping(self):
+        raise Tango.PyTango.ConnectionFailed()
+
+    monkeypatch.setattr(FakeDeviceProxy, "ping", ping)
+    with pytest.raises(Tango.ConnectionError):
+        Tango.TangoChannel("ch", "attr0", "test/fake/device")
+    assert Tango.TangoDevicePool._devices == {}
@@ -0,0 +1,182 @@
+import sys
+import types
+
+import gevent
+import gevent.monkey
+import pytest
+
+from HardwareRepository.BaseHardwareObjects import HardwareObject
+from HardwareRepository.Command import Tango
+
+_start_new_thread = gevent.monkey.get_original(
+    "thread" if sys.version_info[0] < 3 else "_thread", "start_new_thread"
+)
+
+FakePyTango = types.SimpleNamespace(
+    AttrQuality=types.SimpleNamespace(ATTR_VALID=0, ATTR_INVALID=1),
+    EventType=types.SimpleNamespace(CHANGE_EVENT=0),
+    DevFailed=Exception,
+    ConnectionFailed=Exception,
+)
+
+
+class FakeAttrValue(object):
+    def __init__(self, value):
+        self.value = value
+        self.quality = FakePyTango.AttrQuality.ATTR_VALID
+
+
+class FakeEvent(object):
+    def __init__(self, value):
+        self.err = False
+        self.errors = ()
+        self.attr_value = FakeAttrValue(value)
+
+
+class FakeDeviceProxy(object):
+    """PyTango.DeviceProxy stand-in; fire() pushes change events"""
+
+    def __init__(self, device_name):
+        self.device_name = device_name
+        self.subscriptions = {}
+
+    def ping(self):
+        return 0
+
+    def set_timeout_millis(self, timeout):
+        pass
+
+    def attribute_list_query(self):
+        return [types.SimpleNamespace(name="position")]
+
+    def subscribe_event(self, attr_name, event_type, callback, filters, stateless):
+        event_id = len(self.subscriptions) + 1
+        self.subscriptions[event_id] = callback
+        callback.push_event(FakeEvent(0))
+        return event_id
+
+    def unsubscribe_event(self, event_id):
+        del self.subscriptions[event_id]
+
+    def fire(self, value):
+        for callback in list(self.subscriptions.values()):
+            callback.push_event(FakeEvent(value))
+
+
+class SilentDeviceProxy(FakeDeviceProxy):
+    """Device proxy sending no initial event when subscribing"""
+
+    def subscribe_event(self, attr_name, event_type, callback, filters, stateless):
+        event_id = len(self.subscriptions) + 1
+        self.subscriptions[event_id] = callback
+        return event_id
+
+
+class Listener(object):
+    def __init__(self):
+        self.values = []
+
+    def update(self, value):
+        self.values.append(value)
+
+
+@pytest.fixture(autouse=True)
+def fake_tango(monkeypatch):
+    monkeypatch.setattr(Tango, "PyTango", FakePyTango, raising=False)
+    monkeypatch.setattr(Tango, "DeviceProxy", FakeDeviceProxy, raising=False)
+    for cache in ("_devices", "_attribute_names"):
+        monkeypatch.setattr(Tango.TangoDevicePool, cache, {})
+
+
+def _make_channel(monkeypatch, **kwargs):
+    channel = Tango.TangoChannel(
+        "test", "position", "test/fake/device", polling="events", **kwargs
+    )
+    listener = Listener()
+    channel.connect_signal("update", listener.update)
+    gevent.sleep(0.01)
+    # connected after the initial event
+    listener.values.clear()
+    return channel, listener
+
+
+def test_events_from_tango_thread_are_bounded(monkeypatch):
+    channel, listener = _make_channel(monkeypatch)
+    values = listener.values
+    nevents = 1000000
+    finished = []
+
+    def tango_thread():
+        for i in range(1, nevents + 1):
+            channel.device.fire(i)
+        finished.append(True)
+
+    _start_new_thread(tango_thread, ())
+    with gevent.Timeout(60):
+        while not finished or not values or values[-1] != nevents:
+            # a slow receiver
+            gevent.sleep(0.01)
+            assert channel.get_event_statistics()["queue_depth"] <= 1
+
+    statistics = channel.get_event_statistics()
+    assert statistics["received"] == nevents + 1
+    # the initial value was delivered before the listener was connected
+    assert statistics["dropped"] == nevents - len(values)
+    # values are dropped, but the latest one is always delivered, in order
+    assert len(values) < nevents
+    assert values == sorted(values)
+    assert channel.value == nevents
+
+
+def test_event_queue_size(monkeypatch):
+    channel, listener = _make_channel(monkeypatch, event_queue_size=3)
+    for i in range(1, 11):
+        channel.device.fire(i)
+    gevent.sleep(0.05)
+    assert listener.values == [8, 9, 10]
+    assert channel.get_event_statistics()["dropped"] == 7
+
+
+def test_unsubscribe(monkeypatch):
+    channel, listener = _make_channel(monkeypatch)
+    channel.device.fire(1)
+    gevent.sleep(0.05)
+    assert listener.values == [1]
+
+    channel.unsubscribe()
+    assert channel.device.subscriptions == {}
+    channel.push_event(FakeEvent(2))
+    gevent.sleep(0.05)
+    assert listener.values == [1]
+    assert channel.get_event_statistics()["queue_depth"] == 0
+
+
+def test_unsubscribe_on_teardown(monkeypatch):
+    hwobj = HardwareObject("test")
+    channel = hwobj.add_channel(
+        {
+            "type": "tango",
+            "name": "position",
+            "tangoname": "test/fake/device",
+            "polling": "events",
+        },
+        "position",
+    )
+    assert channel.device.subscriptions
+
+    hwobj.clear_gevent()
+    assert channel.device.subscriptions == {}
+    assert channel.event_mailbox.closed
+
+
+def test_first_event_from_tango_thread(monkeypatch):
+    # no dispatcher yet, and no event pushed from the gevent thread
+    monkeypatch.setattr(Tango, "_event_dispatcher", None)
+    monkeypatch.setattr(Tango, "DeviceProxy", SilentDeviceProxy, raising=False)
+    channel, listener = _make_channel(monkeypatch)
+
+    _start_new_thread(channel.device.fire, (1,))
+    with gevent.Timeout(5):
+        while not listener.values:
+            gevent.sleep(0.01)
+    assert listener.values == [1]
@@ -0,0 +1,89 @@
+import gevent
+
+from HardwareRepository.Command import Tango
+
+
+class FakeAttribute(object):
+    def __init__(self, value):
+        self.value = value
+        self.has_failed = False
+
+
+class FakeDeviceProxy(object):
+    def __init__(self, device_name):
+        self.device_name = device_name
+        self.values = {}
+        self.read_attributes_calls = []
+
+    def read_attributes(self, attr_names, *args):
+        self.read_attributes_calls.append(list(attr_names))
+        return [self.read_attribute(name) for name in attr_names]
+
+    def read_attribute(self, attr_name, *args):
+        if attr_name == "bad":
+            raise RuntimeError("no attribute bad")
+        return FakeAttribute(self.values.get(attr_name, 0))
+
+
+class FakeChannel(object):
+    def __init__(self, attribute_name, polling):
+        self.attribute_name = attribute_name
+        self.polling = polling
+        self.read_as_str = False
+        self.values = []
+        self.failures = 0
+
+    def update(self, value):
+        self.values.append(value)
+
+    def poll_failed(self, e, poller_id):
+        self.failures += 1
+
+
+def test_poll_group_reads_device_once_per_tick(monkeypatch):
+    monkeypatch.setattr(Tango, "RawDeviceProxy", FakeDeviceProxy, raising=False)
+    poll_group = Tango.TangoPollGroup("test/fake/device")
+    fast_channels = [FakeChannel("fast%d" % i, 100) for i in range(10)]
+    slow_channel = FakeChannel("slow", 300)
+
+    try:
+        for channel in fast_channels + [slow_channel]:
+            poll_group.add_channel(channel)
+        assert poll_group.tick == 100
+
+        poll_group.raw_device.values["fast0"] = 5
+        gevent.sleep(0.65)
+
+        calls = poll_group.raw_device.read_attributes_calls
+        # one call per tick, for all the due attributes
+        assert 4 <= len(calls) <= 8
+        assert all(len(attr_names) >= 10 for attr_names in calls)
+        slow_reads = sum(attr_names.count("slow") for attr_names in calls)
+        assert 1 <= slow_reads < len(calls)
+
+        # only changes are dispatched
+        assert fast_channels[0].values == [5]
+        assert slow_channel.values == [0]
+    finally:
+        poll_group.poller.stop()
+
+
+def test_failing_attribute_isolated(monkeypatch):
+    monkeypatch.setattr(Tango, "RawDeviceProxy", FakeDeviceProxy, raising=False)
+    poll_group = Tango.TangoPollGroup("test/fake/device")
+    good_channel = FakeChannel("good", 100)
+    bad_channel = FakeChannel("bad", 100)
+
+    try:
+        poll_group.add_channel(good_channel)
+        poll_group.add_channel(bad_channel)
+        gevent.sleep(0.25)
+        poll_group.raw_device.values["good"] = 5
+        gevent.sleep(0.25)
+
+        assert good_channel.values == [0, 5]
+        assert good_channel.failures == 0
+        assert bad_channel.failures >= 3
+        assert not poll_group.poller.is_stopped()
+    finally:
+        poll_group.poller.stop()
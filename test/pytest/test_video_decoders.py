@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from HardwareRepository.HardwareObjects.abstract.AbstractVideoDevice import (
+    AbstractVideoDevice,
+)
+
+WIDTH = 8
+HEIGHT = 4
+
+
+class VideoStandIn(AbstractVideoDevice):
+    def get_image(self):
+        return None, WIDTH, HEIGHT
+
+    def get_raw_image_size(self):
+        return [WIDTH, HEIGHT]
+
+
+@pytest.mark.parametrize(
+    "decoder_name, dtype, scale",
+    [
+        ("y8_2_rgb", np.uint8, 1),
+        ("y16_2_rgb", np.uint16, 100),
+        ("yuv_2_rgb", np.uint16, 100),
+        ("bayer_rg16_2_rgb", np.uint16, 100),
+    ],
+)
+def test_decoded_frames_are_independent(decoder_name, dtype, scale):
+    decoder = getattr(VideoStandIn("video"), decoder_name)
+    frames = [np.full((HEIGHT, WIDTH), value * scale, dtype) for value in (10, 40, 90)]
+
+    first_image = decoder(frames[0].tobytes())
+    expected = first_image.copy()
+    images = [decoder(frame.tobytes()) for frame in frames[1:]]
+
+    # a kept image is not overwritten by the next decodings
+    assert (first_image == expected).all()
+    assert not any(np.shares_memory(first_image, image) for image in images)
+    assert first_image.shape == (HEIGHT, WIDTH, 3)
+    assert first_image.dtype == np.uint8
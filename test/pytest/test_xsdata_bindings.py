@@ -0,0 +1,107 @@
+import io
+import sys
+
+import pytest
+
+from HardwareRepository.HardwareObjects import edna_test_data
+from HardwareRepository.HardwareObjects import xsdata_bindings
+
+
+@pytest.fixture
+def unloaded_bindings(monkeypatch):
+    for module_name in xsdata_bindings.XSDATA_MODULES:
+        for name in (module_name, xsdata_bindings.PACKAGE + module_name):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+
+
+def test_import_on_first_use(unloaded_bindings):
+    xsdata = xsdata_bindings.XSDataBindings("XSDataCommon", "XSDataMXCuBEv1_3")
+    assert "XSDataCommon" not in sys.modules
+
+    value = xsdata.XSDataDouble(1.5)
+    assert value.getValue() == 1.5
+    assert "XSDataMXCuBEv1_3" not in sys.modules
+
+    xsdata.XSDataResultMXCuBE()
+    # one module, under both names
+    for module_name in ("XSDataCommon", "XSDataMXv1", "XSDataMXCuBEv1_3"):
+        assert (
+            sys.modules[module_name]
+            is sys.modules[xsdata_bindings.PACKAGE + module_name]
+        )
+    assert "XSDataAutoprocv1_0" not in sys.modules
+
+
+def test_unknown_names():
+    with pytest.raises(ValueError):
+        xsdata_bindings.XSDataBindings("XSDataUnknown")
+
+    xsdata = xsdata_bindings.XSDataBindings("XSDataCommon")
+    with pytest.raises(AttributeError):
+        xsdata.XSDataUnknown
+
+
+def _export(xsdata_object):
+    output = io.StringIO()
+    xsdata_object.export(output, 0, name_=xsdata_object.__class__.__name__)
+    return output.getvalue()
+
+
+@pytest.fixture
+def parse_backend():
+    yield xsdata_bindings.set_parse_backend
+    xsdata_bindings.set_parse_backend("minidom")
+
+
+def test_stream_parser_equivalence(parse_backend, tmp_path):
+    xsdata = xsdata_bindings.XSDataBindings(
+        "XSDataCommon", "XSDataMXCuBEv1_3", "XSDataControlDozorv1_1"
+    )
+    dozor_result = xsdata.XSDataResultControlDozor()
+    for index in range(1, 4):
+        image = xsdata.XSDataControlImageDozor()
+        image.setNumber(xsdata.XSDataInteger(index))
+        image.setScore(xsdata.XSDataDouble(index * 0.5))
+        dozor_result.addImageDozor(image)
+    dozor_file = str(tmp_path / "dozor_result.xml")
+    dozor_result.exportToFile(dozor_file)
+
+    results = {}
+    for backend in xsdata_bindings.PARSE_BACKENDS:
+        parse_backend(backend)
+        results[backend] = (
+            _export(
+                xsdata.XSDataResultMXCuBE.parseString(
+                    edna_test_data.EDNA_RESULT_DATA
+                )
+            ),
+            _export(
+                xsdata.XSDataInputMXCuBE.parseString(edna_test_data.EDNA_TEST_DATA)
+            ),
+            _export(xsdata.XSDataResultControlDozor.parseFile(dozor_file)),
+        )
+    assert results["stream"] == results["minidom"]
+    assert results["stream"][2] == _export(dozor_result)
+
+    with pytest.raises(ValueError):
+        parse_backend("sax")
+
+
+def test_parse_round_trip(parse_backend):
+    xsdata = xsdata_bindings.XSDataBindings("XSDataCommon", "XSDataMXCuBEv1_3")
+    # generated parsers by default
+    assert xsdata_bindings._parse_backend == "minidom"
+    parse_string = xsdata.XSDataResultMXCuBE.parseString
+    assert parse_string is xsdata_bindings._minidom_parsers[
+        xsdata.XSDataResultMXCuBE
+    ][0]
+
+    exports = {}
+    for backend in xsdata_bindings.PARSE_BACKENDS:
+        parse_backend(backend)
+        result = xsdata.XSDataResultMXCuBE.parseString(edna_test_data.EDNA_RESULT_DATA)
+        exports[backend] = _export(result)
+        # exported, then parsed again
+        again = xsdata.XSDataResultMXCuBE.parseString(exports[backend])
+        assert _export(again) == exports[backend]
+    assert exports["stream"] == exports["minidom"]
@@ -59,7 +59,8 @@ def get_image(lima_tango_device):
         hfmt, img_data[1][:hsize]
     )
 
-    raw_data = img_data[1][hsize:]
+    # no copy of the image data
+    raw_data = memoryview(img_data[1])[hsize:]
 
     return raw_data, width, height, frame_number
 